@@ -1,22 +1,40 @@
+import json
 import os
+import tempfile
+from datetime import timedelta
 from flask import Flask, jsonify
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flasgger import Swagger
 from flask_cors import CORS
 from dotenv import load_dotenv
+from werkzeug.middleware.proxy_fix import ProxyFix
 from models import db
-from extensions import db, bcrypt
+from extensions import db, bcrypt, limiter
+import applog
+import catalogue
+import compression
+import db_routing
+import events
+import recommendations
+import revocation
+import suggest
 from routes.user_routes import user_bp
 from routes.spaces_routes import spaces_bp
 from routes.bookings_routes import bookings_bp
 from routes.payments_routes import payments_bp
+from routes.events_routes import events_bp
+from routes.reviews_routes import reviews_bp
+from validation import FastJSONProvider
+from commands import (archive_command, catalogue_cli, db_audit_command, geocode_command, jobs_cli,
+                      partitions_cli, recommendations_cli, recurring_cli, seed_command, swagger_cli)
 
 # Load environment variables from .env
 load_dotenv()
 
 def create_app(testing=True):
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
 
     # Determine environment
     flask_env = os.getenv("FLASK_ENV", "development")
@@ -24,9 +42,17 @@ def create_app(testing=True):
     # Security and config
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'super-secret-key')
     app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'super-secret-jwt-key')
+    # Short-lived access tokens, renewed with a refresh token at /api/refresh
+    app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', '15')))
+    app.config['JWT_REFRESH_TOKEN_EXPIRES'] = timedelta(days=int(os.getenv('JWT_REFRESH_TOKEN_DAYS', '30')))
+    # Where revoked tokens are shared between workers: 'database://' or 'redis://...'
+    app.config['JWT_REVOCATION_STORE_URL'] = os.getenv('JWT_REVOCATION_STORE_URL', 'database://')
+    app.config['JWT_REVOCATION_SYNC_SECONDS'] = float(os.getenv('JWT_REVOCATION_SYNC_SECONDS', '1'))
 
     # Database configuration
-    if flask_env == "production":
+    if os.getenv('DATABASE_URL'):
+        app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL')
+    elif flask_env == "production":
         db_user = os.getenv('DB_USER')
         db_password = os.getenv('DB_PASSWORD')
         db_host = os.getenv('DB_HOST', 'localhost')
@@ -36,7 +62,50 @@ def create_app(testing=True):
     else:
         app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:///spacer.db"
 
+    # Read replicas (comma-separated URLs) and their staleness policy
+    replica_urls = [url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    app.config['SQLALCHEMY_BINDS'] = db_routing.replica_binds(replica_urls)
+    app.config['DB_REPLICA_MAX_LAG'] = float(os.getenv('DB_REPLICA_MAX_LAG', '5'))
+    app.config['DB_READ_YOUR_WRITES_SECONDS'] = float(os.getenv('DB_READ_YOUR_WRITES_SECONDS', '10'))
+
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['BCRYPT_LOG_ROUNDS'] = int(os.getenv('BCRYPT_LOG_ROUNDS', '12'))
+    # Spatial search backend: 'geohash' (portable) or 'earthdistance' (PostgreSQL)
+    app.config['GEO_BACKEND'] = os.getenv('GEO_BACKEND', 'geohash')
+    app.config['MAIL_SUPPRESS_SEND'] = os.getenv('MAIL_SUPPRESS_SEND', 'false').lower() == 'true'
+    app.config['ARCHIVE_HORIZON_DAYS'] = int(os.getenv('ARCHIVE_HORIZON_DAYS', 365))
+    app.config['RECURRING_HORIZON_DAYS'] = int(os.getenv('RECURRING_HORIZON_DAYS', 90))
+    app.config['RECURRING_MAX_OCCURRENCES'] = int(os.getenv('RECURRING_MAX_OCCURRENCES', 366))
+    # Rate limiting: 'memory://' (per worker) or a shared 'redis://' store
+    app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'true').lower() == 'true'
+    app.config['RATELIMIT_STORAGE_URL'] = os.getenv('RATELIMIT_STORAGE_URL', 'memory://')
+    app.config['RATELIMITS'] = json.loads(os.getenv('RATELIMITS', '{}'))
+    # Proxies in front of the app whose X-Forwarded-For entries are trusted for the client IP.
+    # Heroku and Render add one; set 0 when clients connect directly, or they can spoof their IP.
+    app.config['PROXY_FIX_X_FOR'] = int(os.getenv('PROXY_FIX_X_FOR', '1'))
+    # Live /api/events fan-out: 'memory://' (per worker) or a shared 'redis://' channel
+    app.config['EVENTS_BROKER_URL'] = os.getenv('EVENTS_BROKER_URL', 'memory://')
+    app.config['EVENTS_HEARTBEAT_SECONDS'] = float(os.getenv('EVENTS_HEARTBEAT_SECONDS', '15'))
+    app.config['EVENTS_MAX_STREAM_SECONDS'] = float(os.getenv('EVENTS_MAX_STREAM_SECONDS', '300'))
+    # Open streams per threaded worker process; sync workers refuse streams, gevent ones aren't capped
+    app.config['EVENTS_MAX_STREAMS'] = int(os.getenv('EVENTS_MAX_STREAMS', '8'))
+    # Structured logs: 'json' or 'text', and per-logger/level sampling rates, e.g. {"spacer.access": 0.1}
+    app.config['LOG_LEVEL'] = os.getenv('LOG_LEVEL', 'INFO').upper()
+    app.config['LOG_FORMAT'] = os.getenv('LOG_FORMAT', 'json')
+    app.config['LOG_SAMPLING'] = json.loads(os.getenv('LOG_SAMPLING', '{}'))
+    # gzip/br for JSON responses of at least COMPRESS_MIN_SIZE bytes
+    app.config['COMPRESS_ENABLED'] = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+    app.config['COMPRESS_CACHE_BYTES'] = int(os.getenv('COMPRESS_CACHE_MB', '32')) * 1024 * 1024
+    # Shared mmap'd snapshot behind GET /api/spaces; empty to always query the database
+    app.config['CATALOGUE_SNAPSHOT_PATH'] = os.getenv(
+        'CATALOGUE_SNAPSHOT_PATH', os.path.join(tempfile.gettempdir(), 'spacer-catalogue.snapshot'))
+    app.config['CATALOGUE_CHECK_SECONDS'] = float(os.getenv('CATALOGUE_CHECK_SECONDS', '1'))
+    app.config['CATALOGUE_MAX_STALE_SECONDS'] = float(os.getenv('CATALOGUE_MAX_STALE_SECONDS', '30'))
+    # Similar-spaces index written by `flask recommendations build`; workers fit their own when it's unset
+    app.config['RECOMMEND_INDEX_PATH'] = os.getenv('RECOMMEND_INDEX_PATH') or None
+    app.config['RECOMMEND_REFRESH_SECONDS'] = float(os.getenv('RECOMMEND_REFRESH_SECONDS', '60'))
+    app.config['RECOMMEND_DIMENSIONS'] = int(os.getenv('RECOMMEND_DIMENSIONS', '256'))
     TESTING = True 
 
     # Swagger configuration
@@ -44,16 +113,33 @@ def create_app(testing=True):
         'title': 'Spacer API',
         'uiversion': 3
     }
+    # Optional precomputed spec (see `flask swagger export`)
+    app.config['SWAGGER_SPEC_FILE'] = os.getenv('SWAGGER_SPEC_FILE')
+
+    if app.config['PROXY_FIX_X_FOR']:
+        hops = app.config['PROXY_FIX_X_FOR']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
 
     # Initialize extensions
+    applog.init_app(app)
+    compression.init_app(app)
     db.init_app(app)
+    db_routing.init_app(app)
+    catalogue.init_app(app)
+    recommendations.init_app(app)
+    suggest.init_app(app)
     bcrypt.init_app(app)
+    limiter.init_app(app)
     Migrate(app, db)
-    JWTManager(app)
-    CORS(app)
-
-    # Swagger setup with JWT Bearer authentication
-    Swagger(app, template={
+    jwt = JWTManager(app)
+    revocation.init_app(app, jwt)
+    events.init_app(app)
+    # Let cross-origin API clients read the token they echo back for read-your-writes
+    CORS(app, expose_headers=[db_routing.PRIMARY_UNTIL_HEADER])
+
+    # Swagger setup with JWT Bearer authentication. Flasgger parses the route
+    # docstrings on the first spec request and caches the result per worker.
+    swagger = Swagger(app, template={
         "swagger": "2.0",
         "info": {
             "title": "Spacer API",
@@ -70,6 +156,11 @@ def create_app(testing=True):
         },
         "security": [{"Bearer": []}]
     })
+    spec_file = app.config['SWAGGER_SPEC_FILE']
+    if spec_file and os.path.exists(spec_file):
+        # Seed flasgger's spec cache so no docstring is ever parsed
+        with open(spec_file) as f:
+            swagger.apispecs['apispec_1'] = json.load(f)
 
     
     # with app.app_context():
@@ -80,6 +171,20 @@ def create_app(testing=True):
     app.register_blueprint(spaces_bp, url_prefix='/api')
     app.register_blueprint(bookings_bp, url_prefix='/api')
     app.register_blueprint(payments_bp, url_prefix='/api')
+    app.register_blueprint(events_bp, url_prefix='/api')
+    app.register_blueprint(reviews_bp, url_prefix='/api')
+
+    # CLI commands
+    app.cli.add_command(swagger_cli)
+    app.cli.add_command(seed_command)
+    app.cli.add_command(geocode_command)
+    app.cli.add_command(archive_command)
+    app.cli.add_command(partitions_cli)
+    app.cli.add_command(db_audit_command)
+    app.cli.add_command(jobs_cli)
+    app.cli.add_command(recurring_cli)
+    app.cli.add_command(catalogue_cli)
+    app.cli.add_command(recommendations_cli)
 
     # Home route
     @app.route('/')
@@ -93,8 +198,21 @@ def create_app(testing=True):
 
     return app
 
-app = create_app()
+
+_app = None
+
+
+def __getattr__(name):
+    # `app` is built on first access (`from app import app`, `gunicorn app:app`)
+    # instead of at import time, so importing create_app stays cheap.
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == '__main__':
     debug_mode = os.getenv("FLASK_ENV", "development") == "development"
-    app.run(debug=debug_mode)
+    create_app().run(debug=debug_mode)
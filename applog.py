@@ -0,0 +1,153 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from flask import g, has_request_context, request
+from flask.logging import default_handler
+
+
+# Structured logging that never blocks a request on I/O.
+#
+# Every record gets the current request's id (X-Request-ID, or a generated
+# one that is echoed back) when it is created. Loggers hand records to a
+# QueueHandler. A QueueListener thread per process encodes them as JSON lines
+# (or plain text with LOG_FORMAT=text) and writes them to stderr. LOG_SAMPLING
+# keeps a fraction of high-volume records before they are queued, keyed by
+# logger name or level name, e.g. {"spacer.access": 0.1, "DEBUG": 0.01}.
+
+ACCESS_LOGGER = 'spacer.access'
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, msg, request_id, extras and exc."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a record with the rate for its logger name, else its level name (default 1)."""
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(rates or {})
+
+    def filter(self, record):
+        rate = self.rates.get(record.name, self.rates.get(record.levelname, 1.0))
+        return rate >= 1 or random.random() < rate
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # Resolve what can't safely cross threads (args may be mutated later,
+        # tracebacks hold frames); JSON encoding happens on the listener thread.
+        record = logging.makeLogRecord(vars(record))
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_handler = None
+_listener = None
+
+
+def _start_listener(formatter):
+    global _listener
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(formatter)
+    _handler.queue = queue.SimpleQueue()
+    _listener = logging.handlers.QueueListener(_handler.queue, output)
+    _listener.start()
+
+
+def _restart_after_fork():
+    # The listener thread doesn't survive fork (e.g. gunicorn --preload); give
+    # each worker its own queue and thread.
+    if _handler is not None:
+        _start_listener(_listener.handlers[0].formatter)
+
+
+def _install(level, fmt, rates):
+    """Route the root logger through the queue, once per process."""
+    global _handler
+    formatter = JsonFormatter() if fmt == 'json' else logging.Formatter(
+        '%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s')
+    if _handler is None:
+        _handler = _QueueHandler(queue.SimpleQueue())
+        _start_listener(formatter)
+        logging.getLogger().addHandler(_handler)
+        os.register_at_fork(after_in_child=_restart_after_fork)
+        atexit.register(lambda: _listener.stop())  # drain the queue on shutdown
+        _install_request_ids()
+    else:
+        _listener.handlers[0].setFormatter(formatter)
+    _handler.filters = [SamplingFilter(rates)]
+    logging.getLogger().setLevel(level)
+
+
+def _install_request_ids():
+    factory = logging.getLogRecordFactory()
+
+    def record_with_request_id(*args, **kwargs):
+        record = factory(*args, **kwargs)
+        record.request_id = g.get('request_id') if has_request_context() else None
+        return record
+
+    logging.setLogRecordFactory(record_with_request_id)
+
+
+def flush():
+    """Wait until every queued record has been written (tests, shutdown)."""
+    if _listener is not None:
+        _listener.stop()
+        _listener.start()
+
+
+def init_app(app):
+    app.config.setdefault('LOG_LEVEL', 'INFO')
+    app.config.setdefault('LOG_FORMAT', 'json')
+    app.config.setdefault('LOG_SAMPLING', {})
+    _install(app.config['LOG_LEVEL'], app.config['LOG_FORMAT'], app.config['LOG_SAMPLING'])
+    app.logger.removeHandler(default_handler)  # records reach the queue via the root logger
+    access = logging.getLogger(ACCESS_LOGGER)
+
+    @app.before_request
+    def _start_request():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def _log_request(response):
+        response.headers['X-Request-ID'] = g.request_id
+        access.info("%s %s %s", request.method, request.path, response.status_code, extra={
+            'method': request.method, 'path': request.path, 'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - g.request_started) * 1000, 2),
+        })
+        return response
@@ -0,0 +1,159 @@
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from sqlalchemy import delete, insert, literal, select, text, update
+from extensions import db
+from models import (Booking, Invoice, Payment, Review, Space, WaitlistEntry, bookings_archive, invoices_archive,
+                    payments_archive)
+
+
+# Hot/cold storage for bookings, payments and invoices.
+#
+# Bookings that ended before the archive horizon move, together with their
+# payments and invoices, into the *_archive tables (or gzipped NDJSON files
+# for offline storage), so the hot tables only hold recent rows. On
+# PostgreSQL payments are also range-partitioned by payment_date month; see
+# ensure_partitions().
+
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'  # matches SerializerMixin.to_dict()
+
+# (hot table, cold table, column that selects a batch, column that names the NDJSON month)
+_TABLES = (
+    (Booking.__table__, bookings_archive, 'id', 'start_datetime'),
+    (Payment.__table__, payments_archive, 'booking_id', 'payment_date'),
+    (Invoice.__table__, invoices_archive, 'booking_id', 'issued_at'),
+)
+
+
+def horizon(days, now=None):
+    """Cut-off datetime: bookings that ended before it are archived."""
+    return (now or datetime.utcnow()) - timedelta(days=days)
+
+
+def archive_bookings(before, target='table', directory=None, batch_size=5000):
+    """
+    Move bookings whose end_datetime is before ``before`` (and their payments
+    and invoices) out of the hot tables, one committed batch at a time.
+
+    ``target`` is 'table' for the *_archive tables or 'ndjson' for gzipped
+    NDJSON files in ``directory`` (one file per table and month). Returns the
+    number of rows moved per table.
+    """
+    if target == 'ndjson':
+        os.makedirs(directory, exist_ok=True)
+    counts = {hot.name: 0 for hot, _, _, _ in _TABLES}
+    while True:
+        ids = db.session.execute(
+            select(Booking.id).where(Booking.end_datetime < before).order_by(Booking.id).limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            break
+        archived_at = datetime.utcnow()
+        for hot, cold, key, month_column in _TABLES:
+            condition = hot.c[key].in_(ids)
+            if target == 'ndjson':
+                rows = db.session.execute(select(hot).where(condition)).mappings().all()
+                _write_ndjson(directory, hot.name, rows, month_column)
+                counts[hot.name] += len(rows)
+            else:
+                columns = [c.name for c in hot.columns]
+                counts[hot.name] += db.session.execute(
+                    insert(cold).from_select(
+                        columns + ['archived_at'],
+                        select(*hot.columns, literal(archived_at, db.DateTime)).where(condition),
+                    )
+                ).rowcount
+        # Offered waitlist entries keep their history without the booking link
+        db.session.execute(
+            update(WaitlistEntry).where(WaitlistEntry.booking_id.in_(ids)).values(booking_id=None)
+        )
+        # Reviews stay on the space
+        db.session.execute(update(Review).where(Review.booking_id.in_(ids)).values(booking_id=None))
+        # Children first: payments and invoices reference bookings
+        for hot, _, key, _ in reversed(_TABLES):
+            db.session.execute(delete(hot).where(hot.c[key].in_(ids)))
+        db.session.commit()
+    return counts
+
+
+def _write_ndjson(directory, name, rows, month_column):
+    by_month = defaultdict(list)
+    for row in rows:
+        stamp = row[month_column]
+        by_month[stamp.strftime('%Y-%m') if stamp else 'undated'].append(row)
+    for month, group in by_month.items():
+        # Appending opens a new gzip member; readers see one continuous stream
+        with gzip.open(os.path.join(directory, f"{name}-{month}.ndjson.gz"), 'at', encoding='utf-8') as f:
+            for row in group:
+                f.write(json.dumps(dict(row), default=_json_default) + "\n")
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _booking_dict(row):
+    booking = {c.name: row[c.name] for c in Booking.__table__.columns}
+    for key, value in booking.items():
+        if isinstance(value, datetime):
+            booking[key] = value.strftime(DATETIME_FORMAT)
+    booking['archived'] = True
+    return booking
+
+
+def archived_bookings_for_client(client_id):
+    """Archived bookings made by a client, shaped like Booking.to_dict() rows."""
+    rows = db.session.execute(
+        select(bookings_archive).where(bookings_archive.c.client_id == client_id)
+        .order_by(bookings_archive.c.start_datetime)
+    ).mappings()
+    return [_booking_dict(row) for row in rows]
+
+
+def archived_bookings_for_owner(owner_id):
+    """Archived bookings of every space the owner has."""
+    space_ids = select(Space.id).where(Space.owner_id == owner_id)
+    rows = db.session.execute(
+        select(bookings_archive).where(bookings_archive.c.space_id.in_(space_ids))
+        .order_by(bookings_archive.c.start_datetime)
+    ).mappings()
+    return [_booking_dict(row) for row in rows]
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def ensure_partitions(months_ahead=3, table='payments', today=None):
+    """
+    Create monthly range partitions of ``table`` up to ``months_ahead`` months
+    from now (PostgreSQL only; a no-op elsewhere). Returns the names created.
+    Run it from cron well before each month starts, so new rows never land in
+    the default partition.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        return []
+    first = (today or date.today()).replace(day=1)
+    created = []
+    for i in range(months_ahead + 1):
+        start = _add_months(first, i)
+        name = partition_name(table, start)
+        exists = db.session.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        if exists:
+            continue
+        db.session.execute(text(
+            f"CREATE TABLE {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{_add_months(start, 1).isoformat()}')"
+        ))
+        created.append(name)
+    db.session.commit()
+    return created
@@ -0,0 +1,14 @@
+"""
+ASGI entry point for uvicorn/hypercorn:
+
+    uvicorn asgi:application --workers 4
+
+Flask views stay synchronous; a2wsgi runs them on a thread pool of
+ASGI_THREADS threads per process while the event loop keeps accepting
+connections.
+"""
+import os
+from a2wsgi import WSGIMiddleware
+from app import create_app
+
+application = WSGIMiddleware(create_app(), workers=int(os.getenv("ASGI_THREADS", "40")))
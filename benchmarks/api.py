@@ -0,0 +1,301 @@
+"""
+Load-test the core API flows against a seeded database.
+
+    python -m benchmarks.api --users 10000 --spaces 100000 --bookings 1000000 \\
+        --driver client --driver gunicorn
+
+The database (BENCH_DATABASE_URL, default sqlite:///bench.db) is rebuilt and
+filled with seeding.bulk_seed unless --reuse is given. Each scenario is driven
+through the Flask test client and/or a real gunicorn process, and p50/p95/p99
+latency plus queries-per-request (test client only) are written to
+benchmarks/results/<commit>.json. Pass --compare <file> to diff against an
+earlier run.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+sys.path.insert(0, ROOT)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+class FlaskClientDriver:
+    name = "client"
+
+    def __init__(self, app):
+        from sqlalchemy import event
+        from extensions import db
+
+        self.app = app
+        self.client = app.test_client()
+        self.queries = 0
+
+        def count(*_):
+            self.queries += 1
+
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", count)
+
+    def request(self, method, path, **kwargs):
+        self.queries = 0
+        res = self.client.open(path, method=method, **kwargs)
+        return res.status_code, res.get_json(silent=True), self.queries
+
+    def close(self):
+        pass
+
+
+class GunicornDriver:
+    name = "gunicorn"
+
+    def __init__(self, database_url, workers=4):
+        import requests
+
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        self.base = f"http://127.0.0.1:{port}"
+        env = dict(os.environ, DATABASE_URL=database_url, MAIL_SUPPRESS_SEND="true",
+                   RATELIMIT_ENABLED="false")
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "app:app",
+             "-b", f"127.0.0.1:{port}", "-w", str(workers)],
+            cwd=ROOT, env=env
+        )
+        self.session = requests.Session()
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                self.session.get(self.base + "/", timeout=1)
+                break
+            except requests.ConnectionError:
+                if time.monotonic() > deadline or self.proc.poll() is not None:
+                    self.close()
+                    raise RuntimeError("gunicorn did not come up")
+                time.sleep(0.2)
+
+    def request(self, method, path, **kwargs):
+        res = self.session.request(method, self.base + path, **kwargs)
+        try:
+            body = res.json()
+        except ValueError:
+            body = None
+        return res.status_code, body, None
+
+    def close(self):
+        self.proc.terminate()
+        self.proc.wait(timeout=10)
+
+
+class Recorder:
+    def __init__(self, driver):
+        self.driver = driver
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = Counter()
+
+    def call(self, name, method, path, **kwargs):
+        start = time.perf_counter()
+        status, body, queries = self.driver.request(method, path, **kwargs)
+        self.latencies[name].append(time.perf_counter() - start)
+        if queries is not None:
+            self.queries[name].append(queries)
+        if status >= 400:
+            self.errors[name] += 1
+        return body
+
+    def summary(self):
+        result = {}
+        for name, values in self.latencies.items():
+            queries = self.queries.get(name)
+            result[name] = {
+                "count": len(values),
+                "errors": self.errors[name],
+                "mean_ms": 1000 * sum(values) / len(values),
+                "p50_ms": 1000 * percentile(values, 50),
+                "p95_ms": 1000 * percentile(values, 95),
+                "p99_ms": 1000 * percentile(values, 99),
+                "queries_per_request": sum(queries) / len(queries) if queries else None,
+            }
+        return result
+
+
+# Scenarios ---------------------------------------------------------------
+
+def register_login(rec, ctx, i):
+    email = f"bench-{ctx['run_id']}-{rec.driver.name}-{i}@example.com"
+    creds = {"email": email, "password": "password123"}
+    rec.call("register", "POST", "/api/register", json=dict(creds, name=f"Bench {i}"))
+    rec.call("login", "POST", "/api/login", json=creds)
+
+
+def list_spaces(rec, ctx, i):
+    rec.call("list_spaces", "GET", "/api/spaces")
+
+
+def create_booking(rec, ctx, i):
+    start = datetime(2026, 1, 1) + timedelta(hours=ctx["rng"].randrange(24 * 365))
+    rec.call("create_booking", "POST", "/api/bookings", headers=ctx["client_headers"], json={
+        "space_id": ctx["rng"].choice(ctx["space_ids"]),
+        "start_datetime": start.isoformat(),
+        "end_datetime": (start + timedelta(hours=2)).isoformat(),
+    })
+
+
+def owner_reports(rec, ctx, i):
+    rec.call("owner_bookings", "GET", "/api/owner/bookings", headers=ctx["owner_headers"])
+    rec.call("owner_payments", "GET", "/api/owner/payments", headers=ctx["owner_headers"])
+
+
+SCENARIOS = {
+    "register_login": register_login,
+    "list_spaces": list_spaces,
+    "create_booking": create_booking,
+    "owner_reports": owner_reports,
+}
+
+
+# Runner ------------------------------------------------------------------
+
+def prepare(app, args):
+    from extensions import db
+    from models import Space, User
+    from seeding import DEFAULT_PASSWORD, bulk_seed
+
+    with app.app_context():
+        if args.reuse:
+            dataset = {"reused": True}
+        else:
+            db.drop_all()
+            db.create_all()
+            start = time.perf_counter()
+            dataset = bulk_seed(args.users, args.spaces, args.bookings, seed=args.seed)
+            dataset["seconds"] = time.perf_counter() - start
+        owner = User.query.filter_by(role="owner").order_by(User.id).first()
+        client = User.query.filter_by(role="client").order_by(User.id).first()
+        space_ids = [row.id for row in db.session.query(Space.id).filter_by(is_available=True).limit(1000)]
+    return dataset, {
+        "owner_email": owner.email,
+        "client_email": client.email,
+        "password": DEFAULT_PASSWORD,
+        "space_ids": space_ids,
+    }
+
+
+def login_headers(driver, email, password):
+    status, body, _ = driver.request("POST", "/api/login", json={"email": email, "password": password})
+    if status != 200:
+        raise RuntimeError(f"could not log in {email}: {status} {body}")
+    return {"Authorization": f"Bearer {body['token']}"}
+
+
+def run_driver(driver, fixtures, args, run_id):
+    ctx = dict(
+        fixtures,
+        run_id=run_id,
+        rng=random.Random(args.seed),
+        client_headers=login_headers(driver, fixtures["client_email"], fixtures["password"]),
+        owner_headers=login_headers(driver, fixtures["owner_email"], fixtures["password"]),
+    )
+    rec = Recorder(driver)
+    for name in args.scenario or SCENARIOS:
+        for i in range(args.iterations):
+            SCENARIOS[name](rec, ctx, i)
+    return rec.summary()
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\np95 vs {baseline.get('commit', baseline_path)[:12]}:")
+    for driver, endpoints in current["drivers"].items():
+        for name, stats in endpoints.items():
+            old = baseline.get("drivers", {}).get(driver, {}).get(name)
+            if not old:
+                continue
+            delta = 100 * (stats["p95_ms"] - old["p95_ms"]) / old["p95_ms"]
+            print(f"  {driver:9} {name:16} {old['p95_ms']:9.2f} -> {stats['p95_ms']:9.2f} ms ({delta:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--spaces", type=int, default=10000)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS))
+    parser.add_argument("--driver", action="append", choices=["client", "gunicorn"])
+    parser.add_argument("--workers", type=int, default=4, help="gunicorn workers")
+    parser.add_argument("--reuse", action="store_true", help="skip seeding, use the existing data")
+    parser.add_argument("--out", default=None, help="result file (default results/<commit>.json)")
+    parser.add_argument("--compare", default=None, help="earlier result file to diff against")
+    args = parser.parse_args(argv)
+
+    database_url = os.getenv("BENCH_DATABASE_URL", "sqlite:///bench.db")
+    os.environ["DATABASE_URL"] = database_url
+
+    from app import create_app
+
+    app = create_app()
+    app.config["MAIL_SUPPRESS_SEND"] = True
+    app.config["RATELIMIT_ENABLED"] = False
+    dataset, fixtures = prepare(app, args)
+
+    commit = git_commit()
+    run_id = str(int(time.time()))
+    result = {
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "database": database_url.split(":", 1)[0],
+        "dataset": dataset,
+        "iterations": args.iterations,
+        "drivers": {},
+    }
+    for name in args.driver or ["client"]:
+        driver = FlaskClientDriver(app) if name == "client" else GunicornDriver(database_url, args.workers)
+        try:
+            result["drivers"][name] = run_driver(driver, fixtures, args, run_id)
+        finally:
+            driver.close()
+
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit[:12]}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+    print(json.dumps(result["drivers"], indent=2, sort_keys=True))
+    print(f"\nResults written to {out}")
+
+    if args.compare:
+        compare(result, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
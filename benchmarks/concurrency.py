@@ -0,0 +1,222 @@
+"""
+Throughput under many concurrent connections: sync vs gevent vs ASGI.
+
+    python -m benchmarks.concurrency --connections 500 --duration 20 \\
+        --mode sync --mode gevent --mode asgi
+
+Each mode starts the app (gunicorn sync, gunicorn gevent, or uvicorn on
+asgi.py) with Mailjet pointed at a local fake that answers after
+--upstream-delay seconds, then holds --connections keep-alive connections
+open posting /api/register. Requests/s and latency percentiles per mode are
+written to benchmarks/results/concurrency-<commit>.json.
+
+gevent/uvicorn/a2wsgi come from requirements-async.txt. Use a PostgreSQL
+BENCH_DATABASE_URL for meaningful numbers; SQLite serializes every write.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmarks.api import RESULTS_DIR, ROOT, git_commit, percentile
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_fake_mailjet(delay):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            time.sleep(delay)
+            body = b'{"Messages": [{"Status": "success"}]}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer(("127.0.0.1", free_port()), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_app(mode, port, workers, env):
+    if mode == "asgi":
+        cmd = [sys.executable, "-m", "uvicorn", "asgi:application", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning"]
+    else:
+        cmd = [sys.executable, "-m", "gunicorn", "app:app", "-b", f"127.0.0.1:{port}",
+               "-w", str(workers), "--backlog", "2048"]
+        env = dict(env, GUNICORN_WORKER_CLASS=mode)
+    proc = subprocess.Popen(cmd, cwd=ROOT, env=env)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return proc
+        except OSError:
+            if proc.poll() is not None:
+                break
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"{mode} server did not come up")
+
+
+async def _read_response(reader):
+    status = await reader.readline()
+    if not status:
+        raise ConnectionError("connection closed")
+    length, close = None, False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        name = name.strip().lower()
+        if name == "content-length":
+            length = int(value)
+        elif name == "connection" and value.strip().lower() == "close":
+            close = True
+    if length is None:
+        await reader.read()
+        close = True
+    else:
+        await reader.readexactly(length)
+    return int(status.split()[1]), close
+
+
+async def _connection(port, deadline, next_email, latencies, errors):
+    reader = writer = None
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            body = json.dumps({"name": "Load", "email": next_email(), "password": "pw"}).encode()
+            start = time.perf_counter()
+            writer.write(
+                b"POST /api/register HTTP/1.1\r\nHost: bench\r\nContent-Type: application/json\r\n"
+                + f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+            status, close = await _read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+            if close:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError):
+            errors.append("connection")
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.05)
+    if writer is not None:
+        writer.close()
+
+
+async def _load(port, connections, duration, prefix):
+    counter = iter(range(10 ** 9))
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+
+    def next_email():
+        return f"{prefix}-{next(counter)}@example.com"
+
+    started = time.monotonic()
+    await asyncio.gather(*[
+        _connection(port, deadline, next_email, latencies, errors) for _ in range(connections)
+    ])
+    elapsed = time.monotonic() - started
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": 1000 * (percentile(latencies, 50) or 0),
+        "p95_ms": 1000 * (percentile(latencies, 95) or 0),
+        "p99_ms": 1000 * (percentile(latencies, 99) or 0),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", action="append", choices=["sync", "gevent", "asgi"])
+    parser.add_argument("--connections", type=int, default=500)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--upstream-delay", type=float, default=0.2, help="fake Mailjet latency (s)")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    database_url = os.getenv("BENCH_DATABASE_URL", "sqlite:///concurrency.db")
+    os.environ["DATABASE_URL"] = database_url
+    from app import create_app
+    from extensions import db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+
+    mailjet = start_fake_mailjet(args.upstream_delay)
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        MAILJET_API_URL=f"http://127.0.0.1:{mailjet.server_address[1]}/",
+        MAILJET_API_KEY="bench", MAILJET_API_SECRET="bench",
+        MAIL_SUPPRESS_SEND="false",
+        RATELIMIT_ENABLED="false",
+        BCRYPT_LOG_ROUNDS="4",
+    )
+
+    commit = git_commit()
+    result = {"commit": commit, "connections": args.connections, "duration": args.duration,
+              "workers": args.workers, "upstream_delay": args.upstream_delay,
+              "database": database_url.split(":", 1)[0], "modes": {}}
+    run_id = int(time.time())
+    try:
+        for mode in args.mode or ["sync", "gevent"]:
+            port = free_port()
+            proc = start_app(mode, port, args.workers, env)
+            try:
+                stats = asyncio.run(_load(port, args.connections, args.duration, f"load-{run_id}-{mode}"))
+            finally:
+                proc.terminate()
+                proc.wait(timeout=15)
+            result["modes"][mode] = stats
+            print(f"{mode:7} {stats['requests_per_second']:8.1f} req/s  p50 {stats['p50_ms']:8.1f} ms  "
+                  f"p99 {stats['p99_ms']:8.1f} ms  errors {stats['errors']}")
+    finally:
+        mailjet.shutdown()
+
+    if "sync" in result["modes"]:
+        base = result["modes"]["sync"]["requests_per_second"] or 1
+        for mode, stats in result["modes"].items():
+            stats["speedup_vs_sync"] = stats["requests_per_second"] / base
+
+    out = args.out or os.path.join(RESULTS_DIR, f"concurrency-{commit[:12]}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+    print(f"Results written to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
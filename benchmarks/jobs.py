@@ -0,0 +1,117 @@
+"""
+Job queue throughput: enqueue and dequeue rates.
+
+    python -m benchmarks.jobs --jobs 20000 --workers 1 --workers 4 --batch 50
+
+Enqueue is measured committing one job per transaction (what a request
+handler does) and in batches of --batch. Dequeue runs each --workers count as
+that many worker processes draining --jobs no-op jobs with `jobs.work`.
+Results are written to benchmarks/results/jobs-<commit>.json.
+
+Use a PostgreSQL BENCH_DATABASE_URL to see SKIP LOCKED scale with workers;
+SQLite serializes every claim.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from benchmarks.api import RESULTS_DIR, git_commit
+
+import jobs
+
+
+@jobs.task("noop")
+def noop(**_):
+    pass
+
+
+def _enqueue(n, per_commit):
+    from extensions import db
+
+    start = time.perf_counter()
+    for i in range(n):
+        jobs.enqueue("noop", {"i": i}, queue="bench")
+        if (i + 1) % per_commit == 0:
+            db.session.commit()
+    db.session.commit()
+    return n / (time.perf_counter() - start)
+
+
+def _worker(batch):
+    from app import create_app
+
+    with create_app().app_context():
+        jobs.work(queue="bench", batch=batch, burst=True)
+
+
+def _dequeue(app, n, workers, batch):
+    from extensions import db
+
+    with app.app_context():
+        _enqueue(n, 1000)
+        db.engine.dispose()  # don't share pooled connections with the forks
+    ctx = multiprocessing.get_context("fork")
+    start = time.perf_counter()
+    procs = [ctx.Process(target=_worker, args=(batch,)) for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+    elapsed = time.perf_counter() - start
+    with app.app_context():
+        done = jobs.stats("bench").get("done", 0)
+    return done / elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--workers", type=int, action="append")
+    parser.add_argument("--batch", type=int, default=50, help="jobs per enqueue commit / per claim")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args(argv)
+
+    database_url = os.getenv("BENCH_DATABASE_URL", "sqlite:///jobs-bench.db")
+    os.environ["DATABASE_URL"] = database_url
+    from app import create_app
+    from extensions import db
+    from models import Job
+
+    app = create_app()
+
+    def reset():
+        with app.app_context():
+            db.create_all()
+            Job.query.filter_by(queue="bench").delete()
+            db.session.commit()
+
+    result = {"commit": git_commit(), "jobs": args.jobs, "batch": args.batch,
+              "database": database_url.split(":", 1)[0], "enqueue": {}, "dequeue": {}}
+
+    for label, per_commit in (("single", 1), (f"batch_{args.batch}", args.batch)):
+        reset()
+        with app.app_context():
+            rate = _enqueue(args.jobs, per_commit)
+        result["enqueue"][label] = rate
+        print(f"enqueue {label:10} {rate:10.0f} jobs/s")
+
+    for workers in args.workers or [1, 4]:
+        reset()
+        rate = _dequeue(app, args.jobs, workers, args.batch)
+        result["dequeue"][f"workers_{workers}"] = rate
+        print(f"dequeue {workers:2} workers {rate:10.0f} jobs/s")
+    reset()
+
+    out = args.out or os.path.join(RESULTS_DIR, f"jobs-{result['commit'][:12]}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+    print(f"Results written to {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
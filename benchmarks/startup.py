@@ -0,0 +1,65 @@
+"""
+Cold-start benchmark: time `import app` + `create_app()` in fresh interpreters.
+
+    python -m benchmarks.startup --runs 10 --max-seconds 1.5
+
+Exits non-zero when the median create time exceeds --max-seconds, so it can
+guard startup regressions in CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import json, time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.create_app()
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create": t2 - t0}))
+"""
+
+
+def measure(runs):
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE],
+            cwd=ROOT, check=True, capture_output=True, text=True
+        ).stdout
+        samples.append(json.loads(out.strip().splitlines()[-1]))
+    return {
+        key: {
+            "min": min(s[key] for s in samples),
+            "median": statistics.median(s[key] for s in samples),
+            "max": max(s[key] for s in samples),
+        }
+        for key in ("import", "create")
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="fail if the median create time is above this")
+    args = parser.parse_args(argv)
+
+    result = measure(args.runs)
+    print(json.dumps(result, indent=2))
+
+    if args.max_seconds is not None and result["create"]["median"] > args.max_seconds:
+        print(f"Startup regression: median {result['create']['median']:.3f}s "
+              f"> {args.max_seconds:.3f}s", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
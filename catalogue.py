@@ -0,0 +1,320 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import random
+import struct
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.orm import selectinload
+from db_routing import RoutingSession, reads_own_writes
+from extensions import db
+from models import CatalogueState, Space
+
+
+# Shared catalogue snapshot for GET /api/spaces and /api/spaces/<id>.
+#
+# The available spaces are serialized once into a file: a header, a table of
+# contents (byte ranges per space plus their amenity keys and rating) and the
+# JSON list itself. Every worker mmaps the same file, so the page cache holds
+# one copy and a listing is served as a slice of it, with no query and no
+# serialization.
+#
+# Any flush that changes a field the snapshot serves gives one of the
+# STAMP_SHARDS catalogue_state rows (picked by space id) a new random stamp in
+# the same transaction. Writers to different spaces rarely touch the same row,
+# so they don't queue behind one lock. The catalogue's stamp is a hash of all
+# of them. The snapshot records the stamp it was built from, and workers
+# compare the two at most every CATALOGUE_CHECK_SECONDS (a worker's own writes
+# force a check). When the stamps differ, a background thread rebuilds the
+# file; an exclusive file lock makes sure only one worker rebuilds at a time.
+# Meanwhile requests get the previous snapshot for up to
+# CATALOGUE_MAX_STALE_SECONDS, except those that must read their own writes
+# (see db_routing), which go to the database. `flask catalogue build` rebuilds
+# it on demand, e.g. from cron or at deploy.
+#
+# A second set of shards, SEARCH_ROWS, changes only when a space is added or
+# deleted or its title, location or availability changes. The autocomplete
+# index (suggest.py) follows their hash, so rating updates don't make it
+# rebuild.
+
+MAGIC = b'SPCAT002'
+HEADER = struct.Struct('<8s32sQ')  # magic, stamp, table of contents length
+STAMP_SHARDS = 16
+SNAPSHOT_ROWS = range(1, 1 + STAMP_SHARDS)  # catalogue_state ids followed by the snapshot
+SEARCH_ROWS = range(101, 101 + STAMP_SHARDS)  # ...and by suggest.py
+# Space attributes a snapshot entry is built from, and those autocomplete uses
+SERVED = frozenset(Space.serialize_only) | {'amenity_list'}
+SEARCHED = frozenset({'title', 'location', 'is_available'})
+
+
+class Snapshot:
+    """A mapped snapshot file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, stamp, toc_length = HEADER.unpack_from(self._map)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a catalogue snapshot")
+        self.stamp = stamp.decode()
+        toc = json.loads(self._map[HEADER.size:HEADER.size + toc_length])
+        base = HEADER.size + toc_length
+        self._list = (base, base + toc['length'])
+        # space id -> (start, end, amenity keys, avg rating), and amenity key -> space ids
+        self._spaces = {int(space_id): (base + start, base + start + length, keys, rating)
+                        for space_id, (start, length, keys, rating) in toc['spaces'].items()}
+        self._by_amenity = {key: frozenset(ids) for key, ids in toc['amenities'].items()}
+
+    def all_json(self):
+        return self._map[self._list[0]:self._list[1]]
+
+    def space_json(self, space_id):
+        entry = self._spaces.get(space_id)
+        return self._map[entry[0]:entry[1]] if entry else None
+
+    def with_amenities(self, keys):
+        """Ids of the spaces that have every amenity in ``keys``, in id order."""
+        sets = sorted((self._by_amenity.get(key, frozenset()) for key in keys), key=len)
+        return sorted(sets[0].intersection(*sets[1:])) if sets else list(self._spaces)
+
+    def select(self, keys=(), min_rating=None, by_rating=False):
+        """Ids with every amenity in ``keys`` and at least ``min_rating``, in id order or best rated first."""
+        space_ids = self.with_amenities(keys)
+        if min_rating is not None:
+            space_ids = [space_id for space_id in space_ids if self._spaces[space_id][3] >= min_rating]
+        if by_rating:
+            # Same order as the database path: avg_rating DESC, id DESC
+            space_ids.sort(key=lambda space_id: (self._spaces[space_id][3], space_id), reverse=True)
+        return space_ids
+
+    def spaces_json(self, space_ids):
+        return b'[' + b','.join(self._map[entry[0]:entry[1]] for entry in map(self._spaces.get, space_ids)) + b']'
+
+    def amenity_facets(self, space_ids):
+        return dict(Counter(key for space_id in space_ids for key in self._spaces[space_id][2]))
+
+
+def _hash_stamps(session, rows):
+    stamps = session.execute(
+        select(CatalogueState.stamp).where(CatalogueState.id.between(rows[0], rows[-1])).order_by(CatalogueState.id)
+    ).scalars().all()
+    if not stamps:
+        return None
+    return hashlib.md5(' '.join(stamps).encode()).hexdigest()
+
+
+def current_stamp(session):
+    return _hash_stamps(session, SNAPSHOT_ROWS)
+
+
+def search_stamp(session):
+    return _hash_stamps(session, SEARCH_ROWS)
+
+
+def build(path, session=None):
+    """Write a snapshot of the available spaces to ``path``. Returns its stamp, or None before any Space exists."""
+    session = session or db.session
+    # Read the stamp first: a write landing mid-build leaves an older stamp on newer data, which only forces a rebuild
+    stamp = current_stamp(session)
+    if stamp is None:
+        return None
+    spaces = session.execute(
+        select(Space).where(Space.is_available.is_(True)).options(selectinload(Space.amenity_list)).order_by(Space.id)
+    ).scalars()
+
+    body, entries, by_amenity = bytearray(b'['), {}, {}
+    for space in spaces:
+        item = current_app.json.dumps(space.to_dict(), separators=(',', ':')).encode()
+        if len(body) > 1:
+            body += b','
+        keys = [amenity.key for amenity in space.amenity_list]
+        entries[space.id] = (len(body), len(item), keys, space.avg_rating)
+        for key in keys:
+            by_amenity.setdefault(key, []).append(space.id)
+        body += item
+    body += b']'
+    toc = json.dumps({'length': len(body), 'spaces': entries, 'amenities': by_amenity}).encode()
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, stamp.encode(), len(toc)))
+        f.write(toc)
+        f.write(body)
+    # Readers keep their old mapping until they notice the new stamp
+    os.replace(tmp, path)
+    return stamp
+
+
+class Catalogue:
+    """A worker's handle on the shared snapshot."""
+
+    def __init__(self, path, check_interval=1.0, max_stale=30.0):
+        self.path = path
+        self.check_interval = check_interval
+        self.max_stale = max_stale
+        self._snapshot = None  # the newest snapshot seen to match the database
+        self._stamp = None
+        self._stale_since = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._rebuilder = None
+
+    def invalidate(self):
+        self._next_check = 0.0
+
+    def snapshot(self):
+        """
+        The mapped snapshot if it matches the database, or the previous one for
+        a while after a change unless the request must read its own writes;
+        else None (serve from the database).
+        """
+        if time.monotonic() >= self._next_check:
+            self._check()
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.stamp == self._stamp:
+            return snapshot
+        stale_since = self._stale_since
+        if stale_since is not None and time.monotonic() - stale_since < self.max_stale and not reads_own_writes():
+            return snapshot
+        return None
+
+    def join(self, timeout=None):
+        """Wait for a rebuild in progress (for the CLI and tests)."""
+        rebuilder = self._rebuilder
+        if rebuilder is not None:
+            rebuilder.join(timeout)
+
+    def _check(self):
+        # One thread checks; the others carry on with the current view
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._stamp = current_stamp(db.session)
+            self._next_check = time.monotonic() + self.check_interval
+            if self._stamp is None or (self._snapshot is not None and self._snapshot.stamp == self._stamp):
+                self._stale_since = None
+                return
+            if self._stale_since is None:
+                self._stale_since = time.monotonic()
+            snapshot = self._open()
+            if snapshot is not None and snapshot.stamp == self._stamp:
+                self._snapshot, self._stale_since = snapshot, None
+            elif self._rebuilder is None or not self._rebuilder.is_alive():
+                self._rebuilder = threading.Thread(target=self._rebuild, args=(current_app._get_current_object(),),
+                                                   name='catalogue-rebuild', daemon=True)
+                self._rebuilder.start()
+        except Exception:
+            current_app.logger.warning("Catalogue snapshot unavailable", exc_info=True)
+        finally:
+            self._lock.release()
+
+    def _open(self):
+        try:
+            return Snapshot(self.path)
+        except (OSError, ValueError):
+            return None
+
+    def _rebuild(self, app):
+        with app.app_context(), open(f"{self.path}.lock", 'w') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return  # another worker is building it; pick it up on a later check
+            try:
+                # Someone else may have rebuilt it since our check
+                stamp = current_stamp(db.session)
+                snapshot = self._open()
+                if snapshot is None or snapshot.stamp != stamp:
+                    build(self.path)
+                    snapshot = self._open()
+                if snapshot is not None and snapshot.stamp == self._stamp:
+                    self._snapshot, self._stale_since = snapshot, None
+                elif snapshot is not None:
+                    # Newer changes landed meanwhile; have the next request look at the stamp again
+                    self._snapshot = self._snapshot or snapshot
+                    self._next_check = 0.0
+            except Exception:
+                app.logger.warning("Catalogue snapshot rebuild failed", exc_info=True)
+            finally:
+                db.session.remove()
+
+
+def current_snapshot():
+    catalogue = current_app.extensions.get('catalogue')
+    return catalogue.snapshot() if catalogue is not None else None
+
+
+def mark_changed(session, space_id=None, searched=True):
+    """
+    Give the catalogue a new stamp in ``session``'s transaction, on the shard
+    of ``space_id`` (any shard when it's unknown), and a new search stamp
+    unless ``searched`` is False (no title, location or availability
+    changed). Bulk Space updates must call this.
+    """
+    changed = session.info.setdefault('catalogue_changed', set())
+    shard = space_id % STAMP_SHARDS if space_id is not None else random.randrange(STAMP_SHARDS)
+    rows = []
+    # One new stamp of each kind per transaction is enough
+    if changed.isdisjoint(SNAPSHOT_ROWS):
+        rows.append(SNAPSHOT_ROWS[shard])
+    if searched and changed.isdisjoint(SEARCH_ROWS):
+        rows.append(SEARCH_ROWS[shard])
+    conn = session.connection() if rows else None
+    for row in rows:
+        values = {'stamp': uuid.uuid4().hex, 'updated_at': datetime.utcnow()}
+        if conn.execute(update(CatalogueState).where(CatalogueState.id == row).values(**values)).rowcount == 0:
+            conn.execute(insert(CatalogueState).values(id=row, **values))
+        changed.add(row)
+
+
+def _changed_fields(space):
+    state = inspect(space)
+    return {name for name in SERVED if state.attrs[name].history.has_changes()}
+
+
+@event.listens_for(RoutingSession, 'before_flush')
+def _space_changes(session, flush_context, instances):
+    for obj in session.new:
+        if isinstance(obj, Space):
+            mark_changed(session)
+    for obj in session.deleted:
+        if isinstance(obj, Space):
+            mark_changed(session, obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, Space):
+            fields = _changed_fields(obj)
+            if fields:
+                mark_changed(session, obj.id, searched=bool(fields & SEARCHED))
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _invalidate(session):
+    changed = session.info.pop('catalogue_changed', None)
+    if changed and has_app_context():
+        # The snapshot follows one set of shards, the autocomplete index (suggest.py) the other
+        for name, rows in (('catalogue', SNAPSHOT_ROWS), ('suggest', SEARCH_ROWS)):
+            follower = current_app.extensions.get(name)
+            if follower is not None and not changed.isdisjoint(rows):
+                follower.invalidate()
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard(session):
+    session.info.pop('catalogue_changed', None)
+
+
+def init_app(app):
+    app.config.setdefault('CATALOGUE_SNAPSHOT_PATH', None)
+    app.config.setdefault('CATALOGUE_CHECK_SECONDS', 1.0)
+    app.config.setdefault('CATALOGUE_MAX_STALE_SECONDS', 30.0)
+    if app.config['CATALOGUE_SNAPSHOT_PATH']:
+        app.extensions['catalogue'] = Catalogue(app.config['CATALOGUE_SNAPSHOT_PATH'],
+                                                app.config['CATALOGUE_CHECK_SECONDS'],
+                                                app.config['CATALOGUE_MAX_STALE_SECONDS'])
@@ -0,0 +1,210 @@
+import json
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from sqlalchemy import update
+from extensions import db
+from models import Booking, Space
+from seeding import DEFAULT_PASSWORD, bulk_seed
+import archive
+import catalogue
+import db_audit
+import jobs
+import recommendations
+import recurrence
+import tasks  # noqa: F401  (registers the job handlers)
+import geo
+
+
+swagger_cli = AppGroup('swagger', help='Swagger/OpenAPI spec utilities.')
+
+
+@swagger_cli.command('export')
+@click.argument('path', default='swagger.json')
+def export_swagger(path):
+    """Precompute the Swagger spec to PATH (serve it with SWAGGER_SPEC_FILE)."""
+    spec = current_app.swag.get_apispecs('apispec_1')
+    with open(path, 'w') as f:
+        json.dump(spec, f, indent=2, sort_keys=True, default=str)
+    click.echo(f"Swagger spec written to {path}")
+
+
+@click.command('seed')
+@click.option('--users', default=100, show_default=True, help='Users to create (1 in 10 are owners).')
+@click.option('--spaces', default=1000, show_default=True, help='Spaces to create.')
+@click.option('--bookings', default=10000, show_default=True, help='Bookings to create.')
+@click.option('--seed', 'seed', default=0, show_default=True, help='RNG seed; same seed, same data.')
+@click.option('--chunk-size', default=5000, show_default=True, help='Rows per INSERT/COPY batch.')
+@click.option('--password', default=DEFAULT_PASSWORD, show_default=True, help='Password for every user.')
+@click.option('--copy/--no-copy', 'use_copy', default=None, help='Force PostgreSQL COPY on or off.')
+@click.option('--reset', is_flag=True, help='Drop and recreate all tables first.')
+@with_appcontext
+def seed_command(users, spaces, bookings, seed, chunk_size, password, use_copy, reset):
+    """Bulk-generate a synthetic dataset for development and load tests."""
+    if reset:
+        db.drop_all()
+        db.create_all()
+    start = time.perf_counter()
+    counts = bulk_seed(users, spaces, bookings, seed=seed, password=password,
+                       chunk_size=chunk_size, use_copy=use_copy)
+    elapsed = time.perf_counter() - start
+    summary = ", ".join(f"{count} {table}" for table, count in counts.items())
+    click.echo(f"Seeded {summary} in {elapsed:.1f}s")
+
+
+@click.command('geocode')
+@click.option('--gazetteer', 'path', default=geo.DEFAULT_GAZETTEER, show_default=True,
+              type=click.Path(exists=True, dir_okay=False), help='CSV with name,latitude,longitude.')
+@click.option('--overwrite', is_flag=True, help='Also re-geocode spaces that already have coordinates.')
+@click.option('--chunk-size', default=1000, show_default=True, help='Rows per UPDATE batch.')
+@with_appcontext
+def geocode_command(path, overwrite, chunk_size):
+    """Backfill space latitude/longitude/geohash from a local gazetteer."""
+    gazetteer = geo.load_gazetteer(path)
+    query = db.session.query(Space.id, Space.location)
+    if not overwrite:
+        query = query.filter(Space.latitude.is_(None))
+
+    resolved = {}
+    updates, missed = [], 0
+    for space_id, location in query.all():
+        if location not in resolved:
+            resolved[location] = geo.geocode(location, gazetteer)
+        point = resolved[location]
+        if point is None:
+            missed += 1
+            continue
+        updates.append({"id": space_id, "latitude": point[0], "longitude": point[1],
+                        "geohash": geo.encode(*point)})
+
+    # Bulk UPDATE by primary key; ORM events don't fire, so geohash is set here
+    for i in range(0, len(updates), chunk_size):
+        db.session.execute(update(Space), updates[i:i + chunk_size])
+    catalogue.mark_changed(db.session, searched=False)
+    db.session.commit()
+    click.echo(f"Geocoded {len(updates)} spaces, {missed} locations not in the gazetteer")
+
+
+@click.command('archive')
+@click.option('--horizon-days', type=int, default=None,
+              help='Archive bookings that ended more than this many days ago [ARCHIVE_HORIZON_DAYS].')
+@click.option('--to', 'target', type=click.Choice(['table', 'ndjson']), default='table', show_default=True,
+              help='Cold *_archive tables, or gzipped NDJSON files.')
+@click.option('--dir', 'directory', default='archive', show_default=True, help='Output directory for --to ndjson.')
+@click.option('--batch-size', default=5000, show_default=True, help='Bookings moved per transaction.')
+@with_appcontext
+def archive_command(horizon_days, target, directory, batch_size):
+    """Move old bookings, payments and invoices out of the hot tables."""
+    days = horizon_days if horizon_days is not None else current_app.config['ARCHIVE_HORIZON_DAYS']
+    before = archive.horizon(days)
+    counts = archive.archive_bookings(before, target=target, directory=directory, batch_size=batch_size)
+    summary = ", ".join(f"{count} {table}" for table, count in counts.items())
+    click.echo(f"Archived {summary} (ended before {before:%Y-%m-%d}) to {target}")
+
+
+partitions_cli = AppGroup('partitions', help='PostgreSQL table partition maintenance.')
+
+
+@partitions_cli.command('ensure')
+@click.option('--months-ahead', default=3, show_default=True, help='Create partitions this far ahead.')
+def ensure_partitions(months_ahead):
+    """Create upcoming monthly payment partitions (run monthly from cron)."""
+    created = archive.ensure_partitions(months_ahead)
+    click.echo(f"Created {', '.join(created)}" if created else "Partitions already up to date")
+
+
+@click.command('db-audit')
+@click.option('--json', 'as_json', is_flag=True, help='Print the full report as JSON.')
+@click.option('--fail/--no-fail', default=True, show_default=True,
+              help='Exit non-zero when a filtered sequential scan is found.')
+@with_appcontext
+def db_audit_command(as_json, fail):
+    """EXPLAIN every query the GET endpoints issue and flag sequential scans."""
+    if db.session.query(Booking.id).count() < 1000:
+        click.echo("Warning: few bookings; planners pick sequential scans on tiny tables. "
+                   "Run `flask seed` first.", err=True)
+    report = db_audit.run_audit(current_app)
+    if as_json:
+        click.echo(json.dumps(report, indent=2))
+    flagged = 0
+    for entry in report:
+        if entry['status'] is None:
+            if not as_json:
+                click.echo(f"skip  {entry['path']} (no user for this role)")
+            continue
+        bad = [s for s in entry['scans'] if s['filtered']]
+        flagged += len(bad)
+        if as_json:
+            continue
+        click.echo(f"{'SCAN' if bad else 'ok':4}  {entry['path']} ({entry['status']}, {entry['queries']} queries)")
+        for scan in entry['scans']:
+            kind = 'seq scan' if scan['filtered'] else 'full listing'
+            rows = f", ~{scan['rows']} rows" if scan['rows'] is not None else ''
+            click.echo(f"      {kind} on {scan['table']}{rows}: {scan['sql'][:160]}")
+    click.echo(f"{flagged} filtered sequential scan(s)", err=as_json)
+    if fail and flagged:
+        raise SystemExit(1)
+
+
+jobs_cli = AppGroup('jobs', help='Background job queue.')
+
+
+@jobs_cli.command('work')
+@click.option('--queue', default='default', show_default=True)
+@click.option('--batch', default=10, show_default=True, help='Jobs claimed per round-trip.')
+@click.option('--poll-interval', default=1.0, show_default=True, help='Seconds to sleep when idle.')
+@click.option('--burst', is_flag=True, help='Exit once the queue is empty.')
+def work_jobs(queue, batch, poll_interval, burst):
+    """Run a worker that processes queued jobs."""
+    processed = jobs.work(queue=queue, batch=batch, poll_interval=poll_interval, burst=burst)
+    click.echo(f"Processed {processed} jobs")
+
+
+@jobs_cli.command('stats')
+@click.option('--queue', default=None)
+def job_stats(queue):
+    """Show job counts per status."""
+    counts = jobs.stats(queue)
+    for status in ('queued', 'running', 'done', 'failed'):
+        click.echo(f"{status:8} {counts.get(status, 0)}")
+
+
+recurring_cli = AppGroup('recurring', help='Recurring booking maintenance.')
+
+
+@recurring_cli.command('extend')
+@click.option('--horizon-days', type=int, default=None,
+              help='Book occurrences this many days ahead [RECURRING_HORIZON_DAYS].')
+def extend_recurring(horizon_days):
+    """Book upcoming occurrences of active recurring bookings (run daily from cron)."""
+    days = horizon_days if horizon_days is not None else current_app.config['RECURRING_HORIZON_DAYS']
+    created, skipped = recurrence.extend_series(days, limit=current_app.config['RECURRING_MAX_OCCURRENCES'])
+    click.echo(f"Created {created} bookings, skipped {skipped} conflicting occurrences")
+
+
+catalogue_cli = AppGroup('catalogue', help='Shared catalogue snapshot.')
+
+
+@catalogue_cli.command('build')
+def build_catalogue():
+    """Rewrite the catalogue snapshot that workers serve /api/spaces from."""
+    path = current_app.config['CATALOGUE_SNAPSHOT_PATH']
+    if not path:
+        raise click.ClickException("CATALOGUE_SNAPSHOT_PATH is not set")
+    stamp = catalogue.build(path)
+    click.echo(f"Wrote {path} ({stamp})" if stamp else "No spaces yet; nothing to snapshot")
+
+
+recommendations_cli = AppGroup('recommendations', help='"Similar spaces" index.')
+
+
+@recommendations_cli.command('build')
+def build_recommendations():
+    """Refit the similar-spaces index and save it for workers to load."""
+    path = current_app.config['RECOMMEND_INDEX_PATH']
+    if not path:
+        raise click.ClickException("RECOMMEND_INDEX_PATH is not set")
+    index = recommendations.build(current_app.config['RECOMMEND_DIMENSIONS'])
+    index.save(path)
+    click.echo(f"Wrote {path} ({len(index.ids)} spaces, {index.dimensions} dimensions)")
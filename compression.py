@@ -0,0 +1,147 @@
+import threading
+import zlib
+from collections import OrderedDict
+from functools import wraps
+from flask import make_response, request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+
+# Negotiated response compression.
+#
+# Responses of a compressible type and at least COMPRESS_MIN_SIZE bytes are
+# sent as br (when the Brotli package is installed) or gzip, whichever the
+# client's Accept-Encoding prefers. Streamed responses are compressed chunk by
+# chunk and flushed after each one. Server-Sent Events are never compressed,
+# because compressing them would delay each event.
+#
+# Views decorated with @etag get a content-hash ETag and 304s. Their
+# compressed bodies are kept in a per-worker LRU keyed by (ETag, encoding), so
+# repeated catalogue reads only pay for serializing and hashing, not for
+# compressing. A compressed variant's ETag is made weak, as nginx does, so
+# If-None-Match still matches it.
+
+COMPRESSIBLE = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+
+class CompressedCache:
+    """Thread-safe LRU of compressed bodies keyed by (etag, encoding), bounded in bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _compressor(encoding, config):
+    if encoding == 'br':
+        return brotli.Compressor(quality=config['COMPRESS_BROTLI_QUALITY'])
+    # wbits=31 writes the gzip header and trailer
+    return zlib.compressobj(config['COMPRESS_LEVEL'], zlib.DEFLATED, 31)
+
+
+def compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+    compressor = _compressor(encoding, config)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _compress_stream(chunks, source, encoding, config):
+    compressor = _compressor(encoding, config)
+    try:
+        for chunk in chunks:
+            data = compressor.process(chunk) if encoding == 'br' else compressor.compress(chunk)
+            # Flush so each chunk reaches the client when it is produced
+            data += compressor.flush() if encoding == 'br' else compressor.flush(zlib.Z_SYNC_FLUSH)
+            if data:
+                yield data
+        yield compressor.finish() if encoding == 'br' else compressor.flush()
+    finally:
+        close = getattr(source, 'close', None)
+        if close is not None:
+            close()
+
+
+def etag(view):
+    """Give the view's response a content-hash ETag and answer If-None-Match with 304."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            response.add_etag()
+            response.make_conditional(request)
+        return response
+    return wrapper
+
+
+def init_app(app):
+    app.config.setdefault('COMPRESS_ENABLED', True)
+    app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+    app.config.setdefault('COMPRESS_LEVEL', 6)
+    app.config.setdefault('COMPRESS_BROTLI_QUALITY', 5)
+    app.config.setdefault('COMPRESS_CACHE_BYTES', 32 * 1024 * 1024)
+    cache = app.extensions['compression_cache'] = CompressedCache(app.config['COMPRESS_CACHE_BYTES'])
+    encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+
+    @app.after_request
+    def _compress(response):
+        config = app.config
+        if (not config['COMPRESS_ENABLED'] or response.mimetype not in COMPRESSIBLE
+                or response.status_code < 200 or response.status_code in (204, 206, 304)
+                or 'Content-Encoding' in response.headers or response.direct_passthrough):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = _compress_stream(response.iter_encoded(), response.response, encoding, config)
+            response.headers.pop('Content-Length', None)
+            response.headers['Content-Encoding'] = encoding
+            return response
+
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        tag, weak = response.get_etag()
+        if tag and not weak:
+            key = (tag, encoding)
+            body = cache.get(key)
+            if body is None:
+                body = compress(data, encoding, config)
+                cache.put(key, body)
+            response.set_etag(tag, weak=True)
+        else:
+            body = compress(data, encoding, config)
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+        return response
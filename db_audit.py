@@ -0,0 +1,139 @@
+import json
+from sqlalchemy import event, func, select
+from flask_jwt_extended import create_access_token
+from extensions import db
+from models import Booking, Payment, Space, User
+
+
+# GET endpoints replayed by `flask db-audit`, as (role, path). {space},
+# {payment} and {user} are filled in from the data of the audited users.
+AUDIT_REQUESTS = [
+    (None, '/api/spaces'),
+    (None, '/api/spaces?amenities=wifi,projector&facets=true'),
+    (None, '/api/spaces/nearby?lat=-1.2864&lng=36.8172&radius=5'),
+    (None, '/api/spaces/available?start=2030-01-07T09:00&end=2030-01-07T17:00&min_capacity=10'),
+    (None, '/api/spaces/available?start=2030-01-07T09:00&end=2030-01-07T17:00&sort=rating&min_rating=4'),
+    (None, '/api/spaces?min_rating=4&sort=rating'),
+    (None, '/api/spaces/{space}'),
+    (None, '/api/spaces/{space}/reviews'),
+    (None, '/api/spaces/suggest?prefix=co'),
+    ('owner', '/api/spaces/my'),
+    ('client', '/api/bookings'),
+    ('client', '/api/bookings?include_archived=true'),
+    ('client', '/api/bookings?limit=50&view=summary'),
+    ('owner', '/api/owner/bookings'),
+    ('owner', '/api/owner/bookings?status=pending&limit=50'),
+    ('admin', '/api/admin/bookings'),
+    ('client', '/api/payments'),
+    ('owner', '/api/payments'),
+    ('client', '/api/payments/{payment}'),
+    ('owner', '/api/owner/payments'),
+    ('admin', '/api/invoices'),
+    ('client', '/api/profile'),
+    ('admin', '/api/users'),
+    ('admin', '/api/users/{user}'),
+]
+
+
+def _busiest(column):
+    # The user with the most rows, so their queries see realistic selectivity
+    return db.session.execute(
+        select(column).group_by(column).order_by(func.count().desc()).limit(1)
+    ).scalar()
+
+
+def audit_users():
+    """Pick one user per role to replay requests as: {role: user_id or None}."""
+    return {
+        'client': _busiest(Booking.client_id),
+        'owner': _busiest(Space.owner_id),
+        'admin': db.session.execute(select(User.id).where(User.role == 'admin').limit(1)).scalar(),
+    }
+
+
+def capture_queries(app, method, path, headers=None):
+    """Run one request through the test client and return the SELECTs it issued."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            statements.append((statement, parameters))
+
+    engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', record)
+    try:
+        res = app.test_client().open(path, method=method, headers=headers)
+    finally:
+        for engine in engines:
+            event.remove(engine, 'before_cursor_execute', record)
+    return res.status_code, statements
+
+
+def sequential_scans(statement, parameters):
+    """
+    EXPLAIN one statement on the primary and return its sequential scans as
+    ``[{"table", "filtered", "rows"}]``. ``filtered`` scans read a whole table to
+    apply a WHERE/JOIN condition, which is what a missing index looks like;
+    unfiltered ones are plain full listings.
+    """
+    with db.engine.connect() as conn:
+        if conn.dialect.name == 'postgresql':
+            plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return list(_postgres_seq_scans(plan[0]['Plan']))
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    # SQLite: "SCAN t" is a full table scan, "SCAN t USING INDEX" walks an
+    # index and "SEARCH t USING ..." is an index lookup
+    flat = f" {' '.join(statement.upper().split())} "
+    filtered = ' WHERE ' in flat or ' JOIN ' in flat
+    scans = []
+    for row in rows:
+        words = row[-1].split()
+        if len(words) >= 2 and words[0] == 'SCAN' and 'USING' not in words:
+            scans.append({'table': words[1], 'filtered': filtered, 'rows': None})
+    return scans
+
+
+def _postgres_seq_scans(node):
+    if node['Node Type'] == 'Seq Scan':
+        yield {'table': node['Relation Name'], 'filtered': 'Filter' in node, 'rows': node.get('Plan Rows')}
+    for child in node.get('Plans', []):
+        yield from _postgres_seq_scans(child)
+
+
+def run_audit(app, requests=AUDIT_REQUESTS):
+    """
+    Replay ``requests`` and EXPLAIN every distinct SELECT they issue. Returns
+    ``[{"path", "status", "queries", "scans": [{"table", "filtered", "rows", "sql"}]}]``;
+    requests whose role has no user in the database are reported with status None.
+    """
+    users = audit_users()
+    tokens = {role: create_access_token(identity=str(user_id))
+              for role, user_id in users.items() if user_id is not None}
+    ids = {
+        'space': db.session.execute(select(Space.id).limit(1)).scalar(),
+        'payment': db.session.execute(
+            select(Payment.id).where(Payment.client_id == users['client']).limit(1)).scalar(),
+        'user': users['client'],
+    }
+    db.session.rollback()
+
+    seen, report = set(), []
+    for role, template in requests:
+        path = template.format(**ids)
+        if (role and role not in tokens) or 'None' in path:
+            report.append({'path': path, 'status': None, 'queries': 0, 'scans': []})
+            continue
+        headers = {'Authorization': f'Bearer {tokens[role]}'} if role else None
+        status, statements = capture_queries(app, 'GET', path, headers)
+        scans = []
+        for statement, parameters in statements:
+            if statement in seen:
+                continue
+            seen.add(statement)
+            for scan in sequential_scans(statement, parameters):
+                scans.append(dict(scan, sql=' '.join(statement.split())))
+        report.append({'path': path, 'status': status, 'queries': len(statements), 'scans': scans})
+    return report
@@ -0,0 +1,180 @@
+import itertools
+import time
+from functools import wraps
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import event, text
+
+
+# Read-replica routing.
+#
+# Replicas are extra SQLALCHEMY_BINDS named "replica_<n>". Views decorated
+# with @read_replica send their SELECTs to a replica unless the staleness
+# policy says otherwise:
+#   - anything flushed in this request goes to (and keeps reads on) the primary
+#   - a client that wrote within DB_READ_YOUR_WRITES_SECONDS reads the primary
+#   - replicas lagging more than DB_REPLICA_MAX_LAG seconds are skipped
+#
+# The "primary until" time travels with the client, so it holds whichever
+# worker or host serves the next request. A response to a write carries it
+# signed in a cookie and in the X-Primary-Until header. Browsers send the
+# cookie back; API clients that don't keep cookies echo the header.
+
+REPLICA_PREFIX = 'replica_'
+PRIMARY_UNTIL_COOKIE = 'spacer_primary_until'
+PRIMARY_UNTIL_HEADER = 'X-Primary-Until'
+
+_round_robin = itertools.count()
+_lag_cache = {}  # engine url -> (checked_at, lag seconds)
+
+
+def read_replica(view):
+    """Allow the view's reads to be served by a replica."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_replica = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def write_path(view):
+    """
+    Keep loaded attributes across commit for the rest of the view, so its
+    response is built from memory instead of re-SELECTing the rows it just
+    wrote (and their lazy relationships). Primary keys and defaults already
+    come back from the INSERT itself (RETURNING / prefetched Python defaults).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        session = current_app.extensions['sqlalchemy'].session()
+        previous, session.expire_on_commit = session.expire_on_commit, False
+        try:
+            return view(*args, **kwargs)
+        finally:
+            session.expire_on_commit = previous
+    return wrapper
+
+
+def replica_binds(urls):
+    """SQLALCHEMY_BINDS entries for a list of replica URLs."""
+    return {f"{REPLICA_PREFIX}{i}": url for i, url in enumerate(urls)}
+
+
+def _primary_until_serializer():
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='db-primary-until')
+
+
+def _primary_until():
+    # The signed time the client must read the primary until, or 0
+    token = request.headers.get(PRIMARY_UNTIL_HEADER) or request.cookies.get(PRIMARY_UNTIL_COOKIE)
+    if not token:
+        return 0.0
+    try:
+        return float(_primary_until_serializer().loads(
+            token, max_age=current_app.config['DB_READ_YOUR_WRITES_SECONDS'] + 1))
+    except (BadSignature, TypeError, ValueError):
+        return 0.0
+
+
+def _replica_lag(engine, config):
+    # Seconds the replica is behind; only PostgreSQL can tell us, others are
+    # assumed current. Cached per DB_REPLICA_LAG_CHECK_INTERVAL.
+    if engine.dialect.name != 'postgresql':
+        return 0.0
+    key = str(engine.url)
+    now = time.monotonic()
+    checked = _lag_cache.get(key)
+    if checked and now - checked[0] < config['DB_REPLICA_LAG_CHECK_INTERVAL']:
+        return checked[1]
+    try:
+        with engine.connect() as conn:
+            lag = conn.execute(text(
+                "SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+            )).scalar()
+    except Exception:
+        lag = float('inf')
+    _lag_cache[key] = (now, float(lag))
+    return float(lag)
+
+
+def _pick_replica(engines, config):
+    replicas = [engines[k] for k in sorted(k for k in engines if k and k.startswith(REPLICA_PREFIX))]
+    if not replicas:
+        return None
+    start = next(_round_robin)
+    for i in range(len(replicas)):
+        engine = replicas[(start + i) % len(replicas)]
+        if _replica_lag(engine, config) <= config['DB_REPLICA_MAX_LAG']:
+            return engine
+    return None
+
+
+def reads_own_writes():
+    """
+    Whether this request must see the latest writes: it wrote itself, or its
+    client wrote within DB_READ_YOUR_WRITES_SECONDS. Such reads skip replicas
+    and other caches that may lag.
+    """
+    if not has_request_context():
+        return False
+    if g.get('db_wrote'):
+        return True
+    if g.get('db_sticky') is None:
+        g.db_sticky = _primary_until() > time.time()
+    return g.db_sticky
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends @read_replica reads to a replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and self._use_replica():
+            engine = _pick_replica(self._db.engines, current_app.config)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    @staticmethod
+    def _use_replica():
+        if not has_request_context() or not g.get('db_read_replica'):
+            return False
+        return not reads_own_writes()
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_flush(session, flush_context):
+    if has_request_context():
+        g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _mark_dml(orm_execute_state):
+    # Bulk insert()/update()/delete() statements don't go through flush. Test
+    # for them explicitly: text() queries, such as the nearby search, aren't
+    # is_select either.
+    state = orm_execute_state
+    if has_request_context() and (state.is_insert or state.is_update or state.is_delete):
+        g.db_wrote = True
+
+
+def init_app(app):
+    app.config.setdefault('DB_REPLICA_MAX_LAG', 5.0)
+    app.config.setdefault('DB_REPLICA_LAG_CHECK_INTERVAL', 5.0)
+    app.config.setdefault('DB_READ_YOUR_WRITES_SECONDS', 10.0)
+
+    @app.after_request
+    def _remember_writer(response):
+        window = app.config['DB_READ_YOUR_WRITES_SECONDS']
+        if g.get('db_wrote') and window > 0:
+            token = _primary_until_serializer().dumps(time.time() + window)
+            response.headers[PRIMARY_UNTIL_HEADER] = token
+            response.set_cookie(PRIMARY_UNTIL_COOKIE, token, max_age=int(window) + 1, httponly=True,
+                                secure=request.is_secure, samesite='Lax')
+        return response
+
+    @app.teardown_request
+    def _forget_request(exc):
+        # g outlives the request when an app context was already pushed (CLI, tests)
+        for name in ('db_read_replica', 'db_wrote', 'db_sticky'):
+            g.pop(name, None)
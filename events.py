@@ -0,0 +1,223 @@
+import json
+import queue
+import threading
+from collections import defaultdict
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from db_routing import RoutingSession
+from models import Booking, Payment
+
+
+# Live booking/payment updates for the /api/events SSE stream.
+#
+# Flushed status changes are collected from the session and published only
+# after the transaction commits, to the booking client's topic and the
+# space's topic (an owner's stream subscribes to each of their spaces, so
+# writes never look the owner up). Each worker fans events out to its own
+# open streams through in-process queues. With EVENTS_BROKER_URL=redis://..., events go through a
+# Redis channel instead, so a stream on any worker sees changes made on every
+# other worker.
+#
+# A stream holds its worker for as long as it is open. Sync workers refuse
+# streams with a 503, because one open tab would take a whole process.
+# Threaded workers (gthread, ASGI, the dev server) serve at most
+# EVENTS_MAX_STREAMS at once per process. gevent workers aren't capped.
+
+CHANNEL = 'events'
+
+
+class LocalBroker:
+    """In-process pub/sub: one bounded queue per open stream, registered under its topics."""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics):
+        q = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            for topic in topics:
+                self._subscribers[topic].add(q)
+        return q
+
+    def unsubscribe(self, topics, q):
+        with self._lock:
+            for topic in topics:
+                streams = self._subscribers.get(topic)
+                if streams is not None:
+                    streams.discard(q)
+                    if not streams:
+                        del self._subscribers[topic]
+
+    def publish(self, topics, payload):
+        self.deliver(topics, payload)
+
+    def deliver(self, topics, payload):
+        with self._lock:
+            # A stream on several matching topics gets the event once
+            targets = {q for topic in topics for q in self._subscribers.get(topic, ())}
+        for q in targets:
+            try:
+                q.put_nowait(payload)
+            except queue.Full:
+                pass  # a stalled stream misses events; clients refetch on reconnect
+
+
+class RedisBroker(LocalBroker):
+    """Publishes through a Redis channel; a listener thread delivers to local streams."""
+
+    def __init__(self, client, queue_size=100):
+        super().__init__(queue_size)
+        self.client = client
+        self._listener = None
+
+    @classmethod
+    def from_url(cls, url, queue_size=100):
+        import redis  # only imported when a shared broker is configured
+        return cls(redis.Redis.from_url(url), queue_size)
+
+    def publish(self, topics, payload):
+        try:
+            self.client.publish(CHANNEL, json.dumps({'topics': list(topics), 'event': payload}))
+        except Exception:
+            if has_app_context():
+                current_app.logger.warning("Event broker unavailable, delivering locally", exc_info=True)
+            self.deliver(topics, payload)
+
+    def subscribe(self, topics):
+        # Started on first use so a preloading gunicorn master never owns the thread
+        if self._listener is None:
+            with self._lock:
+                if self._listener is None:
+                    self._listener = threading.Thread(target=self._listen, name='events-listener', daemon=True)
+                    self._listener.start()
+        return super().subscribe(topics)
+
+    def _listen(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(CHANNEL)
+        for message in pubsub.listen():
+            if message.get('type') != 'message':
+                continue
+            data = json.loads(message['data'])
+            self.deliver(data['topics'], data['event'])
+
+
+def broker_from_url(url, queue_size=100):
+    if not url or url.startswith('memory://'):
+        return LocalBroker(queue_size)
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBroker.from_url(url, queue_size)
+    raise ValueError(f"Unsupported EVENTS_BROKER_URL {url!r}")
+
+
+def _fmt(value):
+    return value.strftime('%Y-%m-%d %H:%M:%S') if value is not None else None
+
+
+def _booking_event(booking):
+    return {'type': 'booking', 'id': booking.id, 'space_id': booking.space_id, 'client_id': booking.client_id,
+            'status': booking.status, 'start_datetime': _fmt(booking.start_datetime),
+            'end_datetime': _fmt(booking.end_datetime)}
+
+
+def _payment_event(payment):
+    return {'type': 'payment', 'id': payment.id, 'booking_id': payment.booking_id,
+            'payment_status': payment.payment_status, 'amount': payment.amount}
+
+
+def user_topic(user_id):
+    return f'user:{user_id}'
+
+
+def space_topic(space_id):
+    return f'space:{space_id}'
+
+
+def notify(session, topics, payload):
+    """Publish ``payload`` to ``topics`` once the session's transaction commits."""
+    session.info.setdefault('pending_events', []).append((topics, payload))
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect(session, flush_context):
+    # History still shows the pre-flush changes here
+    with session.no_autoflush:
+        for obj in list(session.new) + list(session.dirty):
+            if isinstance(obj, Booking):
+                if obj in session.new or inspect(obj).attrs.status.history.has_changes():
+                    notify(session, {user_topic(obj.client_id), space_topic(obj.space_id)}, _booking_event(obj))
+            elif isinstance(obj, Payment):
+                if obj in session.new or inspect(obj).attrs.payment_status.history.has_changes():
+                    topics = {user_topic(obj.client_id)}
+                    # Payment routes have already loaded the booking; this is an identity-map hit
+                    booking = session.get(Booking, obj.booking_id)
+                    if booking is not None:
+                        topics.add(space_topic(booking.space_id))
+                    notify(session, topics, _payment_event(obj))
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _publish(session):
+    pending = session.info.pop('pending_events', None)
+    if not pending or not has_app_context():
+        return
+    broker = current_app.extensions.get('events')
+    if broker is None:
+        return
+    for topics, payload in pending:
+        broker.publish(topics, payload)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard(session):
+    session.info.pop('pending_events', None)
+
+
+def worker_kind(environ):
+    """
+    How the server runs this request: 'cooperative' (gevent), 'sync' (one
+    request per process, e.g. gunicorn's default workers) or 'threaded'.
+    """
+    try:
+        from gevent import monkey
+        if monkey.is_module_patched('socket'):
+            return 'cooperative'
+    except ImportError:
+        pass
+    if environ.get('wsgi.multithread'):
+        return 'threaded'
+    if environ.get('wsgi.multiprocess') or environ.get('SERVER_SOFTWARE', '').startswith('gunicorn'):
+        return 'sync'
+    return 'threaded'
+
+
+class StreamSlots:
+    """Counts a process's open streams, so threaded workers keep threads for other requests."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.open = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self.open >= self.limit:
+                return False
+            self.open += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.open -= 1
+
+
+def init_app(app):
+    app.config.setdefault('EVENTS_BROKER_URL', 'memory://')
+    app.config.setdefault('EVENTS_HEARTBEAT_SECONDS', 15.0)
+    app.config.setdefault('EVENTS_MAX_STREAM_SECONDS', 300.0)
+    app.config.setdefault('EVENTS_QUEUE_SIZE', 100)
+    app.config.setdefault('EVENTS_MAX_STREAMS', 8)
+    app.extensions['events'] = broker_from_url(app.config['EVENTS_BROKER_URL'], app.config['EVENTS_QUEUE_SIZE'])
+    app.extensions['event_streams'] = StreamSlots(app.config['EVENTS_MAX_STREAMS'])
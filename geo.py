@@ -0,0 +1,162 @@
+import csv
+import math
+import os
+from functools import lru_cache
+
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+DEFAULT_GAZETTEER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.csv")
+
+
+def encode(lat, lng, precision=9):
+    """Encode a coordinate as a geohash string of ``precision`` characters."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    chars, bits, ch, even = [], 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lng_lo + lng_hi) / 2
+            if lng >= mid:
+                ch = (ch << 1) | 1
+                lng_lo = mid
+            else:
+                ch <<= 1
+                lng_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(chars)
+
+
+def decode(geohash):
+    """Return the ``(lat, lng)`` centre of a geohash cell."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lng_lo, lng_hi = -180.0, 180.0
+    even = True
+    for c in geohash:
+        value = BASE32.index(c)
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lng_lo + lng_hi) / 2
+                lng_lo, lng_hi = (mid, lng_hi) if bit else (lng_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return (lat_lo + lat_hi) / 2, (lng_lo + lng_hi) / 2
+
+
+def cell_size(precision):
+    """Height and width of a geohash cell in degrees."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def neighbours(geohash):
+    """The cell itself plus its eight surrounding cells (deduplicated)."""
+    lat, lng = decode(geohash)
+    dlat, dlng = cell_size(len(geohash))
+    cells = []
+    for i in (-1, 0, 1):
+        for j in (-1, 0, 1):
+            nlat = lat + i * dlat
+            if not -90 < nlat < 90:
+                continue
+            nlng = (lng + j * dlng + 180) % 360 - 180
+            cell = encode(nlat, nlng, len(geohash))
+            if cell not in cells:
+                cells.append(cell)
+    return cells
+
+
+def precision_for_radius(lat, radius_km):
+    """
+    Finest precision whose cells are at least ``radius_km`` on each side, so
+    that a circle around any point is covered by its cell and the 8 neighbours.
+    """
+    for precision in range(9, 0, -1):
+        dlat, dlng = cell_size(precision)
+        height = dlat * KM_PER_DEGREE
+        width = dlng * KM_PER_DEGREE * math.cos(math.radians(lat))
+        if min(height, width) >= radius_km:
+            return precision
+    return 0
+
+
+def covering_prefixes(lat, lng, radius_km):
+    """Geohash prefixes whose cells together cover the search circle."""
+    precision = precision_for_radius(lat, radius_km)
+    if precision == 0:
+        return [""]
+    return neighbours(encode(lat, lng, precision))
+
+
+def prefix_upper_bound(prefix):
+    """
+    Smallest string sorting after every geohash starting with ``prefix``, so a
+    prefix match becomes the index-friendly ``prefix <= geohash < bound``.
+    """
+    chars = list(prefix)
+    while chars:
+        i = BASE32.index(chars[-1])
+        if i + 1 < len(BASE32):
+            chars[-1] = BASE32[i + 1]
+            return "".join(chars)
+        chars.pop()
+    return None
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp = p2 - p1
+    dl = math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def normalize_place(name):
+    return " ".join(name.lower().replace(",", " ").split())
+
+
+def load_gazetteer(path=DEFAULT_GAZETTEER):
+    """Read a ``name,latitude,longitude`` CSV into ``{normalized name: (lat, lng)}``."""
+    with open(path, newline="") as f:
+        return {
+            normalize_place(row["name"]): (float(row["latitude"]), float(row["longitude"]))
+            for row in csv.DictReader(f)
+        }
+
+
+@lru_cache(maxsize=1)
+def default_gazetteer():
+    return load_gazetteer(DEFAULT_GAZETTEER)
+
+
+def geocode(location, gazetteer):
+    """
+    Resolve a free-text location against the gazetteer: an exact match first,
+    then the longest gazetteer name contained in the text. None if unknown.
+    """
+    if not location:
+        return None
+    place = normalize_place(location)
+    if place in gazetteer:
+        return gazetteer[place]
+    padded = f" {place} "
+    matches = [name for name in gazetteer if f" {name} " in padded]
+    if not matches:
+        return None
+    return gazetteer[max(matches, key=len)]
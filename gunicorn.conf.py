@@ -0,0 +1,59 @@
+# Picked up automatically by gunicorn from the working directory.
+#
+# GUNICORN_WORKER_CLASS=gevent switches to cooperative workers: sockets
+# (Mailjet/Cloudinary HTTP calls) and psycopg2 yield while they wait, so one
+# slow upstream no longer pins a whole worker.
+import os
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "sync")
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+if worker_class == "gevent":
+    # Patch before the app (and its HTTP/DB clients) is imported, which with
+    # preload happens in the master.
+    from gevent import monkey
+
+    monkey.patch_all()
+    worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+
+def _patch_psycopg_for_gevent():
+    try:
+        import psycopg2
+        from psycopg2 import extensions
+    except ImportError:
+        return
+    from gevent.socket import wait_read, wait_write
+
+    def wait_callback(conn, timeout=None):
+        while True:
+            state = conn.poll()
+            if state == extensions.POLL_OK:
+                break
+            elif state == extensions.POLL_READ:
+                wait_read(conn.fileno(), timeout=timeout)
+            elif state == extensions.POLL_WRITE:
+                wait_write(conn.fileno(), timeout=timeout)
+            else:
+                raise psycopg2.OperationalError(f"Bad result from poll: {state!r}")
+
+    extensions.set_wait_callback(wait_callback)
+
+
+if worker_class == "gevent":
+    _patch_psycopg_for_gevent()
+
+
+def post_fork(server, worker):
+    # With preload the app (and its engines) is built once in the master. Drop
+    # any pooled connections inherited across the fork so that each worker
+    # opens its own.
+    if not server.cfg.preload_app:
+        return
+
+    from extensions import db
+    from app import app
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,49 @@
+import os
+from functools import lru_cache
+from flask import current_app
+
+
+# Third-party clients are configured on first use rather than at import time,
+# so worker boot and test sessions don't pay for integrations they never hit.
+
+@lru_cache(maxsize=None)
+def cloudinary_uploader():
+    """Return ``cloudinary.uploader``, configuring Cloudinary on the first call."""
+    import cloudinary
+    import cloudinary.uploader
+
+    cloudinary.config(
+        cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
+        api_key=os.getenv("CLOUDINARY_API_KEY"),
+        api_secret=os.getenv("CLOUDINARY_API_SECRET"),
+        secure=True
+    )
+    return cloudinary.uploader
+
+
+@lru_cache(maxsize=None)
+def mailjet_client():
+    """Return a shared Mailjet v3.1 client built from the environment."""
+    from mailjet_rest import Client
+
+    return Client(
+        auth=(os.getenv("MAILJET_API_KEY"), os.getenv("MAILJET_API_SECRET")),
+        version='v3.1',
+        # Overridable for local fakes (benchmarks, staging)
+        api_url=os.getenv("MAILJET_API_URL") or None
+    )
+
+
+def mailjet_sender():
+    """The ``From`` block used by every outgoing Mailjet message."""
+    return {
+        "Email": os.getenv("MAILJET_SENDER_EMAIL"),
+        "Name": os.getenv("MAILJET_SENDER_NAME")
+    }
+
+
+def send_mail(data):
+    """Send a Mailjet v3.1 payload. Returns None when MAIL_SUPPRESS_SEND is set."""
+    if current_app.config.get('MAIL_SUPPRESS_SEND'):
+        return None
+    return mailjet_client().send.create(data=data)
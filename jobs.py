@@ -0,0 +1,149 @@
+import json
+import logging
+import os
+import socket
+import time
+import traceback
+from datetime import datetime, timedelta
+from sqlalchemy import case, func, select, update
+from extensions import db
+from models import Job
+
+
+# Durable background jobs in the `jobs` table.
+#
+# Request handlers call enqueue() and commit it together with their own
+# changes, so a job exists exactly when the write that caused it does.
+# `flask jobs work` claims due jobs with a single UPDATE ... WHERE id IN
+# (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING, so concurrent workers on
+# PostgreSQL never wait on or double-claim each other's rows. SQLite has no
+# row locks, but it runs that UPDATE under its database write lock, which makes
+# the claim just as atomic. Failed jobs are retried with exponential backoff
+# until max_attempts, then marked failed.
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+BACKOFF_BASE = 10     # seconds before the first retry, doubling after that
+BACKOFF_MAX = 3600
+STALE_AFTER = 600     # a running job whose worker went quiet this long is requeued
+
+
+def task(name):
+    """Register a function as the handler for jobs called ``name``."""
+    def decorator(func):
+        TASKS[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, payload=None, queue='default', run_at=None, delay=None, max_attempts=5):
+    """
+    Add a job to the current session; it is queued when the caller commits.
+    ``payload`` (a JSON-able dict) becomes the task's keyword arguments.
+    ``run_at`` or ``delay`` (seconds) schedules it for later.
+    """
+    if run_at is None:
+        run_at = datetime.utcnow() + timedelta(seconds=delay or 0)
+    job = Job(name=name, payload=json.dumps(payload or {}), queue=queue, run_at=run_at,
+              max_attempts=max_attempts, status='queued', attempts=0)
+    db.session.add(job)
+    return job
+
+
+def claim(worker_id, queue='default', limit=1):
+    """Mark up to ``limit`` due jobs as running for this worker and return them."""
+    now = datetime.utcnow()
+    due = (
+        select(Job.id)
+        .where(Job.queue == queue, Job.status == 'queued', Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.session.execute(
+        update(Job)
+        .where(Job.id.in_(due.scalar_subquery()))
+        .values(status='running', locked_by=worker_id, locked_at=now, attempts=Job.attempts + 1)
+        .returning(Job.id, Job.name, Job.payload, Job.attempts, Job.max_attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    return sorted(rows, key=lambda row: row.id)
+
+
+def backoff(attempts):
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempts - 1))
+
+
+def run_job(job, worker_id):
+    """Run one claimed job and record the outcome. Returns True on success."""
+    values = {'locked_by': None, 'locked_at': None}
+    try:
+        handler = TASKS.get(job.name)
+        if handler is None:
+            raise LookupError(f"No task registered as {job.name!r}")
+        handler(**json.loads(job.payload))
+    except Exception:
+        db.session.rollback()
+        values['last_error'] = traceback.format_exc(limit=5)
+        if job.attempts >= job.max_attempts:
+            values.update(status='failed', finished_at=datetime.utcnow())
+        else:
+            values.update(status='queued', run_at=datetime.utcnow() + timedelta(seconds=backoff(job.attempts)))
+        logger.warning("Job %s (%s) failed on attempt %s of %s", job.id, job.name, job.attempts, job.max_attempts,
+                       exc_info=True, extra={'job_id': job.id, 'job': job.name, 'final': values['status'] == 'failed'})
+        ok = False
+    else:
+        values.update(status='done', finished_at=datetime.utcnow())
+        ok = True
+    db.session.execute(
+        update(Job).where(Job.id == job.id, Job.locked_by == worker_id).values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return ok
+
+
+def requeue_stale(stale_after=STALE_AFTER):
+    """Give jobs held by a crashed worker back to the queue (or fail them if out of attempts)."""
+    cutoff = datetime.utcnow() - timedelta(seconds=stale_after)
+    count = db.session.execute(
+        update(Job)
+        .where(Job.status == 'running', Job.locked_at < cutoff)
+        .values(status=case((Job.attempts >= Job.max_attempts, 'failed'), else_='queued'),
+                locked_by=None, locked_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return count
+
+
+def work(queue='default', worker_id=None, batch=10, poll_interval=1.0, burst=False, stale_after=STALE_AFTER):
+    """
+    Process jobs until interrupted, or until the queue is empty with
+    ``burst``. Returns the number of jobs run.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    processed, reaped_at = 0, 0.0
+    while True:
+        if time.monotonic() - reaped_at > stale_after / 2:
+            requeue_stale(stale_after)
+            reaped_at = time.monotonic()
+        jobs = claim(worker_id, queue, batch)
+        for job in jobs:
+            run_job(job, worker_id)
+            processed += 1
+        if not jobs:
+            if burst:
+                return processed
+            time.sleep(poll_interval)
+
+
+def stats(queue=None):
+    """Job counts per status."""
+    query = select(Job.status, func.count()).group_by(Job.status)
+    if queue:
+        query = query.where(Job.queue == queue)
+    return dict(db.session.execute(query).all())
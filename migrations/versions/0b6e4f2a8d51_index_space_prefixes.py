@@ -0,0 +1,33 @@
+"""Index lowercased space titles and locations for prefix search
+
+Revision ID: 0b6e4f2a8d51
+Revises: f7b3d1e6a9c2
+Create Date: 2026-10-19 23:48:12.615230
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b6e4f2a8d51'
+down_revision = 'f7b3d1e6a9c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # text_pattern_ops lets PostgreSQL serve LIKE 'prefix%' whatever the
+    # database collation; other databases range-scan a plain lower() index.
+    for name in ('title', 'location'):
+        if op.get_bind().dialect.name == 'postgresql':
+            op.execute(f'CREATE INDEX ix_spaces_{name}_prefix ON spaces '
+                       f'(lower({name}) text_pattern_ops) WHERE is_available')
+        else:
+            op.create_index(f'ix_spaces_{name}_prefix', 'spaces', [sa.text(f'lower({name})')], unique=False,
+                            sqlite_where=sa.text('is_available = 1'))
+
+
+def downgrade():
+    op.drop_index('ix_spaces_location_prefix', table_name='spaces')
+    op.drop_index('ix_spaces_title_prefix', table_name='spaces')
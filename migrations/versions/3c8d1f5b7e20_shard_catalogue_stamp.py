@@ -0,0 +1,34 @@
+"""Shard the catalogue stamp over 16 catalogue_state rows
+
+Revision ID: 3c8d1f5b7e20
+Revises: 0b6e4f2a8d51
+Create Date: 2026-10-20 01:06:31.204518
+
+"""
+import uuid
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c8d1f5b7e20'
+down_revision = '0b6e4f2a8d51'
+branch_labels = None
+depends_on = None
+
+
+catalogue_state = sa.table('catalogue_state',
+    sa.column('id', sa.Integer),
+    sa.column('stamp', sa.String),
+    sa.column('updated_at', sa.DateTime),
+)
+
+
+def upgrade():
+    op.bulk_insert(catalogue_state, [{'id': shard, 'stamp': uuid.uuid4().hex, 'updated_at': datetime.utcnow()}
+                                     for shard in range(2, 17)])
+
+
+def downgrade():
+    op.execute(catalogue_state.delete().where(catalogue_state.c.id > 1))
@@ -0,0 +1,152 @@
+"""Archive tables for old bookings; monthly payment partitions on PostgreSQL
+
+Revision ID: 5e0a7c3f2b18
+Revises: 8c12551b5a43
+Create Date: 2026-10-19 14:21:09.602417
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0a7c3f2b18'
+down_revision = '8c12551b5a43'
+branch_labels = None
+depends_on = None
+
+MONTHS_AHEAD = 3
+
+
+def _enum(*values, name):
+    # The enum types already exist on PostgreSQL (created with the hot tables)
+    return sa.Enum(*values, name=name).with_variant(
+        postgresql.ENUM(*values, name=name, create_type=False), 'postgresql')
+
+
+def _add_months(day, months):
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def upgrade():
+    op.create_table('bookings_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('space_id', sa.Integer(), nullable=True),
+    sa.Column('start_datetime', sa.DateTime(), nullable=False),
+    sa.Column('end_datetime', sa.DateTime(), nullable=False),
+    sa.Column('duration_hours', sa.Integer(), nullable=True),
+    sa.Column('total_price', sa.Float(), nullable=True),
+    sa.Column('status', _enum('pending', 'confirmed', 'cancelled', 'declined', name='booking_status'), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_bookings_archive_client_id', 'bookings_archive', ['client_id'], unique=False)
+    op.create_index('ix_bookings_archive_space_id', 'bookings_archive', ['space_id'], unique=False)
+    op.create_table('payments_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=False),
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('payment_method', sa.String(length=50), nullable=False),
+    sa.Column('payment_status', _enum('pending', 'completed', 'failed', name='payment_status_enum'), nullable=True),
+    sa.Column('payment_date', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_payments_archive_booking_id', 'payments_archive', ['booking_id'], unique=False)
+    op.create_table('invoices_archive',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=False),
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('invoice_url', sa.String(length=255), nullable=False),
+    sa.Column('issued_at', sa.DateTime(), nullable=True),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_invoices_archive_booking_id', 'invoices_archive', ['booking_id'], unique=False)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        _partition_payments()
+
+
+def _partition_payments():
+    # Rebuild payments as a table range-partitioned by payment_date month.
+    # The partition key has to be part of the primary key, so the PK becomes
+    # (id, payment_date); ids still come from the original sequence.
+    bind = op.get_bind()
+    op.execute('ALTER TABLE payments RENAME TO payments_unpartitioned')
+    op.execute('ALTER TABLE payments_unpartitioned RENAME CONSTRAINT payments_pkey TO payments_unpartitioned_pkey')
+    op.execute("""
+        CREATE TABLE payments (
+            id integer NOT NULL DEFAULT nextval('payments_id_seq'::regclass),
+            booking_id integer NOT NULL REFERENCES bookings (id),
+            client_id integer NOT NULL REFERENCES users (id),
+            amount double precision NOT NULL,
+            payment_method varchar(50) NOT NULL,
+            payment_status payment_status_enum,
+            payment_date timestamp without time zone NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            PRIMARY KEY (id, payment_date)
+        ) PARTITION BY RANGE (payment_date)
+    """)
+    op.execute('CREATE TABLE payments_default PARTITION OF payments DEFAULT')
+
+    oldest = bind.execute(sa.text('SELECT min(payment_date) FROM payments_unpartitioned')).scalar()
+    first = (oldest or datetime.utcnow()).date().replace(day=1)
+    last = _add_months(date.today().replace(day=1), MONTHS_AHEAD)
+    month = first
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE payments_y{month.year}m{month.month:02d} PARTITION OF payments "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+
+    op.execute("""
+        INSERT INTO payments (id, booking_id, client_id, amount, payment_method, payment_status, payment_date)
+        SELECT id, booking_id, client_id, amount, payment_method, payment_status,
+               COALESCE(payment_date, now() AT TIME ZONE 'utc')
+        FROM payments_unpartitioned
+    """)
+    op.execute('ALTER SEQUENCE payments_id_seq OWNED BY payments.id')
+    op.execute('DROP TABLE payments_unpartitioned')
+
+
+def _unpartition_payments():
+    op.execute('ALTER TABLE payments RENAME TO payments_partitioned')
+    op.execute('ALTER TABLE payments_partitioned RENAME CONSTRAINT payments_pkey TO payments_partitioned_pkey')
+    op.execute("""
+        CREATE TABLE payments (
+            id integer NOT NULL DEFAULT nextval('payments_id_seq'::regclass),
+            booking_id integer NOT NULL REFERENCES bookings (id),
+            client_id integer NOT NULL REFERENCES users (id),
+            amount double precision NOT NULL,
+            payment_method varchar(50) NOT NULL,
+            payment_status payment_status_enum,
+            payment_date timestamp without time zone,
+            CONSTRAINT payments_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute('INSERT INTO payments SELECT * FROM payments_partitioned')
+    op.execute('ALTER SEQUENCE payments_id_seq OWNED BY payments.id')
+    op.execute('DROP TABLE payments_partitioned')  # drops every partition with it
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        _unpartition_payments()
+
+    op.drop_index('ix_invoices_archive_booking_id', table_name='invoices_archive')
+    op.drop_table('invoices_archive')
+    op.drop_index('ix_payments_archive_booking_id', table_name='payments_archive')
+    op.drop_table('payments_archive')
+    op.drop_index('ix_bookings_archive_space_id', table_name='bookings_archive')
+    op.drop_index('ix_bookings_archive_client_id', table_name='bookings_archive')
+    op.drop_table('bookings_archive')
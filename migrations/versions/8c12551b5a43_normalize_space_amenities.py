@@ -0,0 +1,83 @@
+"""Normalize space amenities into amenities/space_amenities
+
+Revision ID: 8c12551b5a43
+Revises: 9c9ba21e1f91
+Create Date: 2026-10-19 11:04:27.540913
+
+"""
+import json
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c12551b5a43'
+down_revision = '9c9ba21e1f91'
+branch_labels = None
+depends_on = None
+
+
+def _parse(value):
+    # spaces.amenities holds either a JSON list (API) or a comma string (seed.py)
+    if not value:
+        return []
+    try:
+        names = json.loads(value)
+    except ValueError:
+        names = None
+    if not isinstance(names, list):
+        names = value.split(',')
+    return [str(n).strip() for n in names if str(n).strip()]
+
+
+def _key(name):
+    return re.sub(r'[^a-z0-9]', '', name.lower())[:50]
+
+
+def upgrade():
+    op.create_table('amenities',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=50), nullable=False),
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('key')
+    )
+    op.create_table('space_amenities',
+    sa.Column('space_id', sa.Integer(), nullable=False),
+    sa.Column('amenity_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['amenity_id'], ['amenities.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['space_id'], ['spaces.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('space_id', 'amenity_id')
+    )
+    op.create_index('ix_space_amenities_amenity_space', 'space_amenities', ['amenity_id', 'space_id'], unique=False)
+
+    # Data migration: split every existing amenities value into rows
+    bind = op.get_bind()
+    amenities = sa.table('amenities', sa.column('id', sa.Integer), sa.column('key', sa.String),
+                         sa.column('name', sa.String))
+    links = sa.table('space_amenities', sa.column('space_id', sa.Integer), sa.column('amenity_id', sa.Integer))
+
+    names, space_keys = {}, []
+    for space_id, value in bind.execute(sa.text('SELECT id, amenities FROM spaces')):
+        keys = []
+        for name in _parse(value):
+            key = _key(name)
+            if key and key not in keys:
+                names.setdefault(key, name[:50])
+                keys.append(key)
+        space_keys.append((space_id, keys))
+
+    if names:
+        bind.execute(amenities.insert(), [{'key': k, 'name': n} for k, n in names.items()])
+        ids = dict(bind.execute(sa.select(amenities.c.key, amenities.c.id)).all())
+        rows = [{'space_id': space_id, 'amenity_id': ids[k]} for space_id, keys in space_keys for k in keys]
+        for i in range(0, len(rows), 5000):
+            bind.execute(links.insert(), rows[i:i + 5000])
+
+
+def downgrade():
+    op.drop_index('ix_space_amenities_amenity_space', table_name='space_amenities')
+    op.drop_table('space_amenities')
+    op.drop_table('amenities')
@@ -0,0 +1,34 @@
+"""Add the catalogue_state shards followed by autocomplete
+
+Revision ID: 9a4e7c2b6d13
+Revises: 3c8d1f5b7e20
+Create Date: 2026-10-20 02:14:09.871342
+
+"""
+import uuid
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a4e7c2b6d13'
+down_revision = '3c8d1f5b7e20'
+branch_labels = None
+depends_on = None
+
+
+catalogue_state = sa.table('catalogue_state',
+    sa.column('id', sa.Integer),
+    sa.column('stamp', sa.String),
+    sa.column('updated_at', sa.DateTime),
+)
+
+
+def upgrade():
+    op.bulk_insert(catalogue_state, [{'id': shard, 'stamp': uuid.uuid4().hex, 'updated_at': datetime.utcnow()}
+                                     for shard in range(101, 117)])
+
+
+def downgrade():
+    op.execute(catalogue_state.delete().where(catalogue_state.c.id.between(101, 116)))
@@ -0,0 +1,46 @@
+"""Add space coordinates and geohash index
+
+Revision ID: 9c9ba21e1f91
+Revises: d00148dc53fe
+Create Date: 2026-10-19 10:12:41.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9c9ba21e1f91'
+down_revision = 'd00148dc53fe'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('spaces', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('latitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('longitude', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('geohash', sa.String(length=12), nullable=True))
+        batch_op.create_index(batch_op.f('ix_spaces_geohash'), ['geohash'], unique=False)
+
+    # Optional PostgreSQL path: a GiST index for earthdistance radius queries
+    # (used when GEO_BACKEND=earthdistance).
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS cube')
+        op.execute('CREATE EXTENSION IF NOT EXISTS earthdistance')
+        op.execute(
+            'CREATE INDEX ix_spaces_earth ON spaces '
+            'USING gist (ll_to_earth(latitude, longitude)) '
+            'WHERE latitude IS NOT NULL AND longitude IS NOT NULL'
+        )
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_spaces_earth')
+
+    with op.batch_alter_table('spaces', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_spaces_geohash'))
+        batch_op.drop_column('geohash')
+        batch_op.drop_column('longitude')
+        batch_op.drop_column('latitude')
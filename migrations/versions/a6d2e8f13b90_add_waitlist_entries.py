@@ -0,0 +1,45 @@
+"""Add waitlist_entries
+
+Revision ID: a6d2e8f13b90
+Revises: f41c8b2d9e07
+Create Date: 2026-10-19 18:32:40.118305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d2e8f13b90'
+down_revision = 'f41c8b2d9e07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('waitlist_entries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('space_id', sa.Integer(), nullable=False),
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('start_datetime', sa.DateTime(), nullable=False),
+    sa.Column('end_datetime', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.Enum('waiting', 'offered', 'cancelled', name='waitlist_status'), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('offered_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ),
+    sa.ForeignKeyConstraint(['client_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['space_id'], ['spaces.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_waitlist_entries_client_id', 'waitlist_entries', ['client_id'], unique=False)
+    op.create_index('ix_waitlist_entries_space_status_start', 'waitlist_entries',
+                    ['space_id', 'status', 'start_datetime'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_waitlist_entries_space_status_start', table_name='waitlist_entries')
+    op.drop_index('ix_waitlist_entries_client_id', table_name='waitlist_entries')
+    op.drop_table('waitlist_entries')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TYPE IF EXISTS waitlist_status')
@@ -0,0 +1,49 @@
+"""Index foreign keys and the columns routes filter on
+
+Revision ID: b7d41e9a6c25
+Revises: 5e0a7c3f2b18
+Create Date: 2026-10-19 15:02:47.118530
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d41e9a6c25'
+down_revision = '5e0a7c3f2b18'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, extra kwargs)
+INDEXES = [
+    ('ix_spaces_owner_id', 'spaces', ['owner_id'], {}),
+    ('ix_spaces_available', 'spaces', ['id'],
+     {'postgresql_where': sa.text('is_available'), 'sqlite_where': sa.text('is_available = 1')}),
+    ('ix_bookings_client_start', 'bookings', ['client_id', 'start_datetime'], {}),
+    ('ix_bookings_space_start', 'bookings', ['space_id', 'start_datetime'], {}),
+    ('ix_bookings_status_start', 'bookings', ['status', 'start_datetime'], {}),
+    ('ix_payments_booking_id', 'payments', ['booking_id'], {}),
+    ('ix_payments_client_id', 'payments', ['client_id'], {}),
+    ('ix_invoices_booking_id', 'invoices', ['booking_id'], {}),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # Build without blocking writes. CONCURRENTLY can't run in a
+        # transaction, and isn't supported on the partitioned payments table.
+        with op.get_context().autocommit_block():
+            for name, table, columns, kwargs in INDEXES:
+                op.create_index(name, table, columns, unique=False, if_not_exists=True,
+                                postgresql_concurrently=table != 'payments', **kwargs)
+        return
+
+    for name, table, columns, kwargs in INDEXES:
+        op.create_index(name, table, columns, unique=False, **kwargs)
+
+
+def downgrade():
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
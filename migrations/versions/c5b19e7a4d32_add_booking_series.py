@@ -0,0 +1,60 @@
+"""Add booking_series for recurring bookings
+
+Revision ID: c5b19e7a4d32
+Revises: a6d2e8f13b90
+Create Date: 2026-10-19 19:05:12.530417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5b19e7a4d32'
+down_revision = 'a6d2e8f13b90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('booking_series',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('space_id', sa.Integer(), nullable=False),
+    sa.Column('rrule', sa.String(length=255), nullable=False),
+    sa.Column('start_datetime', sa.DateTime(), nullable=False),
+    sa.Column('end_datetime', sa.DateTime(), nullable=False),
+    sa.Column('status', sa.Enum('active', 'cancelled', name='booking_series_status'), nullable=False),
+    sa.Column('materialized_until', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['client_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['space_id'], ['spaces.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_booking_series_client_id', 'booking_series', ['client_id'], unique=False)
+    op.create_index('ix_booking_series_space_id', 'booking_series', ['space_id'], unique=False)
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('series_id', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_bookings_series_id'), ['series_id'], unique=False)
+        batch_op.create_foreign_key('fk_bookings_series_id', 'booking_series', ['series_id'], ['id'])
+
+    # Archive rows copy every bookings column
+    with op.batch_alter_table('bookings_archive', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('series_id', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('bookings_archive', schema=None) as batch_op:
+        batch_op.drop_column('series_id')
+
+    with op.batch_alter_table('bookings', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_bookings_series_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_bookings_series_id'))
+        batch_op.drop_column('series_id')
+
+    op.drop_index('ix_booking_series_space_id', table_name='booking_series')
+    op.drop_index('ix_booking_series_client_id', table_name='booking_series')
+    op.drop_table('booking_series')
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP TYPE IF EXISTS booking_series_status')
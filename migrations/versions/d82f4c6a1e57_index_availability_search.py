@@ -0,0 +1,41 @@
+"""Index availability search
+
+Revision ID: d82f4c6a1e57
+Revises: c5b19e7a4d32
+Create Date: 2026-10-19 19:41:26.704382
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd82f4c6a1e57'
+down_revision = 'c5b19e7a4d32'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, extra kwargs)
+INDEXES = [
+    ('ix_spaces_available_price', 'spaces', ['price_per_hour', 'id'],
+     {'postgresql_where': sa.text('is_available'), 'sqlite_where': sa.text('is_available = 1')}),
+    ('ix_bookings_space_end', 'bookings', ['space_id', 'end_datetime', 'start_datetime', 'status'], {}),
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns, kwargs in INDEXES:
+                op.create_index(name, table, columns, unique=False, if_not_exists=True,
+                                postgresql_concurrently=True, **kwargs)
+        return
+
+    for name, table, columns, kwargs in INDEXES:
+        op.create_index(name, table, columns, unique=False, **kwargs)
+
+
+def downgrade():
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,32 @@
+"""Add catalogue_state for the shared catalogue snapshot
+
+Revision ID: e5c7a9d3f104
+Revises: d82f4c6a1e57
+Create Date: 2026-10-19 21:12:40.518223
+
+"""
+import uuid
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5c7a9d3f104'
+down_revision = 'd82f4c6a1e57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    catalogue_state = op.create_table('catalogue_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stamp', sa.String(length=32), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.bulk_insert(catalogue_state, [{'id': 1, 'stamp': uuid.uuid4().hex, 'updated_at': datetime.utcnow()}])
+
+
+def downgrade():
+    op.drop_table('catalogue_state')
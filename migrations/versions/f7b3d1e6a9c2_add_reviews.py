@@ -0,0 +1,56 @@
+"""Add reviews and space rating aggregates
+
+Revision ID: f7b3d1e6a9c2
+Revises: e5c7a9d3f104
+Create Date: 2026-10-19 22:31:07.402815
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7b3d1e6a9c2'
+down_revision = 'e5c7a9d3f104'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('spaces', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('avg_rating', sa.Float(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('review_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.create_index('ix_spaces_available_rating', ['avg_rating', 'id'], unique=False,
+                              postgresql_where=sa.text('is_available'), sqlite_where=sa.text('is_available = 1'))
+
+    op.create_table('reviews',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=True),
+    sa.Column('space_id', sa.Integer(), nullable=False),
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('rating', sa.Integer(), nullable=False),
+    sa.Column('comment', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint('rating BETWEEN 1 AND 5', name='ck_reviews_rating'),
+    sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ),
+    sa.ForeignKeyConstraint(['client_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['space_id'], ['spaces.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('booking_id')
+    )
+    with op.batch_alter_table('reviews', schema=None) as batch_op:
+        batch_op.create_index('ix_reviews_space_id', ['space_id', 'id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_reviews_client_id'), ['client_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('reviews', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_reviews_client_id'))
+        batch_op.drop_index('ix_reviews_space_id')
+
+    op.drop_table('reviews')
+    with op.batch_alter_table('spaces', schema=None) as batch_op:
+        batch_op.drop_index('ix_spaces_available_rating')
+        batch_op.drop_column('review_count')
+        batch_op.drop_column('avg_rating')
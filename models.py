@@ -1,7 +1,11 @@
+import json
+import re
 from datetime import datetime
 from extensions import db
+from sqlalchemy import event
 from sqlalchemy.orm import relationship
 from sqlalchemy_serializer import SerializerMixin
+import geo
 
 class User(db.Model, SerializerMixin):
     __tablename__ = 'users'
@@ -29,15 +33,88 @@ class User(db.Model, SerializerMixin):
         return f'<User {self.email}, {self.name}, {self.role}, Verified: {self.is_verified}>'
 
 
+space_amenities = db.Table(
+    'space_amenities',
+    db.Column('space_id', db.Integer, db.ForeignKey('spaces.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('amenity_id', db.Integer, db.ForeignKey('amenities.id', ondelete='CASCADE'), primary_key=True),
+    # (space_id, amenity_id) is covered by the primary key; this one serves
+    # "which spaces have amenity X" filters and facet counts.
+    db.Index('ix_space_amenities_amenity_space', 'amenity_id', 'space_id'),
+)
+
+
+def parse_amenities(value):
+    """Amenity names from a list, a JSON-encoded list or a comma-separated string."""
+    if not value:
+        return []
+    if isinstance(value, str):
+        try:
+            names = json.loads(value)
+        except ValueError:
+            names = None
+        # Any other JSON ("5", "true", '"WiFi"') is just the text it was written as
+        value = names if isinstance(names, list) else value.split(',')
+    return [str(name).strip() for name in value if str(name).strip()]
+
+
+class Amenity(db.Model, SerializerMixin):
+    __tablename__ = 'amenities'
+
+    serialize_only = ('id', 'key', 'name')
+
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(50), unique=True, nullable=False)
+    name = db.Column(db.String(50), nullable=False)
+
+    spaces = db.relationship('Space', secondary=space_amenities, back_populates='amenity_list')
+
+    @staticmethod
+    def normalize(name):
+        """Lookup key for an amenity name: "Wi-Fi", "wifi" and "WiFi" all become "wifi"."""
+        return re.sub(r'[^a-z0-9]', '', name.lower())[:50]
+
+    @classmethod
+    def get_or_create(cls, names):
+        """Amenity rows for ``names`` (deduplicated by key), creating missing ones."""
+        wanted = {}
+        for name in names:
+            key = cls.normalize(name)
+            if key and key not in wanted:
+                wanted[key] = name
+        if not wanted:
+            return []
+        found = {a.key: a for a in cls.query.filter(cls.key.in_(wanted))}
+        for key, name in wanted.items():
+            if key not in found:
+                found[key] = cls(key=key, name=name[:50])
+                db.session.add(found[key])
+        return [found[key] for key in wanted]
+
+    def __repr__(self):
+        return f'<Amenity {self.key}>'
+
+
 class Space(db.Model, SerializerMixin):
     __tablename__ = 'spaces'
+    __table_args__ = (
+        # Listings only ever read available spaces
+        db.Index('ix_spaces_available', 'id',
+                 postgresql_where=db.text('is_available'), sqlite_where=db.text('is_available = 1')),
+        # Availability search pages through available spaces by price
+        db.Index('ix_spaces_available_price', 'price_per_hour', 'id',
+                 postgresql_where=db.text('is_available'), sqlite_where=db.text('is_available = 1')),
+        # Listings sorted or filtered by rating
+        db.Index('ix_spaces_available_rating', 'avg_rating', 'id',
+                 postgresql_where=db.text('is_available'), sqlite_where=db.text('is_available = 1')),
+    )
 
     serialize_only = ('id', 'owner_id', 'title', 'description', 'location',
                       'capacity', 'amenities', 'price_per_hour', 'price_per_day',
-                      'is_available', 'main_image_url', 'created_at')
+                      'is_available', 'main_image_url', 'latitude', 'longitude', 'avg_rating', 'review_count',
+                      'created_at')
 
     id = db.Column(db.Integer, primary_key=True)
-    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     title = db.Column(db.String(150), nullable=False)
     description = db.Column(db.Text, nullable=False)
     location = db.Column(db.String(150), nullable=False)
@@ -47,22 +124,63 @@ class Space(db.Model, SerializerMixin):
     price_per_day = db.Column(db.Float, nullable=False)
     is_available = db.Column(db.Boolean, default=True)
     main_image_url = db.Column(db.String(255))
+    latitude = db.Column(db.Float, nullable=True)
+    longitude = db.Column(db.Float, nullable=True)
+    geohash = db.Column(db.String(12), nullable=True, index=True)
+    # Maintained by reviews.py on every review write; 0 until the first review
+    avg_rating = db.Column(db.Float, nullable=False, default=0, server_default='0')
+    review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # Relationships
     owner = db.relationship('User', back_populates='spaces')
     bookings = db.relationship("Booking", back_populates="space", cascade="all, delete-orphan")
+    amenity_list = db.relationship('Amenity', secondary=space_amenities, back_populates='spaces')
 
 
     serialize_rules = ('-owner.password_hash', '-owner.spaces', '-bookings.space',)
 
+    def set_amenities(self, value):
+        """Store amenities as the JSON list column and as normalized amenity rows."""
+        names = parse_amenities(value)
+        self.amenities = json.dumps(names)
+        self.amenity_list = Amenity.get_or_create(names)
+
     def __repr__(self):
         return f'<Space {self.title} by {self.owner.name}, {self.location}, Capacity: {self.capacity}>'
 
 
+# Autocomplete's database fallback (suggest.py): left-anchored matches on the
+# lowercased title and location. text_pattern_ops compares bytewise, so
+# PostgreSQL can answer LIKE 'prefix%' from it under any database collation.
+db.Index('ix_spaces_title_prefix', db.func.lower(Space.title).label('title_lower'),
+         postgresql_ops={'title_lower': 'text_pattern_ops'},
+         postgresql_where=db.text('is_available'), sqlite_where=db.text('is_available = 1'))
+db.Index('ix_spaces_location_prefix', db.func.lower(Space.location).label('location_lower'),
+         postgresql_ops={'location_lower': 'text_pattern_ops'},
+         postgresql_where=db.text('is_available'), sqlite_where=db.text('is_available = 1'))
+
+
+@event.listens_for(Space, 'before_insert')
+@event.listens_for(Space, 'before_update')
+def _sync_space_geohash(mapper, connection, space):
+    # Keep the geohash (the portable spatial index key) in step with lat/lng
+    if space.latitude is not None and space.longitude is not None:
+        space.geohash = geo.encode(space.latitude, space.longitude)
+    else:
+        space.geohash = None
+
+
 class Booking(db.Model, SerializerMixin):
     __tablename__ = 'bookings'
+    __table_args__ = (
+        db.Index('ix_bookings_client_start', 'client_id', 'start_datetime'),
+        db.Index('ix_bookings_space_start', 'space_id', 'start_datetime'),
+        # Overlap probes (end > :start AND start < :end) only touch bookings ending after :start
+        db.Index('ix_bookings_space_end', 'space_id', 'end_datetime', 'start_datetime', 'status'),
+        db.Index('ix_bookings_status_start', 'status', 'start_datetime'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -74,6 +192,7 @@ class Booking(db.Model, SerializerMixin):
     status = db.Column(db.Enum('pending', 'confirmed', 'cancelled', 'declined', name='booking_status'), default='pending')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    series_id = db.Column(db.Integer, db.ForeignKey('booking_series.id'), index=True)
 
     # Relationships
     client = db.relationship('User', back_populates='bookings')
@@ -97,14 +216,40 @@ class Booking(db.Model, SerializerMixin):
         return f'<Booking {self.id}, Status: {self.status}>'
 
 
+class BookingSeries(db.Model, SerializerMixin):
+    __tablename__ = 'booking_series'
+
+    serialize_only = ('id', 'client_id', 'space_id', 'rrule', 'start_datetime', 'end_datetime', 'status',
+                      'materialized_until', 'created_at')
+
+    id = db.Column(db.Integer, primary_key=True)
+    client_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    space_id = db.Column(db.Integer, db.ForeignKey('spaces.id', ondelete="CASCADE"), nullable=False, index=True)
+    rrule = db.Column(db.String(255), nullable=False)
+    # First occurrence; later ones keep its time of day and length
+    start_datetime = db.Column(db.DateTime, nullable=False)
+    end_datetime = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.Enum('active', 'cancelled', name='booking_series_status'), nullable=False, default='active')
+    # Occurrences starting before this have been written to bookings
+    materialized_until = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relationships
+    space = db.relationship('Space')
+    client = db.relationship('User')
+
+    def __repr__(self):
+        return f'<BookingSeries {self.id} for Space {self.space_id}: {self.rrule}>'
+
+
 class Payment(db.Model, SerializerMixin):
     __tablename__ = 'payments'
 
     serialize_only = ('id', 'booking_id', 'amount', 'payment_method', 'payment_status', 'payment_date','client_id')
 
     id = db.Column(db.Integer, primary_key=True)
-    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), nullable=False)
-    client_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), nullable=False, index=True)
+    client_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     amount = db.Column(db.Float, nullable=False)
     payment_method = db.Column(db.String(50), nullable=False)
     payment_status = db.Column(db.Enum('pending', 'completed', 'failed', name='payment_status_enum'), default='pending')
@@ -126,7 +271,7 @@ class Invoice(db.Model, SerializerMixin):
     serialize_only = ('id', 'booking_id', 'invoice_url', 'issued_at')
 
     id = db.Column(db.Integer, primary_key=True)
-    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), nullable=False)
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), nullable=False, index=True)
     client_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     invoice_url = db.Column(db.String(255), nullable=False)
     issued_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -139,3 +284,125 @@ class Invoice(db.Model, SerializerMixin):
 
     def __repr__(self):
         return f'<Invoice {self.id} for Booking {self.booking.id}, URL: {self.invoice_url}>'
+
+
+class WaitlistEntry(db.Model, SerializerMixin):
+    __tablename__ = 'waitlist_entries'
+    __table_args__ = (
+        # Matching a freed slot is a range scan on (space, waiting, start)
+        db.Index('ix_waitlist_entries_space_status_start', 'space_id', 'status', 'start_datetime'),
+    )
+
+    serialize_only = ('id', 'space_id', 'client_id', 'start_datetime', 'end_datetime', 'status',
+                      'booking_id', 'created_at', 'offered_at')
+
+    id = db.Column(db.Integer, primary_key=True)
+    space_id = db.Column(db.Integer, db.ForeignKey('spaces.id', ondelete="CASCADE"), nullable=False)
+    client_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    start_datetime = db.Column(db.DateTime, nullable=False)
+    end_datetime = db.Column(db.DateTime, nullable=False)
+    status = db.Column(db.Enum('waiting', 'offered', 'cancelled', name='waitlist_status'),
+                       nullable=False, default='waiting')
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    offered_at = db.Column(db.DateTime)
+
+    # Relationships
+    space = db.relationship('Space')
+    client = db.relationship('User')
+    booking = db.relationship('Booking')
+
+    def __repr__(self):
+        return f'<WaitlistEntry {self.id} for Space {self.space_id}, Status: {self.status}>'
+
+
+class Job(db.Model, SerializerMixin):
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        # Workers look for the oldest due job in a queue
+        db.Index('ix_jobs_queue_status_run_at', 'queue', 'status', 'run_at'),
+    )
+
+    serialize_only = ('id', 'queue', 'name', 'status', 'attempts', 'max_attempts', 'run_at',
+                      'last_error', 'created_at', 'finished_at')
+
+    id = db.Column(db.Integer, primary_key=True)
+    queue = db.Column(db.String(50), nullable=False, default='default')
+    name = db.Column(db.String(100), nullable=False)
+    payload = db.Column(db.Text, nullable=False, default='{}')  # JSON keyword arguments
+    status = db.Column(db.Enum('queued', 'running', 'done', 'failed', name='job_status'),
+                       nullable=False, default='queued')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.name}, Status: {self.status}>'
+
+
+class Review(db.Model, SerializerMixin):
+    __tablename__ = 'reviews'
+    __table_args__ = (
+        db.CheckConstraint('rating BETWEEN 1 AND 5', name='ck_reviews_rating'),
+        # A space's reviews, newest first
+        db.Index('ix_reviews_space_id', 'space_id', 'id'),
+    )
+
+    serialize_only = ('id', 'booking_id', 'space_id', 'client_id', 'rating', 'comment', 'created_at', 'updated_at')
+
+    id = db.Column(db.Integer, primary_key=True)
+    # Cleared when the booking is archived; the review stays with the space
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id'), unique=True)
+    space_id = db.Column(db.Integer, db.ForeignKey('spaces.id', ondelete="CASCADE"), nullable=False)
+    client_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    rating = db.Column(db.Integer, nullable=False)
+    comment = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Review {self.id} of Space {self.space_id}: {self.rating}>'
+
+
+class CatalogueState(db.Model):
+    """Stamp shards followed by the catalogue snapshot and by autocomplete (see catalogue.py)."""
+    __tablename__ = 'catalogue_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    stamp = db.Column(db.String(32), nullable=False)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_tokens'
+
+    id = db.Column(db.Integer, primary_key=True)
+    jti = db.Column(db.String(36), unique=True, nullable=False)
+    token_type = db.Column(db.String(10), nullable=False)
+    user_id = db.Column(db.Integer)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<RevokedToken {self.jti}>'
+
+
+def _archive_table(name, source, indexed=()):
+    # Cold copy of a hot table: same columns, no foreign keys (archived rows
+    # are never joined on the hot path and may outlive what they point at).
+    columns = [
+        db.Column(c.name, c.type.copy(), primary_key=c.primary_key, nullable=c.nullable,
+                  index=c.name in indexed)
+        for c in source.columns
+    ]
+    return db.Table(name, *columns, db.Column('archived_at', db.DateTime, nullable=False, default=datetime.utcnow))
+
+
+bookings_archive = _archive_table('bookings_archive', Booking.__table__, indexed=('client_id', 'space_id'))
+payments_archive = _archive_table('payments_archive', Payment.__table__, indexed=('booking_id',))
+invoices_archive = _archive_table('invoices_archive', Invoice.__table__, indexed=('booking_id',))
@@ -0,0 +1,177 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, jsonify, request
+
+
+# Token-bucket rate limiting.
+#
+# Each limited route names a scope ("login", "register", ...) and gets a bucket
+# per client IP and, optionally, per account (e.g. the email being logged
+# into). A limit "N/period" is a bucket holding N tokens that refills at N per
+# period; every request takes one token from each of its buckets, and only
+# when all of them have one, so a request the account bucket rejects doesn't
+# use up the IP's allowance. The client IP is request.remote_addr, which
+# create_app rewrites from X-Forwarded-For behind PROXY_FIX_X_FOR proxies. Buckets live in memory (per worker)
+# or in Redis (shared by every worker and host), chosen by
+# RATELIMIT_STORAGE_URL. RATELIMITS overrides a scope's limits, e.g.
+#   {"login": {"ip": "30/minute", "account": "10/minute"}}
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_limit(limit):
+    """``"10/minute"`` -> ``(capacity, tokens per second)``."""
+    count, _, period = limit.partition('/')
+    count, period = int(count), period.strip().rstrip('s')
+    if period not in PERIODS or count <= 0:
+        raise ValueError(f"Invalid rate limit {limit!r}")
+    return count, count / PERIODS[period]
+
+
+class MemoryBackend:
+    """Buckets in a process-local dict; least recently used keys are evicted."""
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated at)
+        self._lock = threading.Lock()
+
+    def take(self, buckets):
+        """
+        Take a token from each ``(key, capacity, rate)`` bucket if all have one.
+        Return 0 if allowed, else seconds until they all will.
+        """
+        now = time.monotonic()
+        with self._lock:
+            levels = []
+            for key, capacity, rate in buckets:
+                tokens, updated = self._buckets.pop(key, (capacity, now))
+                levels.append(min(capacity, tokens + (now - updated) * rate))
+            wait = max([(1 - tokens) / rate for tokens, (_, _, rate) in zip(levels, buckets) if tokens < 1],
+                       default=0.0)
+            for tokens, (key, _, _) in zip(levels, buckets):
+                self._buckets[key] = (tokens if wait else tokens - 1, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# Read, refill, take and write back every bucket in one atomic step on the
+# Redis server, using its clock so workers on different hosts agree. ARGV
+# holds capacity and rate for each key in turn. Keys expire once their bucket
+# would be full again.
+TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local state = redis.call('HMGET', key, 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    if tokens < 1 then
+        wait = math.max(wait, (1 - tokens) / rate)
+    end
+    levels[i] = tokens
+end
+for i, key in ipairs(KEYS) do
+    local capacity = tonumber(ARGV[2 * i - 1])
+    local rate = tonumber(ARGV[2 * i])
+    local tokens = levels[i]
+    if wait == 0 then
+        tokens = tokens - 1
+    end
+    redis.call('HSET', key, 'tokens', tostring(tokens), 'updated', tostring(now))
+    redis.call('PEXPIRE', key, math.ceil((capacity - tokens) / rate * 1000) + 1000)
+end
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """Buckets shared through Redis (or anything speaking its protocol and Lua)."""
+
+    def __init__(self, client):
+        self.client = client
+        self._take = client.register_script(TAKE_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url):
+        import redis  # only imported when a shared store is configured
+        return cls(redis.Redis.from_url(url))
+
+    def take(self, buckets):
+        return float(self._take(keys=[key for key, _, _ in buckets],
+                                args=[value for _, capacity, rate in buckets for value in (capacity, rate)]))
+
+
+def backend_from_url(url):
+    if not url or url.startswith('memory://'):
+        return MemoryBackend()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisBackend.from_url(url)
+    raise ValueError(f"Unsupported RATELIMIT_STORAGE_URL {url!r}")
+
+
+def json_field(name):
+    """Account key taken from a field of the JSON body (e.g. the login email)."""
+    def key():
+        body = request.get_json(silent=True)
+        value = body.get(name) if isinstance(body, dict) else None
+        return str(value).strip().lower() if value else None
+    return key
+
+
+class RateLimiter:
+    """Flask extension; decorate views with ``limiter.limit(...)``."""
+
+    def init_app(self, app):
+        app.config.setdefault('RATELIMIT_ENABLED', True)
+        app.config.setdefault('RATELIMIT_STORAGE_URL', 'memory://')
+        app.config.setdefault('RATELIMITS', {})
+        app.extensions['ratelimit'] = backend_from_url(app.config['RATELIMIT_STORAGE_URL'])
+
+    def limit(self, scope, ip=None, account=None, account_key=None):
+        """
+        Limit a view per client IP and/or per account. ``account_key`` returns
+        the account for the current request (None skips the account bucket).
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                config = current_app.config
+                if config['RATELIMIT_ENABLED']:
+                    limits = {'ip': ip, 'account': account, **config['RATELIMITS'].get(scope, {})}
+                    wait = self._check(scope, limits, account_key)
+                    if wait:
+                        response = jsonify({"error": "Too many requests, try again later"})
+                        response.headers['Retry-After'] = str(max(1, math.ceil(wait)))
+                        return response, 429
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def _check(scope, limits, account_key):
+        backend = current_app.extensions['ratelimit']
+        buckets = []
+        if limits.get('ip'):
+            buckets.append((f"rl:{scope}:ip:{request.remote_addr}", *parse_limit(limits['ip'])))
+        if limits.get('account') and account_key:
+            name = account_key()
+            if name:
+                buckets.append((f"rl:{scope}:account:{name}", *parse_limit(limits['account'])))
+        if not buckets:
+            return 0
+        try:
+            return backend.take(buckets)
+        except Exception:
+            # A shared store outage shouldn't take logins down with it
+            current_app.logger.warning("Rate limit store unavailable; allowing request", exc_info=True)
+            return 0
@@ -0,0 +1,270 @@
+import os
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+import numpy as np
+from flask import current_app
+from sqlalchemy import func, select
+from extensions import db
+from models import Amenity, Space, parse_amenities
+
+
+# "Similar spaces" for GET /api/spaces/<id>/similar.
+#
+# Each available space becomes one row of a float32 matrix: TF-IDF weights
+# over title (counted twice), description and amenity tokens, hashed into
+# RECOMMEND_DIMENSIONS columns (so rows stay small whatever the vocabulary,
+# about 1 KB each at the default 256), plus standardized log capacity and log
+# hourly price. Rows are L2-normalized, so one matrix-vector product scores
+# the whole catalogue by cosine similarity, and argpartition picks the top k.
+#
+# An index is never modified once built: changes produce a new one, which
+# replaces the old with a single assignment, so requests always read a
+# consistent index without locking. `flask recommendations build` fits the
+# IDF weights and numeric scaling and saves the index to
+# RECOMMEND_INDEX_PATH. Workers load that file, or fit in-process when it is
+# missing, in a background thread; until the first index is ready, requests
+# get spaces in the same location closest in capacity from the database.
+# Every RECOMMEND_REFRESH_SECONDS the thread re-vectorizes the spaces updated
+# since the last refresh, in one batch, and drops spaces that became
+# unavailable. After changes to more than REFIT_FRACTION of the catalogue, it
+# refits from scratch so the weights keep up.
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has have in is it its of on or our the this to with your you'.split())
+NUMERIC_WEIGHT = 0.35  # share of capacity/price against the text features
+LOOKBACK = timedelta(seconds=30)  # re-read recent updates to cover commit delays and clock skew
+REFIT_FRACTION = 0.2
+BATCH_SIZE = 4096  # spaces vectorized at a time, bounding the float64 scratch matrix
+
+
+def tokens(space):
+    words = [w for w in TOKEN_RE.findall(f"{space.title} {space.title} {space.description}".lower())
+             if len(w) > 1 and w not in STOPWORDS]
+    words += ['amenity:' + Amenity.normalize(name) for name in parse_amenities(space.amenities)]
+    return Counter(words)
+
+
+@lru_cache(maxsize=65536)
+def _bucket(token, dimensions):
+    # Column and sign of ``token``; the sign keeps colliding tokens from only ever adding up
+    h = zlib.crc32(token.encode())
+    return h % dimensions, 1.0 if h & 0x80000000 else -1.0
+
+
+def _numeric(spaces):
+    return np.array([[np.log1p(max(s.capacity or 0, 0)), np.log1p(max(s.price_per_hour or 0, 0))] for s in spaces],
+                    dtype=np.float64).reshape(len(spaces), 2)
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+class SimilarityIndex:
+    """Fitted weights plus one normalized row per indexed space. Treat as read-only."""
+
+    def __init__(self, idf, numeric_mean, numeric_std, ids, matrix, built_at, changed=frozenset()):
+        self.idf = idf
+        self.numeric_mean = numeric_mean
+        self.numeric_std = numeric_std
+        self.ids = ids
+        self.matrix = matrix
+        self.built_at = built_at
+        self.changed = changed  # ids re-indexed or removed since the weights were fitted
+        self._rows = {int(space_id): row for row, space_id in enumerate(ids)}
+
+    @property
+    def dimensions(self):
+        return len(self.idf)
+
+    @classmethod
+    def fit(cls, spaces, dimensions=256, built_at=None):
+        spaces = [s for s in spaces if s.is_available]
+        counts = [tokens(s) for s in spaces]
+        df = np.zeros(dimensions, dtype=np.float64)
+        for c in counts:
+            df[list({_bucket(token, dimensions)[0] for token in c})] += 1
+        idf = np.log((1 + len(spaces)) / (1 + df)) + 1
+        numeric = _numeric(spaces)
+        mean = numeric.mean(axis=0) if len(spaces) else np.zeros(2)
+        std = numeric.std(axis=0) if len(spaces) else np.ones(2)
+        std[std == 0] = 1
+        built_at = built_at or datetime.utcnow()
+        fitted = cls(idf, mean, std, np.empty(0, dtype=np.int64), np.empty((0, dimensions + 2), dtype=np.float32),
+                     built_at)
+        return cls(idf, mean, std, np.array([s.id for s in spaces], dtype=np.int64),
+                   fitted.vectorize(spaces, counts), built_at)
+
+    def vectorize(self, spaces, counts=None):
+        counts = counts or [tokens(s) for s in spaces]
+        out = np.empty((len(spaces), self.dimensions + 2), dtype=np.float32)
+        for start in range(0, len(spaces), BATCH_SIZE):
+            batch = spaces[start:start + BATCH_SIZE]
+            text = np.zeros((len(batch), self.dimensions), dtype=np.float64)
+            for row, c in enumerate(counts[start:start + BATCH_SIZE]):
+                for token, n in c.items():
+                    column, sign = _bucket(token, self.dimensions)
+                    text[row, column] += sign * (1 + np.log(n))  # sublinear term frequency
+            text = _normalize(text * self.idf)
+            numeric = (_numeric(batch) - self.numeric_mean) / self.numeric_std * (NUMERIC_WEIGHT / np.sqrt(2))
+            out[start:start + len(batch)] = _normalize(np.hstack([text * (1 - NUMERIC_WEIGHT), numeric]))
+        return out
+
+    def with_changes(self, spaces, built_at=None):
+        """A new index with ``spaces`` re-vectorized and unavailable ones dropped; this one is unchanged."""
+        changed = {s.id for s in spaces}
+        spaces = [s for s in spaces if s.is_available]
+        keep = ~np.isin(self.ids, list(changed))
+        ids = np.concatenate([self.ids[keep], np.array([s.id for s in spaces], dtype=np.int64)])
+        matrix = np.vstack([self.matrix[keep], self.vectorize(spaces)])
+        return SimilarityIndex(self.idf, self.numeric_mean, self.numeric_std, ids, matrix,
+                               built_at or self.built_at, self.changed | changed)
+
+    def similar(self, space, k):
+        """``[(space_id, score)]`` of the ``k`` spaces most similar to ``space``, best first."""
+        row = self._rows.get(space.id)
+        vector = self.matrix[row] if row is not None else self.vectorize([space])[0]
+        scores = self.matrix @ vector
+        if row is not None:
+            scores[row] = -np.inf
+        k = min(k, len(scores) - (row is not None))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((self.ids[top], -scores[top]))]
+        return [(int(self.ids[i]), float(scores[i])) for i in top]
+
+    def save(self, path):
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, idf=self.idf, numeric_mean=self.numeric_mean, numeric_std=self.numeric_std, ids=self.ids,
+                 matrix=self.matrix, built_at=np.array(self.built_at.isoformat()))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['idf'], data['numeric_mean'], data['numeric_std'], data['ids'], data['matrix'],
+                       datetime.fromisoformat(str(data['built_at'])))
+
+
+def _spaces(updated_after=None):
+    query = select(Space)
+    if updated_after is None:
+        query = query.where(Space.is_available.is_(True))
+    else:
+        query = query.where(Space.updated_at > updated_after)
+    return db.session.execute(query.order_by(Space.id)).scalars().all()
+
+
+def build(dimensions=256):
+    """Fit an index over every available space."""
+    built_at = datetime.utcnow()
+    return SimilarityIndex.fit(_spaces(), dimensions, built_at)
+
+
+class Recommender:
+    """A worker's index, loaded or fitted and then refreshed by a background thread."""
+
+    def __init__(self, path=None, refresh_interval=60.0, dimensions=256):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.dimensions = dimensions
+        self._index = None
+        self._loaded_mtime = None
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+        self._refresher = None
+
+    def index(self):
+        """The current index, or None until the first one is ready. Starts a refresh when one is due."""
+        if time.monotonic() >= self._next_refresh:
+            self._start_refresh()
+        return self._index
+
+    def join(self, timeout=None):
+        """Wait for a refresh in progress (for the CLI and tests)."""
+        refresher = self._refresher
+        if refresher is not None:
+            refresher.join(timeout)
+
+    def _start_refresh(self):
+        with self._lock:
+            if time.monotonic() < self._next_refresh or (self._refresher is not None and self._refresher.is_alive()):
+                return
+            self._next_refresh = time.monotonic() + self.refresh_interval
+            self._refresher = threading.Thread(target=self._refresh, args=(current_app._get_current_object(),),
+                                               name='recommendations-refresh', daemon=True)
+            self._refresher.start()
+
+    def _refresh(self, app):
+        with app.app_context():
+            try:
+                self._index = self._refreshed(self._load() or self._index)
+            except Exception:
+                app.logger.warning("Recommendation index refresh failed", exc_info=True)
+            finally:
+                db.session.remove()
+
+    def _refreshed(self, index):
+        if index is None:
+            return build(self.dimensions)
+        refreshed_at = datetime.utcnow()
+        changed = _spaces(index.built_at - LOOKBACK)
+        if len(index.changed.union(s.id for s in changed)) > max(50, REFIT_FRACTION * len(index.ids)):
+            return build(self.dimensions)
+        if not changed:
+            return index
+        return index.with_changes(changed, refreshed_at)
+
+    def _load(self):
+        # A file rebuilt by `flask recommendations build` replaces the in-memory index
+        if not self.path:
+            return None
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return None
+        if mtime == self._loaded_mtime:
+            return None
+        self._loaded_mtime = mtime
+        try:
+            return SimilarityIndex.load(self.path)
+        except (OSError, KeyError, ValueError):
+            # e.g. written by an older version; keep the current index until the file is rebuilt
+            current_app.logger.warning("Ignoring unreadable recommendation index %s", self.path, exc_info=True)
+            return None
+
+
+def from_database(space, k):
+    """Stand-in ranking while no index is ready: available spaces in the same location, closest in capacity."""
+    space_ids = db.session.execute(
+        select(Space.id)
+        .where(Space.is_available == True, Space.id != space.id, Space.location == space.location)
+        .order_by(func.abs(Space.capacity - (space.capacity or 0)), Space.id).limit(k)
+    ).scalars().all()
+    return [(space_id, None) for space_id in space_ids]
+
+
+def similar_to(space, k):
+    """``[(space_id, score)]``, best first; scores are None when answered from the database."""
+    index = current_app.extensions['recommendations'].index()
+    if index is None:
+        return from_database(space, k)
+    return index.similar(space, k)
+
+
+def init_app(app):
+    app.config.setdefault('RECOMMEND_INDEX_PATH', None)
+    app.config.setdefault('RECOMMEND_REFRESH_SECONDS', 60.0)
+    app.config.setdefault('RECOMMEND_DIMENSIONS', 256)
+    app.extensions['recommendations'] = Recommender(
+        app.config['RECOMMEND_INDEX_PATH'], app.config['RECOMMEND_REFRESH_SECONDS'],
+        app.config['RECOMMEND_DIMENSIONS'])
@@ -0,0 +1,211 @@
+import calendar
+from collections import namedtuple
+from datetime import datetime, timedelta
+from sqlalchemy import insert, select
+from extensions import db
+import events
+from models import Booking, BookingSeries
+from waitlist import ACTIVE_STATUSES, IntervalSet
+
+
+# Recurring bookings.
+#
+# A BookingSeries stores an RRULE-style pattern and its first occurrence.
+# Occurrences are generated lazily and only written to bookings up to a
+# horizon (RECURRING_HORIZON_DAYS ahead), and at most
+# RECURRING_MAX_OCCURRENCES at a time. `flask recurring extend` moves the
+# horizon forward, so an open-ended series never creates unbounded rows. Each
+# batch of occurrences is checked against the space's active bookings with one
+# range query, priced once per distinct length, and inserted with one
+# executemany.
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY')
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+
+Rule = namedtuple('Rule', 'freq interval count until byday')
+
+
+def parse_rrule(text):
+    """
+    Parse the supported RRULE subset, e.g. ``FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE;COUNT=10``:
+    FREQ (DAILY/WEEKLY/MONTHLY), INTERVAL, COUNT, UNTIL (YYYYMMDD[THHMMSS[Z]])
+    and BYDAY (weekly rules only). Raises ValueError on anything else.
+    """
+    parts = {}
+    for part in (text or '').upper().removeprefix('RRULE:').split(';'):
+        key, sep, value = part.partition('=')
+        if not sep or not value:
+            raise ValueError(f"Malformed RRULE part {part!r}")
+        parts[key.strip()] = value.strip()
+
+    freq = parts.pop('FREQ', None)
+    if freq not in FREQUENCIES:
+        raise ValueError(f"FREQ must be one of {', '.join(FREQUENCIES)}")
+    try:
+        interval = int(parts.pop('INTERVAL', 1))
+        count = int(parts['COUNT']) if 'COUNT' in parts else None
+    except ValueError:
+        raise ValueError("INTERVAL and COUNT must be integers")
+    parts.pop('COUNT', None)
+    if interval < 1 or (count is not None and count < 1):
+        raise ValueError("INTERVAL and COUNT must be positive")
+
+    until = parts.pop('UNTIL', None)
+    if until is not None:
+        until = _parse_until(until)
+    if count is not None and until is not None:
+        raise ValueError("COUNT and UNTIL are mutually exclusive")
+
+    byday = parts.pop('BYDAY', None)
+    if byday is not None:
+        if freq != 'WEEKLY':
+            raise ValueError("BYDAY is only supported with FREQ=WEEKLY")
+        try:
+            byday = tuple(sorted({WEEKDAYS.index(day) for day in byday.split(',')}))
+        except ValueError:
+            raise ValueError(f"BYDAY days must be among {','.join(WEEKDAYS)}")
+
+    if parts:
+        raise ValueError(f"Unsupported RRULE parts: {', '.join(sorted(parts))}")
+    return Rule(freq, interval, count, until, byday)
+
+
+def _parse_until(value):
+    for fmt in ('%Y%m%dT%H%M%SZ', '%Y%m%dT%H%M%S', '%Y%m%d'):
+        try:
+            until = datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+        # A bare date includes the whole day
+        return until + timedelta(days=1) - timedelta(microseconds=1) if fmt == '%Y%m%d' else until
+    raise ValueError("UNTIL must be YYYYMMDD or YYYYMMDDTHHMMSS[Z]")
+
+
+def occurrences(rule, start):
+    """Lazily yield occurrence start times, beginning with ``start``."""
+    emitted = 0
+    for candidate in _candidates(rule, start):
+        if rule.until is not None and candidate > rule.until:
+            return
+        yield candidate
+        emitted += 1
+        if rule.count is not None and emitted >= rule.count:
+            return
+
+
+def _candidates(rule, start):
+    step = 0
+    try:
+        while True:
+            if rule.freq == 'DAILY':
+                yield start + timedelta(days=step * rule.interval)
+            elif rule.freq == 'WEEKLY':
+                week = start - timedelta(days=start.weekday()) + timedelta(weeks=step * rule.interval)
+                for weekday in rule.byday or (start.weekday(),):
+                    candidate = week + timedelta(days=weekday)
+                    if candidate >= start:
+                        yield candidate
+            else:
+                year, month = divmod(start.month - 1 + step * rule.interval, 12)
+                year += start.year
+                # Months without the start's day of month are skipped, as in RFC 5545
+                if start.day <= calendar.monthrange(year, month + 1)[1]:
+                    yield start.replace(year=year, month=month + 1)
+            step += 1
+    except (OverflowError, ValueError):
+        return  # stepped past datetime.max (year 9999): a huge INTERVAL ends the series
+
+
+def pending_occurrences(series, until, limit=None):
+    """
+    ``(slots, until)``: ``(start, end)`` of the series' occurrences not yet
+    materialized that start before ``until``. With more than ``limit`` of
+    them, only the first ``limit`` are returned and ``until`` is pulled back
+    to the next one's start, so a later extend picks up from there.
+    """
+    length = series.end_datetime - series.start_datetime
+    done = series.materialized_until
+    slots = []
+    for start in occurrences(parse_rrule(series.rrule), series.start_datetime):
+        if start >= until:
+            break
+        if done is None or start >= done:
+            if limit is not None and len(slots) >= limit:
+                return slots, start
+            slots.append((start, start + length))
+    return slots, until
+
+
+def split_conflicts(space_id, slots):
+    """
+    Split ``slots`` into (free, conflicting) against the space's pending and
+    confirmed bookings, using one query over the slots' overall time range.
+    Slots that overlap an earlier slot of the same batch also conflict.
+    """
+    if not slots:
+        return [], []
+    taken = IntervalSet(db.session.execute(
+        select(Booking.start_datetime, Booking.end_datetime).where(
+            Booking.space_id == space_id, Booking.status.in_(ACTIVE_STATUSES),
+            Booking.start_datetime < max(end for _, end in slots),
+            Booking.end_datetime > min(start for start, _ in slots),
+        )
+    ).all())
+    free, conflicts = [], []
+    for start, end in slots:
+        if taken.overlaps(start, end):
+            conflicts.append((start, end))
+        else:
+            taken.add(start, end)
+            free.append((start, end))
+    return free, conflicts
+
+
+def price_slots(space, slots):
+    """``(duration_hours, total_price)`` per slot, as Booking.calculate_total_price would compute it."""
+    priced = {}
+    for start, end in slots:
+        length = end - start
+        if length not in priced:
+            hours = int(length.total_seconds() / 3600)
+            priced[length] = (hours, round(space.price_per_hour * hours, 2))
+    return [priced[end - start] for start, end in slots]
+
+
+def materialize(series, space, slots, until):
+    """Insert pending bookings for ``slots`` and move the series' horizon to ``until``."""
+    if slots:
+        now = datetime.utcnow()
+        db.session.execute(insert(Booking), [
+            {'client_id': series.client_id, 'space_id': space.id, 'series_id': series.id,
+             'start_datetime': start, 'end_datetime': end, 'duration_hours': hours,
+             'total_price': price, 'status': 'pending', 'created_at': now, 'updated_at': now}
+            for (start, end), (hours, price) in zip(slots, price_slots(space, slots))
+        ])
+        # Bulk inserts skip the flush hooks, so announce the batch as one event
+        events.notify(db.session, {events.user_topic(series.client_id), events.space_topic(space.id)}, {
+            'type': 'series', 'id': series.id, 'space_id': space.id, 'status': series.status,
+            'bookings_created': len(slots)})
+    series.materialized_until = until
+    return len(slots)
+
+
+def extend_series(horizon_days, now=None, limit=None):
+    """
+    Materialize every active series up to ``horizon_days`` from now, at most
+    ``limit`` occurrences per series, skipping occurrences that conflict.
+    Returns (bookings created, conflicts skipped).
+    """
+    until = (now or datetime.utcnow()) + timedelta(days=horizon_days)
+    created = skipped = 0
+    series_list = BookingSeries.query.filter(
+        BookingSeries.status == 'active',
+        db.or_(BookingSeries.materialized_until.is_(None), BookingSeries.materialized_until < until),
+    ).all()
+    for series in series_list:
+        slots, reached = pending_occurrences(series, until, limit)
+        free, conflicts = split_conflicts(series.space_id, slots)
+        created += materialize(series, series.space, free, reached)
+        skipped += len(conflicts)
+        db.session.commit()
+    return created, skipped
@@ -0,0 +1,70 @@
+from datetime import datetime
+from sqlalchemy import case, select, update
+from extensions import db
+from models import Review, Space
+import catalogue
+
+
+# Space ratings.
+#
+# Clients review their own confirmed bookings once they have ended, one
+# review per booking. spaces.avg_rating and review_count are adjusted by
+# every review write in a single UPDATE computed from the row's current
+# values, so concurrent reviews of one space never lose an update and
+# listings sort and filter on plain indexed columns instead of running AVG().
+# Edits and deletions take the old rating from the review row, locked until
+# commit, rather than from the copy loaded into the session, which a
+# concurrent edit may have changed since.
+
+
+def completed(booking, now=None):
+    return booking.status == 'confirmed' and booking.end_datetime <= (now or datetime.utcnow())
+
+
+def _adjust(space_id, count_delta, rating_delta):
+    count = Space.review_count + count_delta
+    total = Space.avg_rating * Space.review_count + rating_delta
+    db.session.execute(
+        update(Space).where(Space.id == space_id)
+        .values(review_count=count, avg_rating=case((count > 0, total / count), else_=0))
+        .execution_options(synchronize_session='fetch')
+    )
+    # Core UPDATEs skip the flush hooks that keep the snapshot current
+    catalogue.mark_changed(db.session, space_id, searched=False)
+
+
+def add_review(booking, rating, comment=None):
+    review = Review(booking_id=booking.id, space_id=booking.space_id, client_id=booking.client_id,
+                    rating=rating, comment=comment)
+    db.session.add(review)
+    db.session.flush()  # a duplicate fails here, before the space is touched
+    _adjust(booking.space_id, 1, rating)
+    return review
+
+
+def _locked_rating(review):
+    # None when the review has been deleted meanwhile
+    return db.session.execute(
+        select(Review.rating).where(Review.id == review.id).with_for_update()
+    ).scalar_one_or_none()
+
+
+def change_rating(review, rating):
+    """Set ``review``'s rating; False if it no longer exists."""
+    old = _locked_rating(review)
+    if old is None:
+        return False
+    if rating != old:
+        _adjust(review.space_id, 0, rating - old)
+    review.rating = rating
+    return True
+
+
+def remove_review(review):
+    """Delete ``review``; False if it no longer exists."""
+    old = _locked_rating(review)
+    if old is None:
+        return False
+    _adjust(review.space_id, -1, -old)
+    db.session.delete(review)
+    return True
@@ -0,0 +1,158 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, insert, select
+from extensions import db
+from models import RevokedToken
+
+
+# JWT revocation without a lookup per request.
+#
+# Revoked token ids (JTIs) are written to a shared store: the revoked_tokens
+# table, or Redis when JWT_REVOCATION_STORE_URL is set. Every worker keeps the
+# unexpired ones in a local dict and checks tokens against that, pulling new
+# revocations from the store at most every JWT_REVOCATION_SYNC_SECONDS. A
+# worker sees its own revocations immediately and other workers' within one
+# sync interval. Entries leave the dict (and the store) once the token would
+# have expired anyway, so it never holds more than one token lifetime of
+# logouts.
+
+LOOKBACK = timedelta(seconds=30)  # re-read recent rows to cover commit delays and clock skew
+PRUNE_INTERVAL = 60.0
+PURGE_INTERVAL = 3600.0
+
+
+class DatabaseStore:
+    """Revocations in the revoked_tokens table, read over the primary engine."""
+
+    table = RevokedToken.__table__
+
+    def add(self, jti, token_type, user_id, expires_at):
+        with db.engine.begin() as conn:
+            conn.execute(insert(self.table).values(
+                jti=jti, token_type=token_type, user_id=user_id,
+                expires_at=expires_at, revoked_at=datetime.utcnow()))
+
+    def since(self, revoked_after, now):
+        """``(jti, expires_at)`` revoked after ``revoked_after`` (all if None) and not yet expired."""
+        query = select(self.table.c.jti, self.table.c.expires_at).where(self.table.c.expires_at > now)
+        if revoked_after is not None:
+            query = query.where(self.table.c.revoked_at > revoked_after)
+        with db.engine.connect() as conn:
+            return conn.execute(query).all()
+
+    def purge(self, now):
+        with db.engine.begin() as conn:
+            conn.execute(delete(self.table).where(self.table.c.expires_at <= now))
+
+
+class RedisStore:
+    """Revocations in a Redis sorted set, scored by revocation time."""
+
+    key = 'jwt:revoked'
+
+    def __init__(self, client, max_lifetime):
+        self.client = client
+        self.max_lifetime = max_lifetime
+
+    @classmethod
+    def from_url(cls, url, max_lifetime):
+        import redis  # only imported when a shared store is configured
+        return cls(redis.Redis.from_url(url), max_lifetime)
+
+    def add(self, jti, token_type, user_id, expires_at):
+        self.client.zadd(self.key, {f"{jti}|{expires_at.timestamp()}": datetime.utcnow().timestamp()})
+
+    def since(self, revoked_after, now):
+        low = revoked_after.timestamp() if revoked_after is not None else '-inf'
+        entries = []
+        for member in self.client.zrangebyscore(self.key, low, '+inf'):
+            jti, _, expires = member.decode().partition('|')
+            expires_at = datetime.utcfromtimestamp(float(expires))
+            if expires_at > now:
+                entries.append((jti, expires_at))
+        return entries
+
+    def purge(self, now):
+        # Anything revoked longer ago than the longest token lifetime has expired
+        self.client.zremrangebyscore(self.key, '-inf', (now - self.max_lifetime).timestamp())
+
+
+class RevocationList:
+    """A worker's local view of the revoked JTIs, kept in sync with a shared store."""
+
+    def __init__(self, store, sync_interval=1.0):
+        self.store = store
+        self.sync_interval = sync_interval
+        self._revoked = {}  # jti -> expires_at
+        self._synced_at = None
+        self._next_sync = self._next_prune = self._next_purge = 0.0
+        self._lock = threading.Lock()
+
+    def revoke(self, jti, token_type, user_id, expires_at):
+        self.store.add(jti, token_type, user_id, expires_at)
+        self._revoked[jti] = expires_at
+
+    def is_revoked(self, jti):
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        return jti in self._revoked
+
+    def sync(self):
+        # One thread refreshes; the others carry on with the current view
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            now, tick = datetime.utcnow(), time.monotonic()
+            revoked_after = self._synced_at - LOOKBACK if self._synced_at else None
+            try:
+                for jti, expires_at in self.store.since(revoked_after, now):
+                    self._revoked[jti] = expires_at
+                self._synced_at = now
+                if tick >= self._next_purge:
+                    self.store.purge(now)
+                    self._next_purge = tick + PURGE_INTERVAL
+            except Exception:
+                current_app.logger.warning("Token revocation store unavailable", exc_info=True)
+            if tick >= self._next_prune:
+                self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+                self._next_prune = tick + PRUNE_INTERVAL
+            self._next_sync = tick + self.sync_interval
+        finally:
+            self._lock.release()
+
+
+def store_from_url(url, max_lifetime):
+    if not url or url.startswith('database://'):
+        return DatabaseStore()
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        return RedisStore.from_url(url, max_lifetime)
+    raise ValueError(f"Unsupported JWT_REVOCATION_STORE_URL {url!r}")
+
+
+def revoke_token(payload):
+    """Revoke a decoded JWT (e.g. get_jwt()) until it expires."""
+    current_app.extensions['revocation'].revoke(
+        payload['jti'], payload.get('type', 'access'), _user_id(payload['sub']),
+        datetime.utcfromtimestamp(payload['exp']))
+
+
+def _user_id(subject):
+    try:
+        return int(subject)
+    except (TypeError, ValueError):
+        return None
+
+
+def init_app(app, jwt):
+    app.config.setdefault('JWT_REVOCATION_STORE_URL', 'database://')
+    app.config.setdefault('JWT_REVOCATION_SYNC_SECONDS', 1.0)
+    max_lifetime = max(app.config['JWT_ACCESS_TOKEN_EXPIRES'], app.config['JWT_REFRESH_TOKEN_EXPIRES'])
+    revoked = RevocationList(store_from_url(app.config['JWT_REVOCATION_STORE_URL'], max_lifetime),
+                             sync_interval=app.config['JWT_REVOCATION_SYNC_SECONDS'])
+    app.extensions['revocation'] = revoked
+
+    @jwt.token_in_blocklist_loader
+    def _is_revoked(jwt_header, jwt_payload):
+        return revoked.is_revoked(jwt_payload['jti'])
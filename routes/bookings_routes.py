@@ -1,13 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Booking, Space, User
-from datetime import datetime
+from models import db, Booking, BookingSeries, Space, User, WaitlistEntry
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import tuple_
+from sqlalchemy.orm import joinedload
+from db_routing import read_replica, write_path
+from validation import validate_json
+import archive
+import recurrence
+import schemas
+import waitlist
 
 bookings_bp = Blueprint('bookings', __name__)
 
 # ✅ Create Booking (Client Only)
 @bookings_bp.route('/bookings', methods=['POST'])
+@write_path
 @jwt_required()
+@validate_json(schemas.BOOKING_CREATE)
 def create_booking():
     """
     Create a new booking (client)
@@ -18,16 +28,13 @@ def create_booking():
     if not user or user.role != 'client':
         return jsonify({"error": "Only clients can create bookings"}), 403
 
-    data = request.get_json() or {}
-    space = Space.query.get(data.get("space_id"))
+    data = request.get_json()
+    space = Space.query.get(data["space_id"])
     if not space:
         return jsonify({"error": "Space not found"}), 404
 
-    try:
-        start_datetime = datetime.fromisoformat(data.get('start_datetime'))
-        end_datetime = datetime.fromisoformat(data.get('end_datetime'))
-    except (ValueError, TypeError):
-        return jsonify({"error": "Invalid date format"}), 400
+    start_datetime = datetime.fromisoformat(data['start_datetime'])
+    end_datetime = datetime.fromisoformat(data['end_datetime'])
 
     if start_datetime >= end_datetime:
         return jsonify({"error": "End time must be after start time"}), 400
@@ -42,6 +49,10 @@ def create_booking():
 
     # Calculate duration & total price
     new_booking.space = space
+    # Known relationships, so to_dict() after commit doesn't lazy-load them
+    new_booking.client = user
+    new_booking.payments = []
+    new_booking.invoice = None
     new_booking.calculate_duration()
     new_booking.calculate_total_price()
 
@@ -54,31 +65,229 @@ def create_booking():
     }), 201
 
 
+# ✅ Create Recurring Booking (Client Only)
+@bookings_bp.route('/bookings/recurring', methods=['POST'])
+@write_path
+@jwt_required()
+@validate_json(schemas.RECURRING_BOOKING_CREATE)
+def create_recurring_booking():
+    """
+    Create a recurring booking (client)
+    Body: space_id, start_datetime/end_datetime of the first occurrence and an
+    RRULE-style `rrule`, e.g. "FREQ=WEEKLY;BYDAY=MO,WE;COUNT=10". The first
+    occurrence can't be in the past. Occurrences are booked up to
+    RECURRING_HORIZON_DAYS ahead, at most RECURRING_MAX_OCCURRENCES of them;
+    later ones are added by `flask recurring extend`. Any conflict returns 409 unless
+    `skip_conflicts` is true.
+    """
+    identity = get_jwt_identity()
+    user = User.query.get(identity)
+
+    if not user or user.role != 'client':
+        return jsonify({"error": "Only clients can create bookings"}), 403
+
+    data = request.get_json()
+    space = Space.query.get(data["space_id"])
+    if not space:
+        return jsonify({"error": "Space not found"}), 404
+
+    # Stored and compared as naive UTC, like every other booking time
+    start_datetime = _naive_utc(datetime.fromisoformat(data['start_datetime']))
+    end_datetime = _naive_utc(datetime.fromisoformat(data['end_datetime']))
+
+    if start_datetime >= end_datetime:
+        return jsonify({"error": "End time must be after start time"}), 400
+    if start_datetime < datetime.utcnow():
+        return jsonify({"error": "The first occurrence must not be in the past"}), 400
+
+    try:
+        recurrence.parse_rrule(data['rrule'])
+    except ValueError as e:
+        return jsonify({"error": f"Invalid rrule: {e}"}), 400
+
+    series = BookingSeries(client_id=user.id, space_id=space.id, rrule=data['rrule'],
+                           start_datetime=start_datetime, end_datetime=end_datetime)
+    db.session.add(series)
+    db.session.flush()
+
+    until = datetime.utcnow() + timedelta(days=current_app.config['RECURRING_HORIZON_DAYS'])
+    slots, until = recurrence.pending_occurrences(series, until, current_app.config['RECURRING_MAX_OCCURRENCES'])
+    free, conflicts = recurrence.split_conflicts(space.id, slots)
+    if conflicts and not data.get('skip_conflicts'):
+        db.session.rollback()
+        return jsonify({
+            "error": "Some occurrences overlap existing bookings",
+            "conflicts": [{"start_datetime": s.isoformat(), "end_datetime": e.isoformat()} for s, e in conflicts],
+        }), 409
+
+    created = recurrence.materialize(series, space, free, until)
+    db.session.commit()
+
+    return jsonify({
+        "message": "Recurring booking created successfully",
+        "series": series.to_dict(),
+        "bookings_created": created,
+        "conflicts_skipped": len(conflicts),
+    }), 201
+
+
+# ✅ Cancel Recurring Booking (Client Only)
+@bookings_bp.route('/bookings/recurring/<int:id>/cancel', methods=['PATCH'])
+@write_path
+@jwt_required()
+def cancel_recurring_booking(id):
+    """
+    Cancel a recurring booking and its upcoming occurrences (client)
+    Each freed occurrence is offered to the space's waitlist.
+    """
+    identity = get_jwt_identity()
+    series = BookingSeries.query.get_or_404(id)
+
+    if str(series.client_id) != str(identity):
+        return jsonify({"error": "Unauthorized"}), 403
+    if series.status != 'active':
+        return jsonify({"error": f"Series is already {series.status}"}), 409
+
+    series.status = 'cancelled'
+    upcoming = Booking.query.filter(
+        Booking.series_id == series.id, Booking.status.in_(waitlist.ACTIVE_STATUSES),
+        Booking.start_datetime > datetime.utcnow(),
+    ).all()
+    offers = 0
+    for booking in upcoming:
+        booking.status = 'cancelled'
+        offers += len(waitlist.offer_freed_slot(series.space, booking.start_datetime, booking.end_datetime))
+    db.session.commit()
+
+    return jsonify({"message": "Recurring booking cancelled", "bookings_cancelled": len(upcoming),
+                    "waitlist_offers": offers}), 200
+
+
+def _naive_utc(value):
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+
+def _include_archived():
+    return request.args.get('include_archived', '').lower() in ('1', 'true')
+
+
+BOOKING_STATUSES = ('pending', 'confirmed', 'cancelled', 'declined')
+PAGE_PARAMS = ('limit', 'cursor', 'status', 'from', 'to', 'space_id', 'order', 'view')
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _paginated():
+    return any(param in request.args for param in PAGE_PARAMS)
+
+
+def _parse_booking_cursor(cursor):
+    # Cursor is "<start_datetime ISO>_<id>" of the last row on the previous page
+    if not cursor:
+        return None
+    start, booking_id = cursor.rsplit('_', 1)
+    return (datetime.fromisoformat(start), int(booking_id))
+
+
+SUMMARY_COLUMNS = (Booking.id, Booking.space_id, Space.title.label('space_title'), Booking.client_id,
+                   Booking.start_datetime, Booking.end_datetime, Booking.duration_hours,
+                   Booking.total_price, Booking.status)
+
+
+def _summary(row):
+    summary = row._asdict()
+    for key in ('start_datetime', 'end_datetime'):
+        summary[key] = summary[key].strftime(archive.DATETIME_FORMAT)
+    return summary
+
+
+def _booking_page(query):
+    """
+    Apply the status/from/to/space_id filters and (start_datetime, id) keyset
+    pagination to a Booking query. Returns (response body, status code).
+    """
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+        after = _parse_booking_cursor(request.args.get('cursor'))
+        start_from = datetime.fromisoformat(request.args['from']) if 'from' in request.args else None
+        start_to = datetime.fromisoformat(request.args['to']) if 'to' in request.args else None
+        space_id = int(request.args['space_id']) if 'space_id' in request.args else None
+    except ValueError:
+        return {"error": "limit, cursor, from, to and space_id must be valid"}, 400
+    statuses = [s for s in request.args.get('status', '').split(',') if s]
+    if any(s not in BOOKING_STATUSES for s in statuses):
+        return {"error": f"status must be among {', '.join(BOOKING_STATUSES)}"}, 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return {"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}, 400
+    if _include_archived():
+        return {"error": "include_archived can't be combined with pagination or filters"}, 400
+    descending = request.args.get('order', 'desc') != 'asc'
+    summary = request.args.get('view') == 'summary'
+
+    if statuses:
+        query = query.filter(Booking.status.in_(statuses))
+    if start_from is not None:
+        query = query.filter(Booking.start_datetime >= start_from)
+    if start_to is not None:
+        query = query.filter(Booking.start_datetime < start_to)
+    if space_id is not None:
+        query = query.filter(Booking.space_id == space_id)
+    if after is not None:
+        key, cursor = tuple_(Booking.start_datetime, Booking.id), tuple_(*after)
+        query = query.filter(key < cursor if descending else key > cursor)
+    order = (Booking.start_datetime.desc(), Booking.id.desc()) if descending else (Booking.start_datetime, Booking.id)
+    query = query.order_by(*order).limit(limit + 1)
+
+    if summary:
+        # Plain columns: no Booking objects, no nested client/space
+        rows = query.with_entities(*SUMMARY_COLUMNS).all()
+        page = [_summary(row) for row in rows[:limit]]
+        last = rows[limit - 1] if len(rows) > limit else None
+    else:
+        bookings = query.all()
+        page = [b.to_dict() for b in bookings[:limit]]
+        last = bookings[limit - 1] if len(bookings) > limit else None
+    next_cursor = f"{last.start_datetime.isoformat()}_{last.id}" if last is not None else None
+    return {"bookings": page, "next_cursor": next_cursor}, 200
+
+
 # ✅ Get Client's Bookings
 @bookings_bp.route('/bookings', methods=['GET'])
+@read_replica
 @jwt_required()
 def get_client_bookings():
     """
     Get bookings made by the logged-in client
+    ?include_archived=true also returns bookings moved to the archive.
+    Any of limit, cursor, status, from, to, space_id, order or view=summary
+    returns {"bookings": [...], "next_cursor": ...} pages instead, newest first.
     """
     identity = get_jwt_identity()
     user = User.query.get(identity)
-    print("JWT Identity:", get_jwt_identity())
-
 
     if not user or user.role != 'client':
         return jsonify({"error": "Only clients can view their bookings"}), 403
 
+    if _paginated():
+        body, status = _booking_page(Booking.query.join(Space).filter(Booking.client_id == user.id))
+        return jsonify(body), status
+
     bookings = Booking.query.filter_by(client_id=user.id).all()
-    return jsonify([booking.to_dict() for booking in bookings]), 200
+    result = [booking.to_dict() for booking in bookings]
+    if _include_archived():
+        result = archive.archived_bookings_for_client(user.id) + result
+    return jsonify(result), 200
 
 
 # ✅ Get Owner's Bookings
 @bookings_bp.route('/owner/bookings', methods=['GET'])
+@read_replica
 @jwt_required()
 def get_owner_bookings():
     """
     Get all bookings for spaces owned by the logged-in owner
+    ?include_archived=true also returns bookings moved to the archive.
+    Takes the same filters and pagination as GET /bookings.
     """
     identity = get_jwt_identity()
     user = User.query.get(identity)
@@ -86,12 +295,20 @@ def get_owner_bookings():
     if not user or user.role != 'owner':
         return jsonify({"error": "Only owners can view bookings for their spaces"}), 403
 
-    bookings = Booking.query.join(Space).filter(Space.owner_id == user.id).all()
-    return jsonify([b.to_dict() for b in bookings]), 200
+    query = Booking.query.join(Space).filter(Space.owner_id == user.id)
+    if _paginated():
+        body, status = _booking_page(query)
+        return jsonify(body), status
+
+    result = [b.to_dict() for b in query.all()]
+    if _include_archived():
+        result = archive.archived_bookings_for_owner(user.id) + result
+    return jsonify(result), 200
 
 
 # ✅ Approve Booking
 @bookings_bp.route('/owner/bookings/<int:id>/approve', methods=['PATCH'])
+@write_path
 @jwt_required()
 def approve_booking(id):
     """
@@ -103,7 +320,11 @@ def approve_booking(id):
     if not user or user.role != 'owner':
         return jsonify({"error": "Only owners can approve bookings"}), 403
 
-    booking = Booking.query.get_or_404(id)
+    # Everything to_dict() serializes, in the one SELECT
+    booking = Booking.query.options(
+        joinedload(Booking.space), joinedload(Booking.client),
+        joinedload(Booking.payments), joinedload(Booking.invoice),
+    ).filter(Booking.id == id).first_or_404()
 
     if booking.space.owner_id != user.id:
         return jsonify({"error": "Unauthorized"}), 403
@@ -116,6 +337,7 @@ def approve_booking(id):
 
 # ✅ Decline Booking
 @bookings_bp.route('/owner/bookings/<int:id>/decline', methods=['PATCH'])
+@write_path
 @jwt_required()
 def decline_booking(id):
     """
@@ -132,12 +354,120 @@ def decline_booking(id):
     if booking.space.owner_id != user.id:
         return jsonify({"error": "Unauthorized"}), 403
 
+    freed = booking.status in waitlist.ACTIVE_STATUSES
     booking.status = 'declined'
+    offers = waitlist.offer_freed_slot(booking.space, booking.start_datetime, booking.end_datetime) if freed else []
+    db.session.commit()
+
+    return jsonify({"message": "Booking declined", "waitlist_offers": len(offers)}), 200
+
+
+# ✅ Cancel Booking (Client Only)
+@bookings_bp.route('/bookings/<int:id>/cancel', methods=['PATCH'])
+@write_path
+@jwt_required()
+def cancel_booking(id):
+    """
+    Cancel one of the logged-in client's bookings; the freed slot is offered to the waitlist
+    """
+    identity = get_jwt_identity()
+    user = User.query.get(identity)
+
+    if not user or user.role != 'client':
+        return jsonify({"error": "Only clients can cancel bookings"}), 403
+
+    booking = Booking.query.get_or_404(id)
+
+    if booking.client_id != user.id:
+        return jsonify({"error": "Unauthorized"}), 403
+    if booking.status not in waitlist.ACTIVE_STATUSES:
+        return jsonify({"error": f"Booking is already {booking.status}"}), 409
+
+    booking.status = 'cancelled'
+    offers = waitlist.offer_freed_slot(booking.space, booking.start_datetime, booking.end_datetime)
+    db.session.commit()
+
+    return jsonify({"message": "Booking cancelled", "waitlist_offers": len(offers)}), 200
+
+
+# ✅ Join a Space's Waitlist (Client Only)
+@bookings_bp.route('/spaces/<int:space_id>/waitlist', methods=['POST'])
+@write_path
+@jwt_required()
+@validate_json(schemas.WAITLIST_JOIN)
+def join_waitlist(space_id):
+    """
+    Wait for a taken slot on a space (client)
+    If a booking on the slot is declined or cancelled, the oldest matching
+    entry is given a pending booking for it.
+    """
+    identity = get_jwt_identity()
+    user = User.query.get(identity)
+
+    if not user or user.role != 'client':
+        return jsonify({"error": "Only clients can join a waitlist"}), 403
+
+    space = Space.query.get_or_404(space_id)
+    data = request.get_json()
+    start_datetime = datetime.fromisoformat(data['start_datetime'])
+    end_datetime = datetime.fromisoformat(data['end_datetime'])
+
+    if start_datetime >= end_datetime:
+        return jsonify({"error": "End time must be after start time"}), 400
+    if start_datetime <= datetime.utcnow():
+        return jsonify({"error": "Start time must be in the future"}), 400
+    if not waitlist.active_overlap(space.id, start_datetime, end_datetime):
+        return jsonify({"error": "This slot is free, book it directly"}), 409
+
+    entry = WaitlistEntry(space_id=space.id, client_id=user.id,
+                          start_datetime=start_datetime, end_datetime=end_datetime)
+    db.session.add(entry)
+    db.session.commit()
+
+    return jsonify({"message": "Added to the waitlist", "entry": entry.to_dict()}), 201
+
+
+# ✅ Get Client's Waitlist Entries
+@bookings_bp.route('/waitlist', methods=['GET'])
+@read_replica
+@jwt_required()
+def get_waitlist():
+    """
+    Get the logged-in client's waitlist entries
+    """
+    identity = get_jwt_identity()
+    user = User.query.get(identity)
+
+    if not user or user.role != 'client':
+        return jsonify({"error": "Only clients have waitlist entries"}), 403
+
+    entries = WaitlistEntry.query.filter_by(client_id=user.id).order_by(WaitlistEntry.created_at).all()
+    return jsonify([e.to_dict() for e in entries]), 200
+
+
+# ✅ Leave a Waitlist
+@bookings_bp.route('/waitlist/<int:id>', methods=['DELETE'])
+@write_path
+@jwt_required()
+def leave_waitlist(id):
+    """
+    Remove one of the logged-in client's waiting entries
+    """
+    identity = get_jwt_identity()
+    entry = WaitlistEntry.query.get_or_404(id)
+
+    if str(entry.client_id) != str(identity):
+        return jsonify({"error": "Unauthorized"}), 403
+    if entry.status != 'waiting':
+        return jsonify({"error": f"Entry is already {entry.status}"}), 409
+
+    entry.status = 'cancelled'
     db.session.commit()
 
-    return jsonify({"message": "Booking declined"}), 200
+    return jsonify({"message": "Removed from the waitlist"}), 200
 
 @bookings_bp.route('/admin/bookings', methods =['GET'])
+@read_replica
 @jwt_required()
 def get_all_bookings():
     """
@@ -0,0 +1,84 @@
+import json
+import queue
+import time
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import db, Space
+import events
+
+events_bp = Blueprint('events', __name__)
+
+
+def _stream(subscription, heartbeat, lifetime):
+    deadline = time.monotonic() + lifetime
+    # Browsers reconnect on their own when the stream ends
+    yield "retry: 3000\n\n"
+    while (remaining := deadline - time.monotonic()) > 0:
+        try:
+            payload = subscription.get(timeout=min(heartbeat, remaining))
+        except queue.Empty:
+            yield ": keep-alive\n\n"
+            continue
+        yield f"event: {payload['type']}\ndata: {json.dumps(payload)}\n\n"
+
+
+def _unavailable(message):
+    response = jsonify({"error": message})
+    response.headers['Retry-After'] = '30'
+    return response, 503
+
+
+def _open_stream():
+    user_id = int(get_jwt_identity())
+    # Owners follow each of their spaces; spaces created later join on reconnect
+    space_ids = db.session.execute(db.select(Space.id).where(Space.owner_id == user_id)).scalars()
+    topics = [events.user_topic(user_id)] + [events.space_topic(space_id) for space_id in space_ids]
+
+    broker = current_app.extensions['events']
+    # Subscribe before the response starts so nothing committed after this request is missed
+    subscription = broker.subscribe(topics)
+    config = current_app.config
+    response = Response(
+        _stream(subscription, config['EVENTS_HEARTBEAT_SECONDS'], config['EVENTS_MAX_STREAM_SECONDS']),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
+    # Also runs when the client goes away before the first chunk
+    response.call_on_close(lambda: broker.unsubscribe(topics, subscription))
+    return response
+
+
+# ✅ Live Booking & Payment Updates
+@events_bp.route('/events', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_events():
+    """
+    Server-Sent Events stream of the logged-in user's booking and payment changes
+    Clients receive changes to their bookings; owners receive changes to
+    bookings on their spaces. EventSource can't send headers, so the token
+    may also be passed as ?jwt=<token>.
+    ---
+    produces:
+      - text/event-stream
+    responses:
+      200:
+        description: "`booking` and `payment` events, one JSON object each"
+      503:
+        description: This worker can't hold another open stream (sync worker, or EVENTS_MAX_STREAMS reached)
+    """
+    kind = events.worker_kind(request.environ)
+    if kind == 'sync':
+        return _unavailable("Live updates need gevent or threaded workers")
+    if kind == 'cooperative':
+        return _open_stream()
+
+    slots = current_app.extensions['event_streams']
+    if not slots.acquire():
+        return _unavailable("Too many open event streams, try again later")
+    try:
+        response = _open_stream()
+    except BaseException:
+        slots.release()
+        raise
+    response.call_on_close(slots.release)
+    return response
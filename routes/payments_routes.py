@@ -1,21 +1,19 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Payment, Invoice, Booking, User, Space
 from datetime import datetime
-import os
-from mailjet_rest import Client
+from integrations import mailjet_sender
+from validation import validate_json
+import schemas
+from jobs import enqueue
+from db_routing import read_replica, write_path
 
 
-MAILJET_API_KEY = os.getenv("MAILJET_API_KEY")
-MAILJET_API_SECRET = os.getenv("MAILJET_API_SECRET")
-MAILJET_SENDER_EMAIL = os.getenv("MAILJET_SENDER_EMAIL")
-MAILJET_SENDER_NAME = os.getenv("MAILJET_SENDER_NAME")
-
 payments_bp = Blueprint('payments', __name__)
 
 
 def send_invoice_email(name, space, booking, invoice_url, email):
-    mailjet = Client(auth=(MAILJET_API_KEY, MAILJET_API_SECRET), version='v3.1')
+    """Queue the invoice email; it is sent when the caller commits."""
     html_template = f"""
     <div style="font-family: Arial, sans-serif; max-width: 600px; margin: auto; border: 1px solid #eee; padding: 20px;">
         <h2 style="color: #4CAF50;">📄 Invoice for Booking #{booking.id}</h2>
@@ -33,10 +31,7 @@ def send_invoice_email(name, space, booking, invoice_url, email):
     data = {
       'Messages': [
         {
-          "From": {
-            "Email": MAILJET_SENDER_EMAIL,
-            "Name": MAILJET_SENDER_NAME
-          },
+          "From": mailjet_sender(),
           "To": [
             {
               "Email": email,
@@ -48,20 +43,14 @@ def send_invoice_email(name, space, booking, invoice_url, email):
         }
       ]
     }
-    result = mailjet.send.create(data=data)
-    if result.status_code != 200:
-        current_app.logger.error(f"Failed to send email: {result.json()}")
+    enqueue('send_mail', {'data': data})
 
 def send_payment_confirmation_email(name, email, space):
-    mailjet = Client(auth=(MAILJET_API_KEY, MAILJET_API_SECRET), version='v3.1')
-
+    """Queue the payment confirmation email; it is sent when the caller commits."""
     email_data = {
         'Messages': [
             {
-                "From": {
-                    "Email": MAILJET_SENDER_EMAIL,
-                    "Name": MAILJET_SENDER_NAME
-                },
+                "From": mailjet_sender(),
                 "To": [
                     {
                         "Email": email,
@@ -90,12 +79,12 @@ def send_payment_confirmation_email(name, email, space):
         ]
     }
 
-    result = mailjet.send.create(data=email_data)
-    if result.status_code != 200:
-        current_app.logger.error(f"Failed to send email: {result.json()}")
+    enqueue('send_mail', {'data': email_data})
 
 @payments_bp.route('/payments', methods=['POST'])
+@write_path
 @jwt_required()
+@validate_json(schemas.PAYMENT_CREATE)
 def create_payment():
     """
     Create a new payment
@@ -149,6 +138,7 @@ def create_payment():
 
 
 @payments_bp.route('/payments', methods=['GET'])
+@read_replica
 @jwt_required()
 def get_all_payments():
     """
@@ -182,6 +172,7 @@ def get_all_payments():
 
 
 @payments_bp.route('/payments/<int:id>', methods=['GET'])
+@read_replica
 @jwt_required()
 def get_payment(id):
     """
@@ -211,6 +202,7 @@ def get_payment(id):
     return jsonify({"error": "Unauthorized"}), 403
 
 @payments_bp.route('/payments/<int:id>/confirm', methods=['PATCH'])
+@write_path
 @jwt_required()
 def confirm_payment(id):
     identity = get_jwt_identity()
@@ -228,17 +220,17 @@ def confirm_payment(id):
 
     payment.payment_status = 'completed'
     payment.payment_date = datetime.utcnow()
-    db.session.commit()
     # Get the client details
     client = User.query.get(booking.client_id)
     send_payment_confirmation_email(client.name, client.email, space)
+    db.session.commit()
 
     return jsonify({"message": "Payment confirmed and email sent", "payment": payment.to_dict()}), 200
 
     
 
 @payments_bp.route('/owner/payments', methods=['GET'])
-
+@read_replica
 @jwt_required()
 def get_owner_payments():
     user_id = get_jwt_identity()
@@ -274,7 +266,9 @@ def get_owner_payments():
 
 
 @payments_bp.route('/invoices', methods=['POST'])
+@write_path
 @jwt_required()
+@validate_json(schemas.INVOICE_CREATE)
 def create_invoice():
     """
     Create a new invoice and send it via email
@@ -299,10 +293,8 @@ def create_invoice():
         description: Invoice already exists
     """
     data = request.get_json()
-    booking_id = data.get('booking_id')
+    booking_id = data['booking_id']
     issued_at = datetime.utcnow()
-    if not booking_id:
-        return jsonify({'message': 'Missing booking_id'}), 400
 
     booking = Booking.query.get(booking_id)
     if not booking:
@@ -324,17 +316,14 @@ def create_invoice():
     space = Space.query.get(booking.space_id)
 
     db.session.add(invoice)
-    db.session.commit()
     client = User.query.get(booking.client_id)
     send_invoice_email(client.name, space, booking, invoice_url, client.email)
+    db.session.commit()
 
-    # Send email using Mailjet
-     
-
-   
     return jsonify({'message': 'Invoice created and sent successfully'}), 201
 
 @payments_bp.route('/invoices', methods=['GET'])
+@read_replica
 @jwt_required()
 def get_all_invoices():
     """
@@ -357,6 +346,7 @@ def get_all_invoices():
 
 
 @payments_bp.route('/invoices/<int:id>', methods=['GET'])
+@read_replica
 @jwt_required()
 def get_invoice(id):
     """
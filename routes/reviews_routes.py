@@ -0,0 +1,168 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+from models import db, Booking, Review, Space, User
+from db_routing import read_replica, write_path
+from validation import validate_json
+import reviews
+import schemas
+
+reviews_bp = Blueprint('reviews', __name__)
+
+MAX_PAGE_SIZE = 100
+
+
+# ✅ Review a Completed Booking (Client Only)
+@reviews_bp.route('/bookings/<int:id>/review', methods=['POST'])
+@write_path
+@jwt_required()
+@validate_json(schemas.REVIEW_CREATE)
+def create_review(id):
+    """
+    Review a space after a completed booking (client)
+    A booking can be reviewed once, after it was confirmed and has ended.
+    ---
+    tags: [Reviews]
+    security:
+      - Bearer: []
+    parameters:
+      - in: body
+        name: review
+        required: true
+        schema:
+          required: [rating]
+          properties:
+            rating:
+              type: integer
+              minimum: 1
+              maximum: 5
+            comment:
+              type: string
+    responses:
+      201:
+        description: Review created
+      400:
+        description: Invalid body, or the booking hasn't been completed
+      409:
+        description: The booking was already reviewed
+    """
+    user = User.query.get(get_jwt_identity())
+    booking = Booking.query.get_or_404(id)
+    if not user or booking.client_id != user.id:
+        return jsonify({"error": "Only the booking's client can review it"}), 403
+    if not reviews.completed(booking):
+        return jsonify({"error": "Only confirmed bookings that have ended can be reviewed"}), 400
+    if Review.query.filter_by(booking_id=booking.id).first():
+        return jsonify({"error": "This booking was already reviewed"}), 409
+
+    data = request.get_json()
+    try:
+        # add_review flushes the review, so a concurrent duplicate can fail there as well as at commit
+        review = reviews.add_review(booking, data['rating'], data.get('comment'))
+        db.session.commit()
+    except IntegrityError:
+        # Reviewed concurrently; the unique booking_id kept the second one out
+        db.session.rollback()
+        return jsonify({"error": "This booking was already reviewed"}), 409
+
+    return jsonify({"message": "Review created successfully", "review": review.to_dict()}), 201
+
+
+# ✅ A Space's Reviews
+@reviews_bp.route('/spaces/<int:space_id>/reviews', methods=['GET'])
+@read_replica
+def get_space_reviews(space_id):
+    """
+    Get a space's reviews, newest first
+    ---
+    tags: [Reviews]
+    parameters:
+      - name: limit
+        in: query
+        type: integer
+        description: Page size (default 20, max 100)
+      - name: cursor
+        in: query
+        type: integer
+        description: next_cursor from the previous page
+    responses:
+      200:
+        description: avg_rating, review_count, a page of reviews and the cursor for the next page
+    """
+    space = Space.query.get_or_404(space_id)
+    try:
+        limit = int(request.args.get('limit', 20))
+        cursor = int(request.args['cursor']) if request.args.get('cursor') else None
+    except ValueError:
+        return jsonify({"error": "limit and cursor must be integers"}), 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+
+    # Walks ix_reviews_space_id backwards
+    query = Review.query.filter(Review.space_id == space.id)
+    if cursor is not None:
+        query = query.filter(Review.id < cursor)
+    page = query.order_by(Review.id.desc()).limit(limit + 1).all()
+    next_cursor = page[limit - 1].id if len(page) > limit else None
+
+    return jsonify({
+        "avg_rating": space.avg_rating,
+        "review_count": space.review_count,
+        "reviews": [r.to_dict() for r in page[:limit]],
+        "next_cursor": next_cursor,
+    }), 200
+
+
+# ✅ Edit a Review (Author Only)
+@reviews_bp.route('/reviews/<int:id>', methods=['PATCH'])
+@write_path
+@jwt_required()
+@validate_json(schemas.REVIEW_UPDATE)
+def update_review(id):
+    """
+    Change the rating or comment of one of the logged-in client's reviews
+    ---
+    tags: [Reviews]
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: Updated review
+    """
+    review = Review.query.get_or_404(id)
+    if review.client_id != int(get_jwt_identity()):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    data = request.get_json()
+    if 'rating' in data and not reviews.change_rating(review, data['rating']):
+        return jsonify({"error": "Review not found"}), 404
+    if 'comment' in data:
+        review.comment = data['comment']
+    db.session.commit()
+    return jsonify({"message": "Review updated", "review": review.to_dict()}), 200
+
+
+# ✅ Delete a Review (Author or Admin)
+@reviews_bp.route('/reviews/<int:id>', methods=['DELETE'])
+@write_path
+@jwt_required()
+def delete_review(id):
+    """
+    Delete a review (its author or an admin)
+    ---
+    tags: [Reviews]
+    security:
+      - Bearer: []
+    responses:
+      200:
+        description: Review deleted
+    """
+    review = Review.query.get_or_404(id)
+    user = User.query.get(get_jwt_identity())
+    if not user or (review.client_id != user.id and user.role != 'admin'):
+        return jsonify({"error": "Unauthorized"}), 403
+
+    if not reviews.remove_review(review):
+        return jsonify({"error": "Review not found"}), 404
+    db.session.commit()
+    return jsonify({"message": "Review deleted"}), 200
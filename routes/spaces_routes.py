@@ -1,25 +1,27 @@
 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import db, Space, User
-import cloudinary.uploader
-import cloudinary.uploader
-from dotenv import load_dotenv
-import os
-
-load_dotenv()
-
-cloudinary.config(
-    cloud_name=os.getenv("CLOUDINARY_CLOUD_NAME"),
-    api_key=os.getenv("CLOUDINARY_API_KEY"),
-    api_secret=os.getenv("CLOUDINARY_API_SECRET"),
-    secure=True
-)
+from datetime import datetime
+from sqlalchemy import and_, func, or_, text, tuple_
+from models import db, Amenity, Booking, Space, User, space_amenities
+from compression import etag
+from jobs import enqueue
+from db_routing import read_replica, write_path
+from waitlist import ACTIVE_STATUSES
+from validation import validate_json
+import catalogue
+import recommendations
+import schemas
+import suggest
+import geo
+import heapq
+import json
 
 
 spaces_bp = Blueprint('spaces', __name__)
 
 @spaces_bp.route('/spaces/my', methods=['GET'])
+@read_replica
 @jwt_required()
 def get_my_spaces():
     owner_id = int(get_jwt_identity())  
@@ -30,21 +32,336 @@ def get_my_spaces():
     return jsonify([space.to_dict() for space in my_spaces]), 200
 
 
+def _filter_by_amenities(query, keys):
+    # Spaces linked to every requested amenity: one grouped pass over the
+    # (amenity_id, space_id) index instead of parsing each row's amenities.
+    matching = (
+        db.session.query(space_amenities.c.space_id)
+        .join(Amenity, Amenity.id == space_amenities.c.amenity_id)
+        .filter(Amenity.key.in_(keys))
+        .group_by(space_amenities.c.space_id)
+        .having(func.count() == len(keys))
+    )
+    return query.filter(Space.id.in_(matching))
+
+
+def _amenity_facets(query):
+    # Amenity counts over the filtered spaces, in a single grouped query
+    space_ids = query.with_entities(Space.id)
+    rows = (
+        db.session.query(Amenity.key, func.count())
+        .join(space_amenities, space_amenities.c.amenity_id == Amenity.id)
+        .filter(space_amenities.c.space_id.in_(space_ids))
+        .group_by(Amenity.key)
+    )
+    return {key: count for key, count in rows}
+
+
+def _json_response(body):
+    # Already-serialized JSON from the catalogue snapshot
+    return current_app.response_class(body, mimetype='application/json')
+
+
 @spaces_bp.route('/spaces', methods=['GET'])
+@read_replica
+@etag
 def get_spaces():
     """
     Get all available spaces
     ---
     tags:
       - Spaces
+    parameters:
+      - name: amenities
+        in: query
+        type: string
+        description: Comma-separated amenities every space must have (e.g. wifi,projector)
+      - name: facets
+        in: query
+        type: boolean
+        description: Include amenity facet counts
+      - name: min_rating
+        in: query
+        type: number
+        description: Only spaces whose average rating is at least this
+      - name: sort
+        in: query
+        type: string
+        enum: [rating]
+        description: Best rated first
+    responses:
+      200:
+        description: >
+          A list of spaces, or {"spaces": [...], "facets": {"amenities": {...}}}
+          when amenities or facets is given
+    """
+    amenities = request.args.get('amenities')
+    with_facets = request.args.get('facets', '').lower() in ('1', 'true')
+    keys = list(dict.fromkeys(filter(None, (Amenity.normalize(a) for a in (amenities or '').split(',')))))
+    try:
+        min_rating = float(request.args['min_rating']) if request.args.get('min_rating') else None
+    except ValueError:
+        return jsonify({"error": "min_rating must be a number"}), 400
+    by_rating = request.args.get('sort') == 'rating'
+    envelope = bool(amenities) or with_facets
+
+    snapshot = catalogue.current_snapshot()
+    if snapshot is not None:
+        if not envelope and min_rating is None and not by_rating:
+            return _json_response(snapshot.all_json())
+        space_ids = snapshot.select(keys, min_rating, by_rating)
+        if not envelope:
+            return _json_response(snapshot.spaces_json(space_ids))
+        facets = current_app.json.dumps({"amenities": snapshot.amenity_facets(space_ids)}).encode()
+        return _json_response(b'{"facets":' + facets + b',"spaces":' + snapshot.spaces_json(space_ids) + b'}')
+
+    query = Space.query.filter_by(is_available=True)
+    if min_rating is not None:
+        query = query.filter(Space.avg_rating >= min_rating)
+    if keys:
+        query = _filter_by_amenities(query, keys)
+    # ix_spaces_available_rating, read backwards
+    order = (Space.avg_rating.desc(), Space.id.desc()) if by_rating else ()
+    spaces = [s.to_dict() for s in query.order_by(*order).all()]
+    if not envelope:
+        return jsonify(spaces), 200
+    return jsonify({
+        "spaces": spaces,
+        "facets": {"amenities": _amenity_facets(query)}
+    }), 200
+
+
+MAX_NEARBY_RADIUS_KM = 100
+MAX_PAGE_SIZE = 100
+MAX_SIMILAR = 50
+MAX_SUGGESTIONS = 20
+
+NEARBY_EARTHDISTANCE_SQL = text("""
+    SELECT dist, id FROM (
+        SELECT id,
+               earth_distance(ll_to_earth(:lat, :lng), ll_to_earth(latitude, longitude)) / 1000.0 AS dist
+        FROM spaces
+        WHERE is_available
+          AND latitude IS NOT NULL AND longitude IS NOT NULL
+          AND earth_box(ll_to_earth(:lat, :lng), :radius * 1000.0) @> ll_to_earth(latitude, longitude)
+    ) nearby
+    WHERE dist <= :radius
+      AND (dist > :after_dist OR (dist = :after_dist AND id > :after_id))
+    ORDER BY dist, id
+    LIMIT :limit
+""")
+
+
+def _parse_distance_cursor(cursor):
+    # Cursor is "<distance_km>_<id>" of the last row on the previous page
+    if not cursor:
+        return (-1.0, 0)
+    distance, space_id = cursor.split('_')
+    return (float(distance), int(space_id))
+
+
+def _nearby_geohash(lat, lng, radius, after, limit):
+    # Candidate rows come from geohash range scans over the cells covering the
+    # circle; exact distances, ordering and the keyset cut happen here.
+    cells = []
+    for prefix in geo.covering_prefixes(lat, lng, radius):
+        upper = geo.prefix_upper_bound(prefix)
+        cells.append(and_(Space.geohash >= prefix, Space.geohash < upper) if upper else Space.geohash >= prefix)
+
+    candidates = db.session.query(Space.id, Space.latitude, Space.longitude).filter(
+        Space.is_available == True, Space.geohash.isnot(None), or_(*cells)
+    )
+    hits = []
+    for space_id, space_lat, space_lng in candidates:
+        distance = geo.haversine_km(lat, lng, space_lat, space_lng)
+        if distance <= radius and (distance, space_id) > after:
+            hits.append((distance, space_id))
+    return heapq.nsmallest(limit, hits)
+
+
+def _nearby_earthdistance(lat, lng, radius, after, limit):
+    rows = db.session.execute(NEARBY_EARTHDISTANCE_SQL, {
+        "lat": lat, "lng": lng, "radius": radius,
+        "after_dist": after[0], "after_id": after[1], "limit": limit,
+    })
+    return [(dist, space_id) for dist, space_id in rows]
+
+
+@spaces_bp.route('/spaces/nearby', methods=['GET'])
+@read_replica
+def get_nearby_spaces():
+    """
+    Get available spaces near a point, closest first
+    ---
+    tags:
+      - Spaces
+    parameters:
+      - name: lat
+        in: query
+        type: number
+        required: true
+      - name: lng
+        in: query
+        type: number
+        required: true
+      - name: radius
+        in: query
+        type: number
+        description: Search radius in km (default 5, max 100)
+      - name: limit
+        in: query
+        type: integer
+        description: Page size (default 20, max 100)
+      - name: cursor
+        in: query
+        type: string
+        description: next_cursor from the previous page
+    responses:
+      200:
+        description: Spaces with distance_km, and the cursor for the next page
+      400:
+        description: Invalid coordinates, radius, limit or cursor
+    """
+    try:
+        lat = float(request.args['lat'])
+        lng = float(request.args['lng'])
+        radius = float(request.args.get('radius', 5))
+        limit = int(request.args.get('limit', 20))
+        after = _parse_distance_cursor(request.args.get('cursor'))
+    except (KeyError, ValueError):
+        return jsonify({"error": "lat and lng are required numbers; radius, limit and cursor must be valid"}), 400
+
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return jsonify({"error": "lat/lng out of range"}), 400
+    if not 0 < radius <= MAX_NEARBY_RADIUS_KM:
+        return jsonify({"error": f"radius must be between 0 and {MAX_NEARBY_RADIUS_KM} km"}), 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+
+    if current_app.config.get('GEO_BACKEND') == 'earthdistance' and db.engine.dialect.name == 'postgresql':
+        page = _nearby_earthdistance(lat, lng, radius, after, limit + 1)
+    else:
+        page = _nearby_geohash(lat, lng, radius, after, limit + 1)
+
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = f"{page[-1][0]!r}_{page[-1][1]}"
+
+    spaces = {s.id: s for s in Space.query.filter(Space.id.in_([space_id for _, space_id in page]))}
+    results = [
+        dict(spaces[space_id].to_dict(), distance_km=round(distance, 3))
+        for distance, space_id in page
+    ]
+    return jsonify({"spaces": results, "next_cursor": next_cursor}), 200
+
+
+def _parse_price_cursor(cursor):
+    # Cursor is "<price_per_hour>_<id>" of the last row on the previous page
+    if not cursor:
+        return None
+    price, space_id = cursor.split('_')
+    return (float(price), int(space_id))
+
+
+@spaces_bp.route('/spaces/available', methods=['GET'])
+@read_replica
+def get_available_spaces():
+    """
+    Get spaces free for a whole time range, by price or rating
+    A space is free when no pending or confirmed booking overlaps
+    [start, end). Paginate with next_cursor.
+    ---
+    tags:
+      - Spaces
+    parameters:
+      - name: start
+        in: query
+        type: string
+        required: true
+        description: ISO datetime
+      - name: end
+        in: query
+        type: string
+        required: true
+        description: ISO datetime
+      - name: min_capacity
+        in: query
+        type: integer
+      - name: location
+        in: query
+        type: string
+        description: Case-insensitive location prefix
+      - name: sort
+        in: query
+        type: string
+        enum: [price_asc, price_desc, rating]
+      - name: min_rating
+        in: query
+        type: number
+      - name: limit
+        in: query
+        type: integer
+        description: Page size (default 20, max 100)
+      - name: cursor
+        in: query
+        type: string
+        description: next_cursor from the previous page
     responses:
       200:
-        description: A list of spaces
+        description: Free spaces, and the cursor for the next page
+      400:
+        description: Invalid range, filters, limit or cursor
     """
-    spaces = Space.query.filter_by(is_available=True).all()
-    return jsonify([s.to_dict() for s in spaces]), 200
+    try:
+        start = datetime.fromisoformat(request.args['start'])
+        end = datetime.fromisoformat(request.args['end'])
+        min_capacity = int(request.args.get('min_capacity', 1))
+        min_rating = float(request.args.get('min_rating', 0))
+        limit = int(request.args.get('limit', 20))
+        after = _parse_price_cursor(request.args.get('cursor'))
+    except (KeyError, ValueError):
+        return jsonify({"error": "start and end are required ISO datetimes; min_capacity, min_rating, limit and cursor must be valid"}), 400
+
+    if start >= end:
+        return jsonify({"error": "End time must be after start time"}), 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}), 400
+    sort = request.args.get('sort', 'price_asc')
+    descending = sort in ('price_desc', 'rating')
+    column = Space.avg_rating if sort == 'rating' else Space.price_per_hour
+
+    # Anti-join: each candidate probes ix_bookings_space_end for a blocking
+    # booking, while the scan walks ix_spaces_available_price (or _rating) in
+    # page order and stops after limit + 1 hits.
+    overlapping = db.session.query(Booking.id).filter(
+        Booking.space_id == Space.id,
+        Booking.end_datetime > start,
+        Booking.start_datetime < end,
+        Booking.status.in_(ACTIVE_STATUSES),
+    )
+    query = Space.query.filter(Space.is_available == True, Space.capacity >= min_capacity, ~overlapping.exists())
+    location = request.args.get('location', '').strip()
+    if location:
+        query = query.filter(func.lower(Space.location).startswith(location.lower(), autoescape=True))
+    if min_rating > 0:
+        query = query.filter(Space.avg_rating >= min_rating)
+    if after is not None:
+        key, cursor = tuple_(column, Space.id), tuple_(*after)
+        query = query.filter(key < cursor if descending else key > cursor)
+    order = (column.desc(), Space.id.desc()) if descending else (column, Space.id)
+    page = query.order_by(*order).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = f"{getattr(page[-1], column.key)!r}_{page[-1].id}"
+    return jsonify({"spaces": [s.to_dict() for s in page], "next_cursor": next_cursor}), 200
+
 
 @spaces_bp.route('/spaces/<int:id>', methods=['GET'])
+@read_replica
+@etag
 def get_space(id):
     """
     Get a specific space by ID
@@ -60,11 +377,92 @@ def get_space(id):
       200:
         description: A space object
     """
+    snapshot = catalogue.current_snapshot()
+    body = snapshot.space_json(id) if snapshot is not None else None
+    if body is not None:
+        return _json_response(body)
     space = Space.query.get_or_404(id)
     return jsonify(space.to_dict()), 200
 
+@spaces_bp.route('/spaces/suggest', methods=['GET'])
+@read_replica
+def suggest_spaces():
+    """
+    Autocomplete space titles and locations
+    Matches the start of a title or location, or of any word in it, ignoring case, accents and punctuation.
+    ---
+    tags:
+      - Spaces
+    parameters:
+      - name: prefix
+        in: query
+        type: string
+        required: true
+      - name: limit
+        in: query
+        type: integer
+        description: Suggestions of each kind (default 5, max 20)
+    responses:
+      200:
+        description: Matching titles (with space ids) and locations, in alphabetical order
+    """
+    prefix = request.args.get('prefix', '')
+    if not prefix.strip():
+        return jsonify({"error": "prefix is required"}), 400
+    try:
+        limit = int(request.args.get('limit', 5))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if not 1 <= limit <= MAX_SUGGESTIONS:
+        return jsonify({"error": f"limit must be between 1 and {MAX_SUGGESTIONS}"}), 400
+
+    titles, locations = suggest.suggest(prefix[:100], limit)
+    return jsonify({"prefix": prefix, "titles": titles, "locations": locations}), 200
+
+
+@spaces_bp.route('/spaces/<int:id>/similar', methods=['GET'])
+@read_replica
+def get_similar_spaces(id):
+    """
+    Get the available spaces most similar to a space
+    Similarity combines title, description and amenities (TF-IDF) with capacity and hourly price.
+    ---
+    tags:
+      - Spaces
+    parameters:
+      - name: id
+        in: path
+        type: integer
+        required: true
+      - name: limit
+        in: query
+        type: integer
+        description: Number of spaces (default 10, max 50)
+    responses:
+      200:
+        description: Similar spaces, most similar first, with cosine similarity scores (null until the index is ready)
+    """
+    space = Space.query.get_or_404(id)
+    try:
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if not 1 <= limit <= MAX_SIMILAR:
+        return jsonify({"error": f"limit must be between 1 and {MAX_SIMILAR}"}), 400
+
+    # Ask for a few extra in case some became unavailable since the last refresh
+    ranked = recommendations.similar_to(space, limit + 5)
+    found = {s.id: s for s in Space.query.filter(Space.id.in_([space_id for space_id, _ in ranked]),
+                                                 Space.is_available.is_(True))}
+    similar = [{**found[space_id].to_dict(), "score": round(score, 4) if score is not None else None}
+               for space_id, score in ranked if space_id in found][:limit]
+    return jsonify({"space_id": space.id, "similar": similar}), 200
+
+
 @spaces_bp.route('/spaces', methods=['POST'])
+@write_path
 @jwt_required()
+@validate_json(schemas.SPACE_CREATE)
 def create_space():
     """
     Create a new space (owners only)
@@ -100,6 +498,11 @@ def create_space():
                 type: boolean
               main_image_url:
                 type: string
+                description: Image URL or data URI; uploaded to Cloudinary in the background
+              latitude:
+                type: number
+              longitude:
+                type: number
     responses:
       201:
         description: Space created
@@ -116,7 +519,8 @@ def create_space():
 
     try:
         data = request.get_json()
-        print("Incoming data:", data)  # Debug
+        # Field names only: descriptions and image URLs don't belong in logs
+        current_app.logger.debug("Create space payload", extra={'fields': sorted(data or {})})
 
         # Extract fields
         title = data.get('title')
@@ -128,26 +532,12 @@ def create_space():
         price_per_day = data.get('price_per_day')
         is_available = data.get('is_available', True)
         main_image_url = data.get('main_image_url')
+        latitude = data.get('latitude')
+        longitude = data.get('longitude')
 
-        # Validate required fields
-        if not all([title, description, location, capacity, price_per_hour, price_per_day]):
-            return jsonify({"error": "Missing required fields"}), 400
-        
-         # Upload image to Cloudinary if provided
-        if main_image_url:
-            try:
-                upload_result = cloudinary.uploader.upload(
-                    main_image_url,
-                    folder="spacer/spaces"
-                )
-                main_image_url = upload_result.get("secure_url")
-            except Exception as e:
-                return jsonify({"error": f"Image upload failed: {str(e)}"}), 500
-
-        # ✅ Convert amenities list to JSON string
-        import json
-        if isinstance(amenities, list):
-            amenities = json.dumps(amenities)
+        # Fall back to the gazetteer when no coordinates were sent
+        if latitude is None or longitude is None:
+            latitude, longitude = geo.geocode(location, geo.default_gazetteer()) or (None, None)
 
         # ✅ Create new space
         new_space = Space(
@@ -156,16 +546,23 @@ def create_space():
             description=description,
             location=location,
             capacity=capacity,
-            amenities=amenities,
             price_per_hour=price_per_hour,
             price_per_day=price_per_day,
             is_available=is_available,
-            main_image_url=main_image_url,
+            latitude=latitude,
+            longitude=longitude,
             # created_at=datetime.utcnow(),
             # updated_at=datetime.utcnow()
         )
 
+        # ✅ Store amenities as a JSON list plus normalized amenity rows
+        new_space.set_amenities(amenities)
+
         db.session.add(new_space)
+        # The Cloudinary upload runs in the background and fills in main_image_url
+        if main_image_url:
+            db.session.flush()
+            enqueue('upload_space_image', {'space_id': new_space.id, 'source': main_image_url})
         db.session.commit()
 
         return jsonify({
@@ -180,18 +577,22 @@ def create_space():
                 "price_per_hour": new_space.price_per_hour,
                 "price_per_day": new_space.price_per_day,
                 "is_available": new_space.is_available,
-                "main_image_url": new_space.main_image_url
+                "main_image_url": new_space.main_image_url,
+                "latitude": new_space.latitude,
+                "longitude": new_space.longitude
             }
         }), 201
 
     except Exception as e:
         db.session.rollback()
-        print("Error:", str(e))
+        current_app.logger.exception("Space creation failed")
         return jsonify({"error": str(e)}), 500
 
 
 @spaces_bp.route('/spaces/<int:id>', methods=['PATCH'])
+@write_path
 @jwt_required()
+@validate_json(schemas.SPACE_UPDATE)
 def update_space(id):
     """
     Update a space (owners only)
@@ -219,10 +620,13 @@ def update_space(id):
         return jsonify({"error": "Unauthorized: You don't own this space"}), 403
 
     data = request.get_json()
-    for field in ['title', 'description', 'location', 'capacity', 'amenities',
-                  'price_per_hour', 'price_per_day', 'is_available', 'main_image_url']:
+    for field in ['title', 'description', 'location', 'capacity',
+                  'price_per_hour', 'price_per_day', 'is_available', 'main_image_url',
+                  'latitude', 'longitude']:
         if field in data:
             setattr(space, field, data[field])
+    if 'amenities' in data:
+        space.set_amenities(data['amenities'])
 
     db.session.commit()
     return jsonify(space.to_dict()), 200
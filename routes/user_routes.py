@@ -1,19 +1,20 @@
 from flask import Blueprint, request, jsonify
-from extensions import db, bcrypt
+from extensions import db, bcrypt, limiter
 from models import User
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from datetime import timedelta
-from mailjet_rest import Client
-import os
+from flask_jwt_extended import (create_access_token, create_refresh_token, decode_token, get_jwt,
+                                get_jwt_identity, jwt_required)
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+from integrations import mailjet_sender
+from jobs import enqueue
+from ratelimit import json_field
+from revocation import revoke_token
+from validation import validate_json
+import schemas
 
 
 user_bp = Blueprint('users', __name__)
 
-MAILJET_API_KEY = os.getenv("MAILJET_API_KEY")
-MAILJET_API_SECRET = os.getenv("MAILJET_API_SECRET")
-MAILJET_SENDER_EMAIL = os.getenv("MAILJET_SENDER_EMAIL")
-MAILJET_SENDER_NAME = os.getenv("MAILJET_SENDER_NAME")
-
 #  Utility: Check if current user is admin
 def is_admin():
     user_id = get_jwt_identity()
@@ -22,7 +23,8 @@ def is_admin():
 
 
 def send_welcome_email(email, name):
-    mailjet = Client(auth=(MAILJET_API_KEY, MAILJET_API_SECRET), version='v3.1')
+    """Queue the welcome email; it is sent when the caller commits."""
+    sender = mailjet_sender()
 
     template = f"""
     <h2>Welcome to Our Platform, {name}!</h2>
@@ -36,16 +38,13 @@ def send_welcome_email(email, name):
     <p>Need help? Just reply to this email or contact our support team.</p>
     <br>
     <p>Cheers,</p>
-    <p><strong>{MAILJET_SENDER_NAME} Team</strong></p>
+    <p><strong>{sender["Name"]} Team</strong></p>
     """
 
     data = {
         'Messages': [
             {
-                "From": {
-                    "Email": MAILJET_SENDER_EMAIL,
-                    "Name": MAILJET_SENDER_NAME
-                },
+                "From": sender,
                 "To": [
                     {
                         "Email": email,
@@ -58,20 +57,63 @@ def send_welcome_email(email, name):
         ]
     }
 
-    result = mailjet.send.create(data=data)
-    if result.status_code != 200:
-        print("Mailjet error:", result.json())
+    enqueue('send_mail', {'data': data})
 
 
 @user_bp.route('/logout', methods=['POST'])
-@jwt_required()
+@jwt_required(verify_type=False)
 def logout():
+    """
+    Revoke the presented token, and the refresh token if one is sent
+    ---
+    tags:
+      - Users
+    parameters:
+      - in: body
+        name: body
+        schema:
+          type: object
+          properties:
+            refresh_token:
+              type: string
+    responses:
+      200:
+        description: Logged out
+    """
+    revoke_token(get_jwt())
+
+    refresh_token = (request.get_json(silent=True) or {}).get('refresh_token')
+    if refresh_token:
+        try:
+            refresh = decode_token(refresh_token)
+        except (PyJWTError, JWTExtendedException):
+            refresh = None
+        if refresh and refresh.get('type') == 'refresh' and refresh['sub'] == get_jwt_identity():
+            revoke_token(refresh)
+
     response = jsonify({"message": "Logged out successfully"})
     
     return response, 200
 
+
+@user_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    """
+    Exchange a refresh token (as the Bearer token) for a new access token
+    ---
+    tags:
+      - Users
+    responses:
+      200:
+        description: New access token
+    """
+    return jsonify({"token": create_access_token(identity=get_jwt_identity())}), 200
+
 #  Register a user
 @user_bp.route('/register', methods=['POST'])
+@limiter.limit('register', ip='10/minute', account='3/minute', account_key=json_field('email'))
+@validate_json(schemas.REGISTER)
 def register():
     """
     Register a new user
@@ -102,24 +144,22 @@ def register():
     email = data.get('email')
     password = data.get('password')
 
-    if not name or not email or not password:
-        return jsonify({"error": "All fields are required"}), 400
-
     if User.query.filter_by(email=email).first():
         return jsonify({"error": "Email already exists"}), 400
 
     hashed_pw = bcrypt.generate_password_hash(password).decode('utf-8')
     new_user = User(name=name, email=email, password_hash=hashed_pw)
     db.session.add(new_user)
-    db.session.commit()
-    
     send_welcome_email(email,name)
+    db.session.commit()
 
     return jsonify({"message": "User registered successfully"}), 201
 
 
 #  Login and return JWT
 @user_bp.route('/login', methods=['POST'])
+@limiter.limit('login', ip='30/minute', account='10/minute', account_key=json_field('email'))
+@validate_json(schemas.LOGIN)
 def login():
     """
     Login a user and return JWT
@@ -151,10 +191,11 @@ def login():
     if not user or not bcrypt.check_password_hash(user.password_hash, password):
         return jsonify({"error": "Invalid credentials"}), 401
 
-    token = create_access_token(identity=str(user.id,), expires_delta=timedelta(days=1))
+    token = create_access_token(identity=str(user.id,))
     return jsonify({
         "message": "Login successful",
         "token": token,
+        "refresh_token": create_refresh_token(identity=str(user.id)),
         "user": {"id": user.id, "name": user.name, "email": user.email, "role": user.role}
     })
 
@@ -248,6 +289,7 @@ def get_user(user_id):
 # Update user (Admin only)
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
 @jwt_required()
+@validate_json(schemas.USER_UPDATE)
 def update_user(user_id):
     """
     Update a user's details (Admin only)
@@ -0,0 +1,113 @@
+# JSON schemas for write endpoint bodies, used with validation.validate_json.
+# Unknown fields are ignored, as they always were.
+
+_text = {'type': 'string', 'minLength': 1}
+_id = {'type': 'integer', 'minimum': 1}
+_datetime = {'type': 'string', 'format': 'iso-datetime'}
+_price = {'type': 'number', 'exclusiveMinimum': 0}
+
+REGISTER = {
+    'type': 'object',
+    'required': ['name', 'email', 'password'],
+    'properties': {
+        'name': _text,
+        'email': {'type': 'string', 'format': 'email'},
+        'password': _text,
+    },
+}
+
+LOGIN = {
+    'type': 'object',
+    'required': ['email', 'password'],
+    'properties': {
+        'email': {'type': 'string'},
+        'password': {'type': 'string'},
+    },
+}
+
+USER_UPDATE = {
+    'type': 'object',
+    'properties': {
+        'name': _text,
+        'email': {'type': 'string', 'format': 'email'},
+        'password': _text,
+    },
+}
+
+_SPACE_FIELDS = {
+    'title': _text,
+    'description': _text,
+    'location': _text,
+    'capacity': {'type': 'integer', 'minimum': 1},
+    # A list, or the JSON-encoded / comma-separated string parse_amenities also takes
+    'amenities': {'anyOf': [{'type': 'array', 'items': {'type': 'string'}}, {'type': ['string', 'null']}]},
+    'price_per_hour': _price,
+    'price_per_day': _price,
+    'is_available': {'type': 'boolean'},
+    'main_image_url': {'type': ['string', 'null']},
+    'latitude': {'type': ['number', 'null'], 'minimum': -90, 'maximum': 90},
+    'longitude': {'type': ['number', 'null'], 'minimum': -180, 'maximum': 180},
+}
+
+SPACE_CREATE = {
+    'type': 'object',
+    'required': ['title', 'description', 'location', 'capacity', 'price_per_hour', 'price_per_day'],
+    'properties': _SPACE_FIELDS,
+}
+
+SPACE_UPDATE = {
+    'type': 'object',
+    'properties': _SPACE_FIELDS,
+}
+
+_SLOT = {
+    'start_datetime': _datetime,
+    'end_datetime': _datetime,
+}
+
+BOOKING_CREATE = {
+    'type': 'object',
+    'required': ['space_id', 'start_datetime', 'end_datetime'],
+    'properties': {'space_id': _id, **_SLOT},
+}
+
+RECURRING_BOOKING_CREATE = {
+    'type': 'object',
+    'required': ['space_id', 'start_datetime', 'end_datetime', 'rrule'],
+    'properties': {'space_id': _id, **_SLOT, 'rrule': _text, 'skip_conflicts': {'type': 'boolean'}},
+}
+
+WAITLIST_JOIN = {
+    'type': 'object',
+    'required': ['start_datetime', 'end_datetime'],
+    'properties': _SLOT,
+}
+
+PAYMENT_CREATE = {
+    'type': 'object',
+    'required': ['booking_id', 'amount', 'payment_method'],
+    'properties': {
+        'booking_id': _id,
+        'amount': _price,
+        'payment_method': _text,
+    },
+}
+
+_rating = {'type': 'integer', 'minimum': 1, 'maximum': 5}
+
+REVIEW_CREATE = {
+    'type': 'object',
+    'required': ['rating'],
+    'properties': {'rating': _rating, 'comment': {'type': ['string', 'null']}},
+}
+
+REVIEW_UPDATE = {
+    'type': 'object',
+    'properties': {'rating': _rating, 'comment': {'type': ['string', 'null']}},
+}
+
+INVOICE_CREATE = {
+    'type': 'object',
+    'required': ['booking_id'],
+    'properties': {'booking_id': _id},
+}
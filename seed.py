@@ -6,51 +6,32 @@ from datetime import datetime, timedelta
 with app.app_context():
     db.create_all()
 
-    # Seed Admin
-    if not User.query.filter_by(email='admin@spacer.com').first():
-        admin = User(
-            name='Admin',
-            email='admin@spacer.com',
-            role='admin',
-            password_hash=bcrypt.generate_password_hash('Admin123!').decode('utf-8')
-        )
-        db.session.add(admin)
-        print("Admin user created successfully!")
-    else:
-        admin = User.query.filter_by(email='admin@spacer.com').first()
-        print("⚠️ Admin already exists.")
+    # Seed Users: one lookup for every demo email, one bcrypt per password.
+    # For load-test volumes use `flask seed --users N --spaces M --bookings K`.
+    demo_users = [('Admin', 'admin@spacer.com', 'admin', 'Admin123!')]
+    demo_users += [(f"Owner {i}", f"owner{i}@example.com", 'owner', 'password123') for i in range(1, 4)]
+    demo_users += [(f"Client {i}", f"client{i}@example.com", 'client', 'password123') for i in range(1, 4)]
 
-    # Seed Owners
-    owners = []
-    for i in range(1, 4):
-        email = f"owner{i}@example.com"
-        owner = User.query.filter_by(email=email).first()
-        if not owner:
-            owner = User(
-                name=f"Owner {i}",
-                email=email,
-                role='owner',
-                password_hash=bcrypt.generate_password_hash('password123').decode('utf-8')
-            )
-            db.session.add(owner)
-        owners.append(owner)
+    existing = {
+        u.email: u for u in User.query.filter(User.email.in_([email for _, email, _, _ in demo_users]))
+    }
+    hashes = {}
+    created = 0
+    for name, email, role, password in demo_users:
+        if email in existing:
+            continue
+        if password not in hashes:
+            hashes[password] = bcrypt.generate_password_hash(password).decode('utf-8')
+        existing[email] = User(name=name, email=email, role=role, password_hash=hashes[password])
+        db.session.add(existing[email])
+        created += 1
     db.session.commit()
+    print(f"{created} users created, {len(demo_users) - created} already existed.")
 
-    # Seed Clients
-    clients = []
-    for i in range(1, 4):
-        email = f"client{i}@example.com"
-        client = User.query.filter_by(email=email).first()
-        if not client:
-            client = User(
-                name=f"Client {i}",
-                email=email,
-                role='client',
-                password_hash=bcrypt.generate_password_hash('password123').decode('utf-8')
-            )
-            db.session.add(client)
-        clients.append(client)
-    db.session.commit()
+    admin = existing['admin@spacer.com']
+    owners = [existing[f"owner{i}@example.com"] for i in range(1, 4)]
+    clients = [existing[f"client{i}@example.com"] for i in range(1, 4)]
+    owner = owners[-1]
 
     # Seed Spaces
     if Space.query.count() == 0:
@@ -92,6 +73,9 @@ with app.app_context():
                 main_image_url="https://images.pexels.com/photos/1181611/pexels-photo-1181611.jpeg"
             ),
         ]
+        for space in spaces:
+            # Normalized amenity rows back the amenity filters, facets and the catalogue snapshot
+            space.set_amenities(space.amenities)
         db.session.add_all(spaces)
         db.session.commit()
         print("Spaces seeded successfully!")
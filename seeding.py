@@ -0,0 +1,220 @@
+import csv
+import io
+import json
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select
+from extensions import db, bcrypt
+from models import User, Space, Booking, Payment, Invoice, Amenity, space_amenities
+import catalogue
+import geo
+
+
+LOCATIONS = ["Nairobi CBD", "Westlands", "Karen", "Kilimani", "Upper Hill",
+             "Lavington", "Gigiri", "Parklands", "Kileleshwa", "Runda"]
+AMENITIES = ["Wi-Fi", "Projector", "Whiteboard", "AC", "Parking", "Coffee",
+             "Printer", "Stage", "Garden", "Sound System"]
+KINDS = ["Coworking Hub", "Meeting Room", "Event Hall", "Garden Venue",
+         "Studio", "Boardroom", "Rooftop Terrace", "Training Room"]
+STATUSES = ["pending", "confirmed", "confirmed", "confirmed", "cancelled", "declined"]
+
+DEFAULT_PASSWORD = "password123"
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _next_id(model):
+    return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+
+def _copy_chunk(table, chunk):
+    # COPY ... FROM STDIN streams the whole chunk in one round-trip and skips
+    # per-row statement processing entirely.
+    columns = list(chunk[0])
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in chunk:
+        writer.writerow(["" if row[c] is None else row[c] for c in columns])
+    buf.seek(0)
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf
+        )
+    finally:
+        cursor.close()
+
+
+def _insert(model, rows, chunk_size, use_copy=False):
+    table = getattr(model, "__table__", model)
+    count = 0
+    for chunk in _chunks(rows, chunk_size):
+        if use_copy:
+            _copy_chunk(table, chunk)
+        else:
+            db.session.execute(insert(table), chunk)
+        count += len(chunk)
+    return count
+
+
+def copy_supported():
+    """True when the bound engine is PostgreSQL via psycopg2 (``COPY`` capable)."""
+    return db.engine.dialect.name == "postgresql" and db.engine.dialect.driver == "psycopg2"
+
+
+def _reset_sequences(models):
+    # Rows are inserted with explicit ids, so PostgreSQL sequences must be
+    # moved past them before the app inserts anything itself.
+    if db.engine.dialect.name != "postgresql":
+        return
+    for model in models:
+        table = model.__tablename__
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"(SELECT COALESCE(MAX(id), 1) FROM {table}))"
+        ))
+
+
+def bulk_seed(users=100, spaces=1000, bookings=10000, seed=0,
+              password=DEFAULT_PASSWORD, chunk_size=5000, use_copy=None):
+    """
+    Insert a synthetic dataset in chunks, via ``COPY`` on PostgreSQL and
+    executemany ``insert()`` batches elsewhere.
+
+    One in ten users is an owner, the rest are clients. Every confirmed
+    booking gets a completed payment and an invoice. The same ``seed`` always
+    produces the same rows, and the password is hashed once for all users.
+    Returns the number of rows inserted per table.
+    """
+    if use_copy is None:
+        use_copy = copy_supported()
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+    password_hash = bcrypt.generate_password_hash(password).decode("utf-8")
+
+    first_user = _next_id(User)
+    n_owners = max(1, users // 10)
+    owner_ids = list(range(first_user, first_user + n_owners))
+    client_ids = list(range(first_user + n_owners, first_user + users)) or owner_ids
+
+    def user_rows():
+        for i in range(users):
+            role = "owner" if i < n_owners else "client"
+            yield {
+                "id": first_user + i,
+                "name": f"{role.title()} {first_user + i}",
+                "email": f"{role}{first_user + i}@example.com",
+                "password_hash": password_hash,
+                "role": role,
+                "is_verified": True,
+                "created_at": now,
+                "updated_at": now,
+            }
+
+    first_space = _next_id(Space)
+    gazetteer = geo.default_gazetteer()
+    amenity_rows = Amenity.get_or_create(AMENITIES)
+    db.session.flush()
+    amenity_ids = {name: amenity.id for name, amenity in zip(AMENITIES, amenity_rows)}
+    prices = []
+    links = []
+
+    def space_rows():
+        for i in range(spaces):
+            hourly = float(rng.randrange(200, 5000, 50))
+            prices.append(hourly)
+            kind = rng.choice(KINDS)
+            location = rng.choice(LOCATIONS)
+            lat, lng = geo.geocode(location, gazetteer)
+            lat += rng.uniform(-0.02, 0.02)
+            lng += rng.uniform(-0.02, 0.02)
+            amenities = rng.sample(AMENITIES, rng.randrange(1, 5))
+            links.extend((first_space + i, amenity_ids[name]) for name in amenities)
+            yield {
+                "id": first_space + i,
+                "owner_id": rng.choice(owner_ids),
+                "title": f"{kind} {first_space + i}",
+                "description": f"A {kind.lower()} in {location}.",
+                "location": location,
+                "capacity": rng.randrange(5, 300),
+                "amenities": json.dumps(amenities),
+                "price_per_hour": hourly,
+                "price_per_day": hourly * 8,
+                "is_available": rng.random() < 0.9,
+                "main_image_url": None,
+                "latitude": lat,
+                "longitude": lng,
+                "geohash": geo.encode(lat, lng),
+                "created_at": now,
+                "updated_at": now,
+            }
+
+    first_booking = _next_id(Booking)
+    confirmed = []
+
+    def booking_rows():
+        for i in range(bookings):
+            space_offset = rng.randrange(spaces)
+            hours = rng.randrange(1, 9)
+            start = now + timedelta(hours=rng.randrange(-24 * 365, 24 * 365))
+            status = rng.choice(STATUSES)
+            client_id = rng.choice(client_ids)
+            total = round(prices[space_offset] * hours, 2)
+            if status == "confirmed":
+                confirmed.append((first_booking + i, client_id, total, start))
+            yield {
+                "id": first_booking + i,
+                "client_id": client_id,
+                "space_id": first_space + space_offset,
+                "start_datetime": start,
+                "end_datetime": start + timedelta(hours=hours),
+                "duration_hours": hours,
+                "total_price": total,
+                "status": status,
+                "created_at": start - timedelta(days=7),
+                "updated_at": start - timedelta(days=7),
+            }
+
+    def link_rows():
+        for space_id, amenity_id in links:
+            yield {"space_id": space_id, "amenity_id": amenity_id}
+
+    def payment_rows():
+        for booking_id, client_id, total, start in confirmed:
+            yield {
+                "booking_id": booking_id,
+                "client_id": client_id,
+                "amount": total,
+                "payment_method": "mpesa",
+                "payment_status": "completed",
+                "payment_date": start - timedelta(days=1),
+            }
+
+    def invoice_rows():
+        for booking_id, client_id, _, start in confirmed:
+            yield {
+                "booking_id": booking_id,
+                "client_id": client_id,
+                "invoice_url": f"https://spacer.com/invoice/{booking_id}",
+                "issued_at": start - timedelta(days=1),
+            }
+
+    counts = {"users": _insert(User, user_rows(), chunk_size, use_copy)}
+    counts["spaces"] = _insert(Space, space_rows(), chunk_size, use_copy) if users else 0
+    counts["space_amenities"] = _insert(space_amenities, link_rows(), chunk_size, use_copy)
+    counts["bookings"] = _insert(Booking, booking_rows(), chunk_size, use_copy) if spaces else 0
+    counts["payments"] = _insert(Payment, payment_rows(), chunk_size, use_copy)
+    counts["invoices"] = _insert(Invoice, invoice_rows(), chunk_size, use_copy)
+    _reset_sequences([User, Space, Booking, Payment, Invoice])
+    catalogue.mark_changed(db.session)
+    db.session.commit()
+    return counts
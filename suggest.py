@@ -0,0 +1,218 @@
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from flask import current_app
+from sqlalchemy import and_, func, select
+from db_routing import reads_own_writes
+from extensions import db
+from models import Space
+import catalogue
+
+
+# Autocomplete for GET /api/spaces/suggest.
+#
+# Each worker keeps sorted lists of the normalized (lowercased, accents and
+# punctuation stripped) titles and locations of the available spaces, plus
+# every word-start suffix of them, so "stu" finds "Downtown Photo Studio". A
+# lookup is a bisect to the first key at or after the prefix and a short walk
+# forward, so it takes microseconds however large the catalogue is.
+#
+# The lists follow the catalogue's search stamp, which only changes with
+# titles, locations and availability (see catalogue.py): at most every
+# CATALOGUE_CHECK_SECONDS, or right after this worker's own Space writes, a
+# request compares stamps. When they differ, a background thread rebuilds the
+# lists. Meanwhile requests keep using the previous lists for up to
+# CATALOGUE_MAX_STALE_SECONDS, unless they must read their own writes. Those,
+# and all requests before the first lists are ready, ask the database, which
+# matches whole-string prefixes on lower(title) and lower(location) through
+# the ix_spaces_*_prefix indexes.
+
+_SEPARATORS = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text):
+    """Search key for ``text``: "Café  Mêlée-Hall" becomes "cafe melee hall"."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+    return _SEPARATORS.sub(' ', text).strip()
+
+
+class _Table:
+    """Sorted search keys, each pointing at one of ``values``."""
+
+    def __init__(self, values, texts):
+        self.values = values
+        whole, words = [], []
+        for ref, text in enumerate(texts):
+            key = normalize(text)
+            if not key:
+                continue
+            whole.append((key, ref))
+            # normalize() leaves single spaces between words
+            words += [(key[i + 1:], ref) for i, c in enumerate(key) if c == ' ']
+        whole.sort()
+        words.sort()
+        self._whole = ([k for k, _ in whole], [r for _, r in whole])
+        self._words = ([k for k, _ in words], [r for _, r in words])
+
+    def lookup(self, prefix, limit):
+        """Values whose key starts with ``prefix``, then those with a later word that does, in key order."""
+        found = {}
+        for keys, refs in (self._whole, self._words):
+            i = bisect_left(keys, prefix)
+            while i < len(keys) and len(found) < limit and keys[i].startswith(prefix):
+                found.setdefault(refs[i], None)
+                i += 1
+        return [self.values[ref] for ref in found]
+
+
+class SuggestIndex:
+    def __init__(self, stamp, spaces):
+        self.stamp = stamp
+        self._titles = _Table([{'id': space_id, 'title': title} for space_id, title, _ in spaces],
+                              [title for _, title, _ in spaces])
+        # One entry per normalized location, spelled the way most spaces spell it
+        spellings = {}
+        for _, _, location in spaces:
+            spellings.setdefault(normalize(location), Counter())[location.strip()] += 1
+        locations = [counts.most_common(1)[0][0] for key, counts in sorted(spellings.items()) if key]
+        self._locations = _Table(locations, locations)
+
+    def suggest(self, prefix, limit):
+        key = normalize(prefix)
+        if not key:
+            return [], []
+        return self._titles.lookup(key, limit), self._locations.lookup(key, limit)
+
+
+def build(session=None):
+    session = session or db.session
+    stamp = catalogue.search_stamp(session)
+    spaces = session.execute(
+        select(Space.id, Space.title, Space.location).where(Space.is_available.is_(True))
+    ).all()
+    return SuggestIndex(stamp, spaces)
+
+
+class Suggester:
+    """A worker's suggestion index, rebuilt in the background when the search stamp moves."""
+
+    def __init__(self, check_interval=1.0, max_stale=30.0):
+        self.check_interval = check_interval
+        self.max_stale = max_stale
+        self._index = None
+        self._stamp = None
+        self._stale_since = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self._rebuilder = None
+
+    def invalidate(self):
+        self._next_check = 0.0
+
+    def index(self):
+        """
+        The index if it matches the database, or the previous one for a while
+        after a change unless the request must read its own writes; else None
+        (ask the database).
+        """
+        if time.monotonic() >= self._next_check:
+            self._check()
+        index = self._index
+        if index is None or self._stamp is None:
+            return None
+        if index.stamp == self._stamp:
+            return index
+        stale_since = self._stale_since
+        if stale_since is not None and time.monotonic() - stale_since < self.max_stale and not reads_own_writes():
+            return index
+        return None
+
+    def join(self, timeout=None):
+        """Wait for a rebuild in progress (for tests)."""
+        rebuilder = self._rebuilder
+        if rebuilder is not None:
+            rebuilder.join(timeout)
+
+    def _check(self):
+        # One thread checks; the others carry on with the current view
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            self._stamp = catalogue.search_stamp(db.session)
+            self._next_check = time.monotonic() + self.check_interval
+            if self._stamp is None or (self._index is not None and self._index.stamp == self._stamp):
+                self._stale_since = None
+                return
+            if self._stale_since is None:
+                self._stale_since = time.monotonic()
+            if self._rebuilder is None or not self._rebuilder.is_alive():
+                self._rebuilder = threading.Thread(target=self._rebuild, args=(current_app._get_current_object(),),
+                                                   name='suggest-rebuild', daemon=True)
+                self._rebuilder.start()
+        except Exception:
+            current_app.logger.warning("Suggestion index unavailable", exc_info=True)
+        finally:
+            self._lock.release()
+
+    def _rebuild(self, app):
+        with app.app_context():
+            try:
+                index = build()
+                self._index = index
+                if index.stamp == self._stamp:
+                    self._stale_since = None
+                else:
+                    self.invalidate()  # newer changes landed meanwhile
+            except Exception:
+                app.logger.warning("Suggestion index rebuild failed", exc_info=True)
+            finally:
+                db.session.remove()
+
+
+def _starts_with(column, prefix):
+    key = func.lower(column)
+    if db.engine.dialect.name == 'postgresql':
+        # Served by the text_pattern_ops index
+        escaped = re.sub(r'([\\%_])', r'\\\1', prefix)
+        return key.like(escaped + '%', escape='\\')
+    # A plain range scan of the lower() index
+    return and_(key >= prefix, key < prefix + '\U0010ffff')
+
+
+def from_database(prefix, limit):
+    """Whole-string prefix matches on the title and location, for when the index isn't ready."""
+    prefix = ' '.join(prefix.lower().split())
+    if not prefix:
+        return [], []
+    # `is_available = 1` rather than `IS 1`, so SQLite matches the partial indexes
+    titles = db.session.execute(
+        select(Space.id, Space.title)
+        .where(Space.is_available == True, _starts_with(Space.title, prefix))
+        .order_by(func.lower(Space.title), Space.id).limit(limit)
+    ).all()
+    locations = db.session.execute(
+        select(func.min(Space.location))
+        .where(Space.is_available == True, _starts_with(Space.location, prefix))
+        .group_by(func.lower(Space.location)).order_by(func.lower(Space.location)).limit(limit)
+    ).scalars().all()
+    return [{'id': space_id, 'title': title} for space_id, title in titles], locations
+
+
+def suggest(prefix, limit):
+    """``(titles, locations)`` starting with ``prefix``: ``[{"id", "title"}]`` and location names."""
+    suggester = current_app.extensions['suggest']
+    index = suggester.index()
+    if index is not None:
+        return index.suggest(prefix, limit)
+    return from_database(prefix, limit)
+
+
+def init_app(app):
+    app.config.setdefault('CATALOGUE_CHECK_SECONDS', 1.0)
+    app.config.setdefault('CATALOGUE_MAX_STALE_SECONDS', 30.0)
+    app.extensions['suggest'] = Suggester(app.config['CATALOGUE_CHECK_SECONDS'],
+                                          app.config['CATALOGUE_MAX_STALE_SECONDS'])
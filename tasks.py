@@ -0,0 +1,27 @@
+from sqlalchemy import update
+from extensions import db
+from integrations import cloudinary_uploader, send_mail
+from jobs import task
+from models import Space
+import catalogue
+
+
+# Handlers for the background jobs enqueued by the routes. Raising marks the
+# attempt as failed and schedules a retry.
+
+@task('send_mail')
+def send_mail_task(data):
+    """Send a Mailjet v3.1 payload built by the request handler."""
+    result = send_mail(data)
+    if result is not None and result.status_code != 200:
+        raise RuntimeError(f"Mailjet returned {result.status_code}: {result.json()}")
+
+
+@task('upload_space_image')
+def upload_space_image(space_id, source):
+    """Upload a space's image to Cloudinary and store the resulting URL."""
+    upload_result = cloudinary_uploader().upload(source, folder="spacer/spaces")
+    db.session.execute(
+        update(Space).where(Space.id == space_id).values(main_image_url=upload_result.get("secure_url"))
+    )
+    catalogue.mark_changed(db.session, space_id, searched=False)
@@ -2,6 +2,7 @@ import pytest
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))  # Add project root to path
+os.environ.setdefault('CATALOGUE_MAX_STALE_SECONDS', '0')  # tests expect listings to follow writes at once
 from app import create_app
 from extensions import db
 from flask_jwt_extended import create_access_token
@@ -12,6 +13,8 @@ def app():
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     app.config['TESTING'] = True
     app.config['WTF_CSRF_ENABLED'] = False
+    app.config['MAIL_SUPPRESS_SEND'] = True
+    app.config['RATELIMIT_ENABLED'] = False
     with app.app_context():
         db.create_all()
         yield app
@@ -0,0 +1,167 @@
+import gzip
+import json
+from datetime import datetime, timedelta
+
+
+def _old_and_recent_bookings(client):
+    """A client with one booking from 2020 (paid and invoiced) and one recent booking."""
+    from models import User, Space, Booking, Payment, Invoice
+    from extensions import db, bcrypt
+
+    owner = User(name="Archive Owner", email="archive-owner@example.com", password_hash="x", role="owner")
+    guest = User(name="Archive Client", email="archive-client@example.com",
+                 password_hash=bcrypt.generate_password_hash("pw").decode(), role="client")
+    db.session.add_all([owner, guest])
+    db.session.commit()
+    space = Space(owner_id=owner.id, title="Old Hall", description="d", location="Karen",
+                  capacity=10, price_per_hour=10, price_per_day=80)
+    db.session.add(space)
+    db.session.commit()
+    old = Booking(client_id=guest.id, space_id=space.id, start_datetime=datetime(2020, 1, 1, 9),
+                  end_datetime=datetime(2020, 1, 1, 11), status="confirmed")
+    recent = Booking(client_id=guest.id, space_id=space.id, start_datetime=datetime.utcnow(),
+                     end_datetime=datetime.utcnow() + timedelta(hours=2), status="pending")
+    db.session.add_all([old, recent])
+    db.session.commit()
+    db.session.add_all([
+        Payment(booking_id=old.id, client_id=guest.id, amount=20, payment_method="card",
+                payment_date=datetime(2020, 1, 1)),
+        Invoice(booking_id=old.id, client_id=guest.id, invoice_url="/invoices/1"),
+    ])
+    db.session.commit()
+
+    token = client.post("/api/login", json={"email": "archive-client@example.com", "password": "pw"}).get_json()["token"]
+    return {"Authorization": f"Bearer {token}"}, old.id, recent.id
+
+
+def test_archive_moves_old_bookings_to_cold_tables(client, db_session):
+    """Archived bookings leave the hot tables but stay readable with include_archived."""
+    import archive
+    from models import Booking, Payment, Invoice
+
+    headers, old_id, recent_id = _old_and_recent_bookings(client)
+
+    counts = archive.archive_bookings(archive.horizon(365))
+    assert counts == {"bookings": 1, "payments": 1, "invoices": 1}
+    assert [b.id for b in Booking.query.all()] == [recent_id]
+    assert Payment.query.count() == 0 and Invoice.query.count() == 0
+
+    res = client.get("/api/bookings", headers=headers)
+    assert [b["id"] for b in res.get_json()] == [recent_id]
+
+    res = client.get("/api/bookings?include_archived=true", headers=headers)
+    bookings = res.get_json()
+    assert [b["id"] for b in bookings] == [old_id, recent_id]
+    assert bookings[0]["archived"] is True
+    assert bookings[0]["start_datetime"] == "2020-01-01 09:00:00"
+
+
+def test_archive_to_ndjson(client, db_session, tmp_path):
+    import archive
+
+    _, old_id, _ = _old_and_recent_bookings(client)
+
+    archive.archive_bookings(archive.horizon(365), target="ndjson", directory=str(tmp_path))
+    with gzip.open(tmp_path / "bookings-2020-01.ndjson.gz", "rt") as f:
+        rows = [json.loads(line) for line in f]
+    assert [r["id"] for r in rows] == [old_id]
+    assert (tmp_path / "payments-2020-01.ndjson.gz").exists()
+
+
+def _waitlisted_space(client):
+    """A space with a pending booking tomorrow 09-17 and two clients waiting on parts of it."""
+    from models import User, Space, Booking
+    from extensions import db, bcrypt
+
+    pw = bcrypt.generate_password_hash("pw").decode()
+    owner = User(name="Wait Owner", email="wait-owner@example.com", password_hash=pw, role="owner")
+    booker = User(name="Booker", email="booker@example.com", password_hash=pw, role="client")
+    first = User(name="First", email="first@example.com", password_hash=pw, role="client")
+    second = User(name="Second", email="second@example.com", password_hash=pw, role="client")
+    db.session.add_all([owner, booker, first, second])
+    db.session.commit()
+    space = Space(owner_id=owner.id, title="Busy Loft", description="d", location="Kilimani",
+                  capacity=10, price_per_hour=10, price_per_day=80)
+    db.session.add(space)
+    db.session.commit()
+    day = (datetime.utcnow() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    booking = Booking(client_id=booker.id, space_id=space.id, start_datetime=day.replace(hour=9),
+                      end_datetime=day.replace(hour=17), status="pending", total_price=80)
+    db.session.add(booking)
+    db.session.commit()
+
+    def login(email):
+        token = client.post("/api/login", json={"email": email, "password": "pw"}).get_json()["token"]
+        return {"Authorization": f"Bearer {token}"}
+
+    # First and second both want the morning; second also waits for the afternoon
+    for email, start, end in (("first@example.com", 9, 12), ("second@example.com", 10, 13),
+                              ("second@example.com", 14, 16)):
+        res = client.post(f"/api/spaces/{space.id}/waitlist", headers=login(email), json={
+            "start_datetime": day.replace(hour=start).isoformat(),
+            "end_datetime": day.replace(hour=end).isoformat()})
+        assert res.status_code == 201
+    return login, booking.id, first.id, second.id
+
+
+def test_decline_offers_slot_to_waitlist_fifo(client, db_session):
+    from models import Booking, Job, WaitlistEntry
+
+    login, booking_id, first_id, second_id = _waitlisted_space(client)
+
+    res = client.patch(f"/api/owner/bookings/{booking_id}/decline", headers=login("wait-owner@example.com"))
+    assert res.get_json()["waitlist_offers"] == 2
+
+    offered = {(e.client_id, e.start_datetime.hour): e.status for e in WaitlistEntry.query.all()}
+    # The older 09-12 entry wins the morning; 10-13 overlaps it and keeps waiting
+    assert offered == {(first_id, 9): "offered", (second_id, 10): "waiting", (second_id, 14): "offered"}
+    pending = Booking.query.filter(Booking.id != booking_id).order_by(Booking.start_datetime).all()
+    assert [(b.client_id, b.status, b.duration_hours) for b in pending] == [
+        (first_id, "pending", 3), (second_id, "pending", 2)]
+    assert Job.query.filter_by(name="send_mail").count() == 2
+
+
+def test_waitlist_join_rejects_free_slot_and_cancel_frees_it(client, db_session):
+    login, booking_id, first_id, _ = _waitlisted_space(client)
+    headers = login("first@example.com")
+    tomorrow = datetime.utcnow() + timedelta(days=1)
+
+    res = client.post("/api/spaces/1/waitlist", headers=headers, json={
+        "start_datetime": tomorrow.replace(hour=18).isoformat(),
+        "end_datetime": tomorrow.replace(hour=19).isoformat()})
+    assert res.status_code == 409
+
+    res = client.patch(f"/api/bookings/{booking_id}/cancel", headers=login("booker@example.com"))
+    assert res.get_json()["waitlist_offers"] == 2
+
+    entries = client.get("/api/waitlist", headers=headers).get_json()
+    assert [e["status"] for e in entries] == ["offered"]
+    assert client.delete(f"/api/waitlist/{entries[0]['id']}", headers=headers).status_code == 409
+
+
+def test_booking_history_filters_and_pages(client, db_session):
+    from models import Booking
+    from extensions import db
+
+    headers, old_id, recent_id = _old_and_recent_bookings(client)
+    space_id = db.session.get(Booking, old_id).space_id
+    extra = Booking(client_id=db.session.get(Booking, old_id).client_id, space_id=space_id, status="declined",
+                    start_datetime=datetime(2021, 6, 1, 9), end_datetime=datetime(2021, 6, 1, 10))
+    db.session.add(extra)
+    db.session.commit()
+
+    res = client.get("/api/bookings?limit=2&view=summary", headers=headers)
+    body = res.get_json()
+    assert [b["id"] for b in body["bookings"]] == [recent_id, extra.id]  # newest first
+    assert body["bookings"][1] == {
+        "id": extra.id, "space_id": space_id, "space_title": "Old Hall", "client_id": extra.client_id,
+        "start_datetime": "2021-06-01 09:00:00", "end_datetime": "2021-06-01 10:00:00",
+        "duration_hours": None, "total_price": None, "status": "declined"}
+
+    res = client.get(f"/api/bookings?limit=2&view=summary&cursor={body['next_cursor']}", headers=headers)
+    assert [b["id"] for b in res.get_json()["bookings"]] == [old_id]
+    assert res.get_json()["next_cursor"] is None
+
+    res = client.get("/api/bookings?status=confirmed,declined&from=2020-06-01&order=asc", headers=headers)
+    assert [b["id"] for b in res.get_json()["bookings"]] == [extra.id]
+    assert client.get("/api/bookings?status=lost", headers=headers).status_code == 400
@@ -0,0 +1,92 @@
+import fcntl
+import os
+
+import pytest
+from sqlalchemy import event
+
+from catalogue import Catalogue
+
+
+@pytest.fixture
+def snapshot_catalogue(app, tmp_path):
+    previous = app.extensions.get("catalogue")
+    app.extensions["catalogue"] = Catalogue(str(tmp_path / "catalogue.snapshot"), check_interval=60, max_stale=30)
+    yield app.extensions["catalogue"]
+    app.extensions["catalogue"] = previous
+
+
+def _owner_with_space(client, email):
+    from models import User, Space
+    from extensions import db, bcrypt
+
+    owner = User(name="Snap Owner", email=email, role="owner",
+                 password_hash=bcrypt.generate_password_hash("pw").decode())
+    db.session.add(owner)
+    db.session.commit()
+    space = Space(owner_id=owner.id, title="Snap Hall", description="d", location="Snap",
+                  capacity=10, price_per_hour=10, price_per_day=80)
+    space.set_amenities(["WiFi", "Projector"])
+    db.session.add(space)
+    db.session.commit()
+    token = client.post("/api/login", json={"email": email, "password": "pw"}).get_json()["token"]
+    return {"Authorization": f"Bearer {token}"}, space.id
+
+
+def test_listings_are_served_from_the_snapshot(client, db_session, app, snapshot_catalogue):
+    owner, space_id = _owner_with_space(client, "snap-list@example.com")
+    app.extensions["catalogue"] = None
+    from_db = client.get("/api/spaces").get_json()
+    facets_from_db = client.get("/api/spaces?amenities=wifi&facets=true").get_json()
+    app.extensions["catalogue"] = snapshot_catalogue
+
+    # The first request is answered from the database while the snapshot builds
+    assert client.get("/api/spaces").get_json() == from_db
+    snapshot_catalogue.join()
+    assert os.path.exists(snapshot_catalogue.path)
+
+    from extensions import db
+    seen = []
+
+    def record(conn, cursor, statement, *args):
+        seen.append(statement)
+
+    # Within the check interval nothing touches the database
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        assert client.get("/api/spaces").get_json() == from_db
+        assert client.get("/api/spaces?amenities=wifi&facets=true").get_json() == facets_from_db
+        assert client.get(f"/api/spaces/{space_id}").get_json()["title"] == "Snap Hall"
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert seen == []
+
+
+def test_space_writes_refresh_the_snapshot(client, db_session, app, snapshot_catalogue):
+    from catalogue import current_stamp
+    from extensions import db
+    from models import Space
+
+    owner, space_id = _owner_with_space(client, "snap-write@example.com")
+    assert client.get(f"/api/spaces/{space_id}").get_json()["title"] == "Snap Hall"
+    snapshot_catalogue.join()
+    stamp = snapshot_catalogue.snapshot().stamp
+
+    # Fields the snapshot doesn't serve leave the stamp alone
+    db.session.get(Space, space_id).geohash = "s0000000"
+    db.session.commit()
+    assert current_stamp(db.session) == stamp
+
+    # The writer reads its own write at once; others get the previous snapshot until the rebuild lands
+    with open(f"{snapshot_catalogue.path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)  # another worker is rebuilding
+        client.patch(f"/api/spaces/{space_id}", headers=owner, json={"title": "Snap Hall II"})
+        assert client.get(f"/api/spaces/{space_id}").get_json()["title"] == "Snap Hall II"
+        snapshot_catalogue.join()
+        with app.test_client() as other:
+            assert other.get(f"/api/spaces/{space_id}").get_json()["title"] == "Snap Hall"
+    snapshot_catalogue.invalidate()
+    client.get(f"/api/spaces/{space_id}")
+    snapshot_catalogue.join()
+    assert snapshot_catalogue.snapshot().stamp != stamp
+    with app.test_client() as other:
+        assert other.get(f"/api/spaces/{space_id}").get_json()["title"] == "Snap Hall II"
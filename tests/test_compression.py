@@ -0,0 +1,72 @@
+import gzip
+
+from flask import Flask, Response
+
+import compression
+from compression import CompressedCache
+
+
+def _space(db_session, title):
+    from models import User, Space
+    from extensions import db, bcrypt
+
+    owner = User(name="Zip Owner", email=f"{title}@example.com", role="owner",
+                 password_hash=bcrypt.generate_password_hash("pw").decode())
+    db.session.add(owner)
+    db.session.commit()
+    space = Space(owner_id=owner.id, title=title, description="d" * 2000, location="Zip",
+                  capacity=5, price_per_hour=10, price_per_day=70)
+    db.session.add(space)
+    db.session.commit()
+    return space.id
+
+
+def test_large_responses_are_gzipped_and_cached_by_etag(client, db_session):
+    space_id = _space(db_session, "ziphall")
+    cache = client.application.extensions["compression_cache"]
+    # Let the catalogue snapshot catch up so every response below comes from it
+    client.get(f"/api/spaces/{space_id}")
+    client.application.extensions["catalogue"].join()
+
+    plain = client.get(f"/api/spaces/{space_id}")
+    assert "Content-Encoding" not in plain.headers
+    assert plain.headers["Vary"] == "Accept-Encoding"
+
+    first = client.get(f"/api/spaces/{space_id}", headers={"Accept-Encoding": "gzip"})
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert first.headers["ETag"] == "W/" + plain.headers["ETag"]
+    assert gzip.decompress(first.data) == plain.data
+    cached = len(cache)
+
+    again = client.get(f"/api/spaces/{space_id}", headers={"Accept-Encoding": "gzip"})
+    assert again.data == first.data and len(cache) == cached
+
+    unchanged = client.get(f"/api/spaces/{space_id}", headers={
+        "Accept-Encoding": "gzip", "If-None-Match": first.headers["ETag"]})
+    assert unchanged.status_code == 304
+
+
+def test_small_and_streamed_responses(client):
+    small = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+
+    app = Flask(__name__)
+    compression.init_app(app)
+
+    @app.route("/stream")
+    def _stream():
+        return Response(iter(['{"a": ', '1}']), mimetype="application/json")
+
+    res = app.test_client().get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(res.data) == b'{"a": 1}'
+
+
+def test_cache_evicts_least_recently_used_by_size():
+    cache = CompressedCache(max_bytes=10)
+    cache.put(("a", "gzip"), b"12345")
+    cache.put(("b", "gzip"), b"12345")
+    cache.get(("a", "gzip"))
+    cache.put(("c", "gzip"), b"123")
+    assert cache.get(("b", "gzip")) is None
+    assert cache.get(("a", "gzip")) == b"12345" and cache.size == 8
@@ -0,0 +1,11 @@
+def test_sequential_scans_flags_unindexed_filters(app):
+    """The audit sees index lookups as clean and full scans under a filter as flagged."""
+    from db_audit import sequential_scans
+
+    assert sequential_scans("SELECT * FROM spaces WHERE owner_id = ?", (1,)) == []
+    assert sequential_scans("SELECT * FROM spaces WHERE title = ?", ("x",)) == [
+        {"table": "spaces", "filtered": True, "rows": None}
+    ]
+    assert sequential_scans("SELECT * FROM bookings", ()) == [
+        {"table": "bookings", "filtered": False, "rows": None}
+    ]
@@ -0,0 +1,122 @@
+import json
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from events import LocalBroker, RedisBroker
+
+
+def _booking(client):
+    from models import User, Space, Booking
+    from extensions import db, bcrypt
+
+    pw = bcrypt.generate_password_hash("pw").decode()
+    owner = User(name="Live Owner", email="live-owner@example.com", password_hash=pw, role="owner")
+    guest = User(name="Live Client", email="live-client@example.com", password_hash=pw, role="client")
+    db.session.add_all([owner, guest])
+    db.session.commit()
+    space = Space(owner_id=owner.id, title="Live Hall", description="d", location="CBD",
+                  capacity=10, price_per_hour=10, price_per_day=80)
+    db.session.add(space)
+    db.session.commit()
+    start = datetime.utcnow() + timedelta(days=3)
+    booking = Booking(client_id=guest.id, space_id=space.id, start_datetime=start,
+                      end_datetime=start + timedelta(hours=2), status="pending")
+    db.session.add(booking)
+    db.session.commit()
+
+    def login(email):
+        return client.post("/api/login", json={"email": email, "password": "pw"}).get_json()["token"]
+    return login, booking.id
+
+
+def _events(chunks):
+    """Decode the SSE ``event``/``data`` chunks, skipping keep-alives and the retry hint."""
+    for chunk in chunks:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith("event:"):
+            kind, data = chunk.strip().split("\n")
+            yield kind.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+def test_decline_is_pushed_to_client_and_owner_streams(client, db_session, monkeypatch):
+    monkeypatch.setitem(client.application.config, "EVENTS_HEARTBEAT_SECONDS", 0.1)
+    monkeypatch.setitem(client.application.config, "EVENTS_MAX_STREAM_SECONDS", 1)
+    login, booking_id = _booking(client)
+    owner_token = login("live-owner@example.com")
+
+    # EventSource can't set headers, so the token goes in the query string
+    streams = [client.get(f"/api/events?jwt={token}", buffered=False)
+               for token in (login("live-client@example.com"), owner_token)]
+    assert streams[0].mimetype == "text/event-stream"
+
+    res = client.patch(f"/api/owner/bookings/{booking_id}/decline",
+                       headers={"Authorization": f"Bearer {owner_token}"})
+    assert res.status_code == 200
+
+    for stream in streams:
+        kind, payload = next(_events(stream.response))
+        assert kind == "booking"
+        assert (payload["id"], payload["status"]) == (booking_id, "declined")
+        stream.close()
+    assert not client.application.extensions["events"]._subscribers
+
+
+def test_rolled_back_changes_are_not_published(app, db_session):
+    from models import Booking
+    from extensions import db
+
+    broker = app.extensions["events"]
+    subscription = broker.subscribe(["user:1", "space:1"])
+    try:
+        db.session.add(Booking(client_id=1, space_id=1, start_datetime=datetime(2030, 1, 1),
+                               end_datetime=datetime(2030, 1, 2)))
+        db.session.flush()
+        db.session.rollback()
+        assert subscription.empty()
+    finally:
+        broker.unsubscribe(["user:1", "space:1"], subscription)
+
+
+def test_redis_broker_fans_out_across_workers():
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    publisher = RedisBroker(fakeredis.FakeRedis(server=server))
+    listener = RedisBroker(fakeredis.FakeRedis(server=server))
+
+    subscription = listener.subscribe(["user:7"])
+    # Wait for the listener thread's SUBSCRIBE before publishing
+    deadline = time.monotonic() + 2
+    while not publisher.client.pubsub_numsub("events")[0][1] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    publisher.publish({"user:7", "space:8"}, {"type": "booking", "id": 1})
+    assert subscription.get(timeout=2) == {"type": "booking", "id": 1}
+
+
+def test_slow_streams_drop_events_instead_of_blocking():
+    broker = LocalBroker(queue_size=1)
+    subscription = broker.subscribe(["user:1", "space:2"])
+    broker.publish(["user:1", "space:2"], {"n": 1})  # delivered once
+    broker.publish(["user:1"], {"n": 2})
+    assert subscription.get_nowait() == {"n": 1} and subscription.empty()
+
+
+def test_streams_are_refused_on_sync_workers_and_capped_on_threaded_ones(client, db_session, monkeypatch):
+    from events import StreamSlots
+
+    monkeypatch.setitem(client.application.config, "EVENTS_MAX_STREAM_SECONDS", 1)
+    login, _ = _booking(client)
+    url = f"/api/events?jwt={login('live-client@example.com')}"
+
+    # gunicorn's sync worker: one request per process at a time
+    sync = client.get(url, environ_overrides={"wsgi.multiprocess": True, "wsgi.multithread": False})
+    assert sync.status_code == 503 and sync.headers["Retry-After"]
+
+    monkeypatch.setitem(client.application.extensions, "event_streams", StreamSlots(1))
+    first = client.get(url, buffered=False)
+    assert first.status_code == 200
+    assert client.get(url).status_code == 503
+    first.close()
+    second = client.get(url, buffered=False)
+    assert second.status_code == 200
+    second.close()
@@ -0,0 +1,35 @@
+import geo
+
+
+def test_encode_known_geohash():
+    assert geo.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+
+
+def test_decode_round_trip():
+    lat, lng = geo.decode(geo.encode(-1.2864, 36.8172))
+    assert abs(lat + 1.2864) < 1e-4
+    assert abs(lng - 36.8172) < 1e-4
+
+
+def test_covering_prefixes_contain_nearby_points():
+    """Every point inside the radius falls in one of the covering cells."""
+    center = (-1.2864, 36.8172)
+    prefixes = geo.covering_prefixes(*center, radius_km=5)
+    for dlat, dlng in [(0.04, 0), (-0.04, 0), (0, 0.04), (0, -0.04), (0.03, 0.03)]:
+        point = (center[0] + dlat, center[1] + dlng)
+        assert geo.haversine_km(*center, *point) <= 5
+        assert any(geo.encode(*point).startswith(p) for p in prefixes)
+
+
+def test_prefix_upper_bound():
+    assert geo.prefix_upper_bound("kzf") == "kzg"
+    assert geo.prefix_upper_bound("kzz") == "m"
+    assert geo.prefix_upper_bound("zz") is None
+
+
+def test_geocode_against_gazetteer():
+    gazetteer = {"westlands": (-1.2676, 36.8108), "nairobi": (-1.2921, 36.8219),
+                 "nairobi cbd": (-1.2864, 36.8172)}
+    assert geo.geocode("Westlands", gazetteer) == (-1.2676, 36.8108)
+    assert geo.geocode("3rd floor, Nairobi CBD", gazetteer) == (-1.2864, 36.8172)
+    assert geo.geocode("Atlantis", gazetteer) is None
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import pytest
+
+import jobs
+from extensions import db
+from models import Job
+
+
+def test_register_queues_welcome_email(client, db_session):
+    res = client.post("/api/register", json={"name": "Queued", "email": "queued@example.com", "password": "pw"})
+    assert res.status_code == 201
+
+    job = Job.query.filter_by(name="send_mail").one()
+    assert job.status == "queued"
+    assert "queued@example.com" in job.payload
+
+    assert jobs.work(burst=True) == 1
+    assert db.session.get(Job, job.id).status == "done"
+
+
+@pytest.fixture
+def flaky_task():
+    """A "flaky" task that always fails, registered for one test; yields its calls."""
+    calls = []
+
+    @jobs.task("flaky")
+    def flaky(n):
+        calls.append(n)
+        raise RuntimeError("upstream down")
+
+    yield calls
+    jobs.TASKS.pop("flaky", None)
+
+
+def test_failed_jobs_are_retried_then_marked_failed(app, db_session, flaky_task):
+    calls = flaky_task
+    job = jobs.enqueue("flaky", {"n": 1}, max_attempts=2)
+    db.session.commit()
+
+    jobs.work(burst=True)
+    db.session.refresh(job)
+    assert (job.status, job.attempts) == ("queued", 1)
+    assert job.run_at > datetime.utcnow()  # backed off
+    assert "upstream down" in job.last_error
+
+    job.run_at = datetime.utcnow()
+    db.session.commit()
+    jobs.work(burst=True)
+    db.session.refresh(job)
+    assert (job.status, job.attempts) == ("failed", 2)
+    assert calls == [1, 1]
+
+
+def test_scheduled_jobs_wait_until_due(app, db_session):
+    jobs.enqueue("send_mail", {"data": {}}, delay=60)
+    db.session.commit()
+
+    assert jobs.work(burst=True) == 0
+    assert jobs.stats() == {"queued": 1}
@@ -0,0 +1,42 @@
+import json
+import logging
+import sys
+
+from applog import JsonFormatter, SamplingFilter
+
+
+def _record(name="spacer.test", level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_request_id_is_echoed_or_generated(client):
+    sent = client.get("/", headers={"X-Request-ID": "abc123"})
+    assert sent.headers["X-Request-ID"] == "abc123"
+
+    generated = client.get("/").headers["X-Request-ID"]
+    assert len(generated) == 32 and generated != client.get("/").headers["X-Request-ID"]
+
+
+def test_json_formatter_includes_request_id_extras_and_exception():
+    record = _record(request_id="abc123", status=201)
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record.exc_info = sys.exc_info()
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["msg"] == "hello world"
+    assert entry["level"] == "INFO" and entry["logger"] == "spacer.test"
+    assert entry["request_id"] == "abc123"
+    assert entry["status"] == 201
+    assert "ValueError: boom" in entry["exc"]
+
+
+def test_sampling_by_logger_then_level():
+    sampler = SamplingFilter({"spacer.access": 0, "DEBUG": 0})
+    assert not sampler.filter(_record(name="spacer.access"))
+    assert not sampler.filter(_record(level=logging.DEBUG))
+    assert sampler.filter(_record(level=logging.WARNING))
+    assert all(SamplingFilter({"spacer.access": 1}).filter(_record(name="spacer.access")) for _ in range(20))
@@ -0,0 +1,80 @@
+import pytest
+from ratelimit import MemoryBackend, RedisBackend, parse_limit
+
+
+@pytest.fixture
+def limited(app, monkeypatch):
+    """Turn rate limiting on with a fresh in-memory store for one test."""
+    monkeypatch.setitem(app.config, "RATELIMIT_ENABLED", True)
+    monkeypatch.setitem(app.extensions, "ratelimit", MemoryBackend())
+    return app
+
+
+def test_login_is_throttled_per_account(client, limited, monkeypatch):
+    monkeypatch.setitem(limited.config, "RATELIMITS", {"login": {"ip": "100/minute", "account": "2/minute"}})
+    attempt = {"email": "victim@example.com", "password": "wrong"}
+
+    assert client.post("/api/login", json=attempt).status_code == 401
+    assert client.post("/api/login", json=attempt).status_code == 401
+    res = client.post("/api/login", json=attempt)
+    assert res.status_code == 429
+    assert 1 <= int(res.headers["Retry-After"]) <= 30
+
+    # Other accounts from the same IP are unaffected
+    other = {"email": "someone@example.com", "password": "wrong"}
+    assert client.post("/api/login", json=other).status_code == 401
+
+    # Bodies that aren't objects have no account; validation rejects them
+    for body in ([1], "x"):
+        assert client.post("/api/login", json=body).status_code == 400
+
+
+def test_register_is_throttled_per_ip(client, limited, monkeypatch):
+    monkeypatch.setitem(limited.config, "RATELIMITS", {"register": {"ip": "1/hour"}})
+
+    first = client.post("/api/register", json={"name": "A", "email": "rl-a@example.com", "password": "pw"})
+    assert first.status_code == 201
+    res = client.post("/api/register", json={"name": "B", "email": "rl-b@example.com", "password": "pw"})
+    assert res.status_code == 429
+    assert int(res.headers["Retry-After"]) > 3000
+
+
+def test_register_is_throttled_per_forwarded_client(client, limited, monkeypatch):
+    monkeypatch.setitem(limited.config, "RATELIMITS", {"register": {"ip": "1/hour"}})
+
+    # Both come through the same router address; the limit is per forwarded client
+    for n, ip in enumerate(["203.0.113.1", "203.0.113.2"]):
+        res = client.post("/api/register", headers={"X-Forwarded-For": ip},
+                          json={"name": "F", "email": f"rl-fwd-{n}@example.com", "password": "pw"})
+        assert res.status_code == 201
+    res = client.post("/api/register", headers={"X-Forwarded-For": "203.0.113.1"},
+                      json={"name": "F", "email": "rl-fwd-x@example.com", "password": "pw"})
+    assert res.status_code == 429
+
+
+def test_rejected_account_does_not_spend_ip_tokens():
+    backend = MemoryBackend()
+    ip, account = ("ip", *parse_limit("2/minute")), ("account", *parse_limit("1/minute"))
+
+    assert backend.take([ip, account]) == 0
+    assert backend.take([ip, account]) > 0
+    # The rejected attempt left the IP's second token in place
+    assert backend.take([ip, ("other", *parse_limit("1/minute"))]) == 0
+
+
+def test_redis_backend_is_shared_between_workers():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+
+    server = fakeredis.FakeServer()
+    worker_a = RedisBackend(fakeredis.FakeRedis(server=server))
+    worker_b = RedisBackend(fakeredis.FakeRedis(server=server))
+    capacity, rate = parse_limit("2/minute")
+
+    assert worker_a.take([("rl:login:ip:1.2.3.4", capacity, rate)]) == 0
+    assert worker_b.take([("rl:login:ip:1.2.3.4", capacity, rate)]) == 0
+    assert worker_a.take([("rl:login:ip:1.2.3.4", capacity, rate)]) == pytest.approx(30, abs=1)
+    assert worker_b.take([("rl:login:ip:5.6.7.8", capacity, rate)]) == 0
+    # All or nothing across buckets
+    assert worker_a.take([("rl:login:ip:5.6.7.8", capacity, rate), ("rl:login:ip:1.2.3.4", capacity, rate)]) > 0
+    assert worker_b.take([("rl:login:ip:5.6.7.8", capacity, rate)]) == 0
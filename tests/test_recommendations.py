@@ -0,0 +1,109 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import recommendations
+from recommendations import Recommender, SimilarityIndex, build
+
+
+def _space(id, title, description, amenities, capacity=20, price=50, available=True):
+    return SimpleNamespace(id=id, title=title, description=description, amenities=amenities,
+                           capacity=capacity, price_per_hour=price, is_available=available)
+
+
+SPACES = [
+    _space(1, "Rooftop Photo Studio", "Natural light studio for photo shoots", '["Lighting", "Backdrop"]'),
+    _space(2, "Downtown Photo Studio", "Studio with backdrops and lighting for shoots", "Lighting, Backdrop"),
+    _space(3, "Boardroom", "Quiet meeting room with a large table", '["Projector", "WiFi"]', 12, 40),
+    _space(4, "Meeting Room", "Meeting room with a whiteboard", '["Projector", "Wi-Fi"]', 10, 45),
+]
+
+
+def test_similarity_index_ranks_and_updates():
+    index = SimilarityIndex.fit(SPACES)
+
+    assert index.similar(SPACES[0], 1)[0][0] == 2
+    assert index.similar(SPACES[2], 1)[0][0] == 4
+    scores = [score for _, score in index.similar(SPACES[0], 3)]
+    assert scores == sorted(scores, reverse=True) and scores[0] <= 1.0001
+
+    # Changes make a new index: a changed space moves, an unavailable one drops out
+    updated = index.with_changes([_space(3, "Photo Studio Loft", "Studio for photo shoots", '["Lighting", "Backdrop"]'),
+                                  _space(2, "Downtown Photo Studio", "", None, available=False)])
+    assert [space_id for space_id, _ in updated.similar(SPACES[0], 3)][0] == 3
+    assert 2 not in [space_id for space_id, _ in updated.similar(SPACES[0], 3)]
+    assert updated.changed == {2, 3}
+    # ...and leave the one requests may still be reading alone
+    assert index.similar(SPACES[0], 1)[0][0] == 2 and index.changed == set()
+
+
+def test_similarity_index_save_and_load(tmp_path):
+    index = SimilarityIndex.fit(SPACES)
+    path = str(tmp_path / "similar.npz")
+    index.save(path)
+    loaded = SimilarityIndex.load(path)
+    assert loaded.dimensions == index.dimensions
+    assert loaded.similar(SPACES[0], 3) == index.similar(SPACES[0], 3)
+
+
+@pytest.fixture
+def fresh_recommender(app):
+    previous = app.extensions["recommendations"]
+    app.extensions["recommendations"] = Recommender(refresh_interval=0)
+    yield app.extensions["recommendations"]
+    app.extensions["recommendations"] = previous
+
+
+def test_similar_spaces_endpoint(client, db_session, fresh_recommender, monkeypatch):
+    from models import User, Space
+    from extensions import db
+
+    owner = User(name="Rec Owner", email="rec-owner@example.com", role="owner", password_hash="x")
+    db.session.add(owner)
+    db.session.commit()
+    rows = []
+    for s in SPACES:
+        space = Space(owner_id=owner.id, title=s.title, description=s.description, location="Nairobi",
+                      capacity=s.capacity, price_per_hour=s.price_per_hour, price_per_day=s.price_per_hour * 8)
+        space.set_amenities(s.amenities)
+        rows.append(space)
+    db.session.add_all(rows)
+    db.session.commit()
+
+    # Until the background fit is done, the database answers: same location, closest capacity
+    release = threading.Event()
+
+    def held_build(dimensions=256):
+        release.wait(5)
+        return build(dimensions)
+
+    monkeypatch.setattr(recommendations, "build", held_build)
+    body = client.get(f"/api/spaces/{rows[0].id}/similar?limit=3").get_json()
+    assert [s["id"] for s in body["similar"]] == [rows[1].id, rows[2].id, rows[3].id]
+    assert body["similar"][0]["score"] is None
+    release.set()
+    fresh_recommender.join()
+
+    res = client.get(f"/api/spaces/{rows[0].id}/similar?limit=2")
+    assert res.status_code == 200
+    body = res.get_json()
+    assert body["space_id"] == rows[0].id
+    assert len(body["similar"]) == 2 and body["similar"][0]["id"] == rows[1].id
+    assert "score" in body["similar"][0]
+
+    # A new space is picked up by the next refresh; a hidden one is no longer suggested
+    fresh_recommender.join()  # a refresh started above must not race the changes
+    rows[1].is_available = False
+    extra = Space(owner_id=owner.id, title="Sunny Photo Studio", description="Photo shoots with natural light",
+                  location="Nairobi", capacity=20, price_per_hour=50, price_per_day=400)
+    extra.set_amenities(["Lighting", "Backdrop"])
+    db.session.add(extra)
+    db.session.commit()
+    client.get(f"/api/spaces/{rows[0].id}/similar")
+    fresh_recommender.join()
+    ids = [s["id"] for s in client.get(f"/api/spaces/{rows[0].id}/similar").get_json()["similar"]]
+    assert ids[0] == extra.id and rows[1].id not in ids
+
+    assert client.get(f"/api/spaces/{rows[0].id}/similar?limit=0").status_code == 400
+    assert client.get("/api/spaces/999999/similar").status_code == 404
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+import pytest
+
+import recurrence
+
+
+def test_weekly_byday_expands_lazily():
+    rule = recurrence.parse_rrule("FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,WE")
+    start = datetime(2030, 1, 2, 9)  # a Wednesday
+    # No COUNT/UNTIL: the generator is endless, callers take what they need
+    assert list(islice(recurrence.occurrences(rule, start), 4)) == [
+        datetime(2030, 1, 2, 9), datetime(2030, 1, 14, 9), datetime(2030, 1, 16, 9), datetime(2030, 1, 28, 9)]
+
+
+def test_monthly_skips_short_months_and_stops_at_until():
+    rule = recurrence.parse_rrule("FREQ=MONTHLY;UNTIL=20300531")
+    assert list(recurrence.occurrences(rule, datetime(2030, 1, 31, 18))) == [
+        datetime(2030, 1, 31, 18), datetime(2030, 3, 31, 18), datetime(2030, 5, 31, 18)]
+
+
+@pytest.mark.parametrize("text", ["FREQ=DAILY;INTERVAL=100000000", "FREQ=WEEKLY;INTERVAL=100000000",
+                                  "FREQ=MONTHLY;INTERVAL=200000"])
+def test_huge_intervals_end_at_the_calendar_limit(text):
+    start = datetime(2030, 1, 31, 18)
+    assert list(recurrence.occurrences(recurrence.parse_rrule(text), start)) == [start]
+
+
+@pytest.mark.parametrize("text", ["FREQ=YEARLY", "FREQ=DAILY;BYDAY=MO", "FREQ=WEEKLY;COUNT=2;UNTIL=20300101",
+                                  "FREQ=WEEKLY;BYHOUR=9", "FREQ=WEEKLY;INTERVAL=0", ""])
+def test_unsupported_rules_are_rejected(text):
+    with pytest.raises(ValueError):
+        recurrence.parse_rrule(text)
+
+
+def _client_and_space(client):
+    from models import User, Space, Booking
+    from extensions import db, bcrypt
+
+    pw = bcrypt.generate_password_hash("pw").decode()
+    owner = User(name="Series Owner", email="series-owner@example.com", password_hash=pw, role="owner")
+    team = User(name="Team", email="team@example.com", password_hash=pw, role="client")
+    db.session.add_all([owner, team])
+    db.session.commit()
+    space = Space(owner_id=owner.id, title="Standup Room", description="d", location="Westlands",
+                  capacity=8, price_per_hour=15, price_per_day=100)
+    db.session.add(space)
+    db.session.commit()
+
+    monday = (datetime.utcnow() + timedelta(days=7)).replace(hour=9, minute=0, second=0, microsecond=0)
+    monday -= timedelta(days=monday.weekday())
+    # Someone already has the third Monday
+    db.session.add(Booking(client_id=owner.id, space_id=space.id, status="confirmed",
+                           start_datetime=monday + timedelta(weeks=2, hours=1),
+                           end_datetime=monday + timedelta(weeks=2, hours=3)))
+    db.session.commit()
+
+    token = client.post("/api/login", json={"email": "team@example.com", "password": "pw"}).get_json()["token"]
+    return {"Authorization": f"Bearer {token}"}, space.id, monday
+
+
+def test_recurring_booking_checks_conflicts_and_bulk_inserts(client, db_session):
+    from models import Booking
+
+    headers, space_id, monday = _client_and_space(client)
+    body = {"space_id": space_id, "rrule": "FREQ=WEEKLY;COUNT=4",
+            "start_datetime": monday.isoformat(), "end_datetime": (monday + timedelta(hours=2)).isoformat()}
+
+    res = client.post("/api/bookings/recurring", headers=headers, json=body)
+    assert res.status_code == 409
+    assert [c["start_datetime"] for c in res.get_json()["conflicts"]] == [(monday + timedelta(weeks=2)).isoformat()]
+    assert Booking.query.filter(Booking.series_id.isnot(None)).count() == 0
+
+    res = client.post("/api/bookings/recurring", headers=headers, json={**body, "skip_conflicts": True})
+    assert res.status_code == 201
+    assert (res.get_json()["bookings_created"], res.get_json()["conflicts_skipped"]) == (3, 1)
+    series_id = res.get_json()["series"]["id"]
+    booked = Booking.query.filter_by(series_id=series_id).order_by(Booking.start_datetime).all()
+    assert [b.start_datetime for b in booked] == [monday, monday + timedelta(weeks=1), monday + timedelta(weeks=3)]
+    assert {(b.duration_hours, b.total_price, b.status) for b in booked} == {(2, 30, "pending")}
+
+    res = client.patch(f"/api/bookings/recurring/{series_id}/cancel", headers=headers)
+    assert res.get_json()["bookings_cancelled"] == 3
+
+    # Times with a UTC offset are stored as naive UTC
+    nairobi = timezone(timedelta(hours=3))
+    start = (monday + timedelta(hours=3)).replace(tzinfo=nairobi)
+    res = client.post("/api/bookings/recurring", headers=headers, json={
+        **body, "rrule": "FREQ=DAILY;COUNT=1", "start_datetime": start.isoformat(),
+        "end_datetime": (start + timedelta(hours=1)).isoformat()})
+    assert res.status_code == 201
+    booked = Booking.query.filter_by(series_id=res.get_json()["series"]["id"]).one()
+    assert booked.start_datetime == monday
+
+
+def test_extend_materializes_only_up_to_horizon(client, db_session):
+    from models import Booking, BookingSeries
+
+    headers, space_id, monday = _client_and_space(client)
+    client.application.config["RECURRING_HORIZON_DAYS"] = 20
+    try:
+        res = client.post("/api/bookings/recurring", headers=headers, json={
+            "space_id": space_id, "rrule": "FREQ=DAILY", "skip_conflicts": True,
+            "start_datetime": monday.isoformat(), "end_datetime": (monday + timedelta(hours=1)).isoformat()})
+    finally:
+        client.application.config["RECURRING_HORIZON_DAYS"] = 90
+    series = BookingSeries.query.get(res.get_json()["series"]["id"])
+    first_batch = Booking.query.filter_by(series_id=series.id).count()
+    assert 0 < first_batch < 21
+
+    created, skipped = recurrence.extend_series(30)
+    assert created == Booking.query.filter_by(series_id=series.id).count() - first_batch > 0
+    assert (skipped, recurrence.extend_series(30)) == (0, (0, 0))
+
+
+def test_recurring_booking_rejects_past_starts_and_caps_occurrences(client, db_session, monkeypatch):
+    from models import Booking, BookingSeries
+
+    headers, space_id, monday = _client_and_space(client)
+    past = datetime(1900, 1, 1, 9)
+    res = client.post("/api/bookings/recurring", headers=headers, json={
+        "space_id": space_id, "rrule": "FREQ=DAILY",
+        "start_datetime": past.isoformat(), "end_datetime": (past + timedelta(hours=1)).isoformat()})
+    assert res.status_code == 400
+    assert BookingSeries.query.count() == 0
+
+    monkeypatch.setitem(client.application.config, "RECURRING_MAX_OCCURRENCES", 5)
+    res = client.post("/api/bookings/recurring", headers=headers, json={
+        "space_id": space_id, "rrule": "FREQ=DAILY", "skip_conflicts": True,
+        "start_datetime": monday.isoformat(), "end_datetime": (monday + timedelta(hours=1)).isoformat()})
+    assert res.get_json()["bookings_created"] == 5
+    series = BookingSeries.query.get(res.get_json()["series"]["id"])
+    # The horizon stops at the first occurrence left out, for the next extend
+    assert series.materialized_until == monday + timedelta(days=5)
+
+    created, _ = recurrence.extend_series(90, limit=5)
+    assert created == 5
+    assert Booking.query.filter_by(series_id=series.id).count() == 10
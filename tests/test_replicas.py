@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import insert
+from app import create_app
+from extensions import db
+from models import Space
+
+
+@pytest.fixture(autouse=True)
+def forget_replica_bind():
+    # Flask-SQLAlchemy keeps one metadata per bind key on the shared db
+    # object; drop ours so other apps' create_all/drop_all don't look for it
+    yield
+    db.metadatas.pop("replica_0", None)
+
+
+def make_app(tmp_path, monkeypatch, **env):
+    """An app with a primary and one replica, each its own SQLite file."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setenv("DATABASE_REPLICA_URLS", f"sqlite:///{tmp_path / 'replica.db'}")
+    for key, value in env.items():
+        monkeypatch.setenv(key, value)
+    app = create_app()
+    app.config["MAIL_SUPPRESS_SEND"] = True
+    with app.app_context():
+        db.create_all()
+        db.metadata.create_all(db.engines["replica_0"])
+        # Only the replica knows about this space
+        with db.engines["replica_0"].begin() as conn:
+            conn.execute(insert(Space.__table__), [{
+                "owner_id": 1, "title": "Replica Space", "description": "d", "location": "Karen",
+                "capacity": 5, "price_per_hour": 10, "price_per_day": 80, "is_available": True,
+            }])
+    return app
+
+
+def test_reads_go_to_replica(tmp_path, monkeypatch):
+    client = make_app(tmp_path, monkeypatch).test_client()
+
+    res = client.get("/api/spaces")
+    assert res.status_code == 200
+    assert [s["title"] for s in res.get_json()] == ["Replica Space"]
+
+
+def test_reads_after_write_stick_to_primary(tmp_path, monkeypatch):
+    client = make_app(tmp_path, monkeypatch).test_client()
+
+    res = client.post("/api/register", json={"name": "Ann", "email": "ann@example.com", "password": "pw"})
+    assert res.status_code == 201
+
+    # Same client just wrote, so it reads the primary (which has no spaces)
+    assert client.get("/api/spaces").get_json() == []
+
+
+def test_read_your_writes_window_can_be_disabled(tmp_path, monkeypatch):
+    client = make_app(tmp_path, monkeypatch, DB_READ_YOUR_WRITES_SECONDS="0").test_client()
+
+    client.post("/api/register", json={"name": "Bob", "email": "bob@example.com", "password": "pw"})
+    assert [s["title"] for s in client.get("/api/spaces").get_json()] == ["Replica Space"]
+
+
+def test_read_your_writes_holds_across_workers(tmp_path, monkeypatch):
+    writer = make_app(tmp_path, monkeypatch).test_client()
+    res = writer.post("/api/register", json={"name": "Cy", "email": "cy@example.com", "password": "pw"})
+    token = res.headers["X-Primary-Until"]
+
+    # Another worker has no memory of the write; the echoed token keeps the client on the primary
+    other = create_app()
+    assert other.test_client().get("/api/spaces", headers={"X-Primary-Until": token}).get_json() == []
+    assert [s["title"] for s in other.test_client().get("/api/spaces").get_json()] == ["Replica Space"]
+    forged = {"X-Primary-Until": token[:-2] + "xx"}
+    assert [s["title"] for s in other.test_client().get("/api/spaces", headers=forged).get_json()] == ["Replica Space"]
+
+
+def test_only_dml_marks_a_write(tmp_path, monkeypatch):
+    from flask import g
+    from sqlalchemy import text, update
+
+    app = make_app(tmp_path, monkeypatch)
+    with app.test_request_context():
+        db.session.execute(text("SELECT 1"))
+        assert not g.get("db_wrote")
+        db.session.execute(update(Space).where(Space.id == 0).values(title="x"))
+        assert g.get("db_wrote")
+        db.session.rollback()
@@ -0,0 +1,108 @@
+from datetime import datetime, timedelta
+
+
+def _setup(client):
+    from models import User, Space, Booking
+    from extensions import db, bcrypt
+
+    pw = bcrypt.generate_password_hash("pw").decode()
+    owner = User(name="Rated Owner", email="rated-owner@example.com", password_hash=pw, role="owner")
+    guest = User(name="Rater", email="rater@example.com", password_hash=pw, role="client")
+    db.session.add_all([owner, guest])
+    db.session.commit()
+    space = Space(owner_id=owner.id, title="Rated Hall", description="d", location="Rated",
+                  capacity=10, price_per_hour=10, price_per_day=80)
+    db.session.add(space)
+    db.session.commit()
+    past = datetime.utcnow() - timedelta(days=3)
+    bookings = [Booking(client_id=guest.id, space_id=space.id, status=status,
+                        start_datetime=past + timedelta(hours=i * 3), end_datetime=past + timedelta(hours=i * 3 + 2))
+                for i, status in enumerate(["confirmed", "confirmed", "pending"])]
+    db.session.add_all(bookings)
+    db.session.commit()
+    token = client.post("/api/login", json={"email": "rater@example.com", "password": "pw"}).get_json()["token"]
+    return {"Authorization": f"Bearer {token}"}, space.id, [b.id for b in bookings]
+
+
+def _rating(client, space_id):
+    body = client.get(f"/api/spaces/{space_id}/reviews").get_json()
+    return body["avg_rating"], body["review_count"]
+
+
+def test_reviews_maintain_space_rating(client, db_session):
+    headers, space_id, (first, second, pending) = _setup(client)
+
+    assert client.post(f"/api/bookings/{pending}/review", headers=headers, json={"rating": 5}).status_code == 400
+    assert client.post(f"/api/bookings/{first}/review", headers=headers, json={"rating": 6}).status_code == 400
+
+    res = client.post(f"/api/bookings/{first}/review", headers=headers, json={"rating": 4, "comment": "Good"})
+    assert res.status_code == 201
+    review_id = res.get_json()["review"]["id"]
+    assert client.post(f"/api/bookings/{first}/review", headers=headers, json={"rating": 1}).status_code == 409
+
+    other = client.post(f"/api/bookings/{second}/review", headers=headers, json={"rating": 2}).get_json()["review"]["id"]
+    assert _rating(client, space_id) == (3, 2)
+
+    client.patch(f"/api/reviews/{review_id}", headers=headers, json={"rating": 5})
+    assert _rating(client, space_id) == (3.5, 2)
+
+    assert client.delete(f"/api/reviews/{other}", headers=headers).status_code == 200
+    assert _rating(client, space_id) == (5, 1)
+
+    reviews = client.get(f"/api/spaces/{space_id}/reviews").get_json()["reviews"]
+    assert [(r["rating"], r["comment"]) for r in reviews] == [(5, "Good")]
+
+    listed = client.get("/api/spaces?min_rating=4.5&sort=rating").get_json()
+    assert listed[0]["id"] == space_id and listed[0]["avg_rating"] == 5
+    assert all(s["avg_rating"] >= 4.5 for s in listed)
+
+
+def test_rating_changes_use_the_stored_rating(client, db_session):
+    from sqlalchemy import update
+    from models import Review
+    from extensions import db
+    import reviews
+
+    headers, space_id, (first, second, _) = _setup(client)
+    res = client.post(f"/api/bookings/{first}/review", headers=headers, json={"rating": 2})
+    review_id = res.get_json()["review"]["id"]
+    client.post(f"/api/bookings/{second}/review", headers=headers, json={"rating": 4})
+
+    # Another request moved the rating 2 -> 3 after this session loaded the review
+    review = db.session.get(Review, review_id)
+    db.session.execute(update(Review).where(Review.id == review_id).values(rating=3)
+                       .execution_options(synchronize_session=False))
+    reviews._adjust(space_id, 0, 1)
+    assert review.rating == 2
+    assert reviews.change_rating(review, 5)
+    db.session.commit()
+    assert _rating(client, space_id) == (4.5, 2)
+
+    review = db.session.get(Review, review_id)
+    db.session.execute(update(Review).where(Review.id == review_id).values(rating=1)
+                       .execution_options(synchronize_session=False))
+    reviews._adjust(space_id, 0, -4)
+    assert reviews.remove_review(review)
+    db.session.commit()
+    assert _rating(client, space_id) == (4, 1)
+
+
+def test_concurrent_duplicate_review_is_a_conflict(client, db_session, monkeypatch):
+    from sqlalchemy import insert
+    from models import Review
+    from extensions import db
+    import reviews
+
+    headers, space_id, (first, _, _) = _setup(client)
+    add_review = reviews.add_review
+
+    def racing_add_review(booking, rating, comment=None):
+        # Another request stores its review after this one checked for duplicates
+        db.session.execute(insert(Review).values(booking_id=booking.id, space_id=booking.space_id,
+                                                 client_id=booking.client_id, rating=1))
+        return add_review(booking, rating, comment)
+
+    monkeypatch.setattr(reviews, "add_review", racing_add_review)
+    res = client.post(f"/api/bookings/{first}/review", headers=headers, json={"rating": 4})
+    assert res.status_code == 409
+    assert _rating(client, space_id) == (0, 0)
@@ -69,3 +69,111 @@ def test_get_spaces(client):
     assert isinstance(spaces_res.get_json(), list)  # Should return a list
     
 
+
+
+def test_get_nearby_spaces(client, app):
+    """Nearby search returns spaces inside the radius, closest first, paginated."""
+    from models import User, Space
+    from extensions import db
+
+    owner = User(name="Geo Owner", email="geo-owner@example.com", password_hash="x", role="owner")
+    db.session.add(owner)
+    db.session.commit()
+    for title, lat, lng in [("CBD Loft", -1.2864, 36.8172), ("Westlands Hub", -1.2676, 36.8108),
+                            ("Karen Garden", -1.3197, 36.7073), ("Mombasa Hall", -4.0435, 39.6682)]:
+        db.session.add(Space(owner_id=owner.id, title=title, description="d", location="Nairobi",
+                             capacity=10, price_per_hour=10, price_per_day=80,
+                             latitude=lat, longitude=lng))
+    db.session.commit()
+
+    res = client.get("/api/spaces/nearby?lat=-1.2864&lng=36.8172&radius=5&limit=1")
+    assert res.status_code == 200
+    body = res.get_json()
+    assert [s["title"] for s in body["spaces"]] == ["CBD Loft"]
+    assert body["next_cursor"]
+
+    res = client.get(f"/api/spaces/nearby?lat=-1.2864&lng=36.8172&radius=5&cursor={body['next_cursor']}")
+    titles = [s["title"] for s in res.get_json()["spaces"]]
+    assert titles == ["Westlands Hub"]
+
+    assert client.get("/api/spaces/nearby?lat=abc&lng=1").status_code == 400
+
+
+def test_filter_spaces_by_amenities(client, app):
+    """Amenity filters match normalized names and return facet counts."""
+    from models import User, Space
+    from extensions import db
+
+    owner = User(name="Amenity Owner", email="amenity-owner@example.com", password_hash="x", role="owner")
+    db.session.add(owner)
+    db.session.commit()
+    for title, amenities in [("Both", ["Wi-Fi", "Projector"]), ("Wifi only", "WiFi, Coffee"),
+                             ("Neither", ["Garden"])]:
+        space = Space(owner_id=owner.id, title=title, description="d", location="Karen",
+                      capacity=10, price_per_hour=10, price_per_day=80)
+        space.set_amenities(amenities)
+        db.session.add(space)
+    db.session.commit()
+
+    res = client.get("/api/spaces?amenities=wifi,projector")
+    assert res.status_code == 200
+    body = res.get_json()
+    assert [s["title"] for s in body["spaces"]] == ["Both"]
+    assert body["facets"]["amenities"] == {"wifi": 1, "projector": 1}
+
+    res = client.get("/api/spaces?amenities=WIFI")
+    titles = {s["title"] for s in res.get_json()["spaces"]}
+    assert titles == {"Both", "Wifi only"}
+
+
+def test_parse_amenities_treats_json_scalars_as_text():
+    from models import parse_amenities
+
+    assert parse_amenities('["WiFi", " Coffee "]') == ["WiFi", "Coffee"]
+    assert parse_amenities("WiFi, Coffee") == ["WiFi", "Coffee"]
+    assert parse_amenities("5") == ["5"]
+    assert parse_amenities("true") == ["true"]
+    assert parse_amenities('{"a": 1}') == ['{"a": 1}']
+
+
+def test_available_spaces_exclude_overlapping_bookings(client, db_session):
+    """Availability search drops booked spaces and pages by price."""
+    from datetime import datetime
+    from models import User, Space, Booking
+    from extensions import db
+
+    owner = User(name="Avail Owner", email="avail-owner@example.com", password_hash="x", role="owner")
+    db.session.add(owner)
+    db.session.commit()
+    spaces = {}
+    for title, price, capacity, location in [("Cheap", 10, 20, "Ruiru"), ("Mid", 20, 20, "Ruiru East"),
+                                             ("Small", 5, 4, "Ruiru"), ("Pricey", 50, 50, "Ruaka"),
+                                             ("Booked", 15, 30, "Ruiru")]:
+        spaces[title] = Space(owner_id=owner.id, title=title, description="d", location=location,
+                              capacity=capacity, price_per_hour=price, price_per_day=price * 8)
+    db.session.add_all(spaces.values())
+    db.session.commit()
+    db.session.add_all([
+        Booking(client_id=owner.id, space_id=spaces["Booked"].id, status="confirmed",
+                start_datetime=datetime(2030, 1, 7, 12), end_datetime=datetime(2030, 1, 7, 14)),
+        # Declined, and back-to-back bookings don't block
+        Booking(client_id=owner.id, space_id=spaces["Cheap"].id, status="declined",
+                start_datetime=datetime(2030, 1, 7, 9), end_datetime=datetime(2030, 1, 7, 17)),
+        Booking(client_id=owner.id, space_id=spaces["Mid"].id, status="pending",
+                start_datetime=datetime(2030, 1, 7, 17), end_datetime=datetime(2030, 1, 7, 19)),
+    ])
+    db.session.commit()
+
+    # Other tests' spaces aren't in Ru*
+    url = "/api/spaces/available?start=2030-01-07T09:00&end=2030-01-07T17:00&min_capacity=10&location=ru"
+    res = client.get(url + "&limit=2")
+    body = res.get_json()
+    assert [s["title"] for s in body["spaces"]] == ["Cheap", "Mid"]
+    res = client.get(url + f"&limit=2&cursor={body['next_cursor']}")
+    assert [s["title"] for s in res.get_json()["spaces"]] == ["Pricey"]
+    assert res.get_json()["next_cursor"] is None
+
+    res = client.get(url.replace("location=ru", "location=RUIRU") + "&sort=price_desc")
+    assert [s["title"] for s in res.get_json()["spaces"]] == ["Mid", "Cheap"]
+
+    assert client.get("/api/spaces/available?start=2030-01-07T09:00").status_code == 400
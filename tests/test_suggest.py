@@ -0,0 +1,110 @@
+import threading
+
+import pytest
+
+import suggest
+from suggest import SuggestIndex, Suggester, build, from_database, normalize
+
+
+SPACES = [
+    (1, "Downtown Photo Studio", "Nairobi CBD"),
+    (2, "Café Mêlée Hall", "Westlands"),
+    (3, "Studio 54", "nairobi cbd "),
+    (4, "Boardroom", "Nairobi CBD"),
+]
+
+
+def test_normalize():
+    assert normalize("  Café  Mêlée-Hall! ") == "cafe melee hall"
+    assert normalize(None) == ""
+
+
+def test_suggest_index_matches_titles_and_word_starts():
+    index = SuggestIndex("stamp", SPACES)
+
+    titles, locations = index.suggest("stu", 5)
+    # Whole-title matches come before later-word matches
+    assert [t["id"] for t in titles] == [3, 1]
+    assert locations == []
+
+    titles, locations = index.suggest("NAI", 5)
+    assert titles == [] and locations == ["Nairobi CBD"]
+    assert [t["id"] for t in index.suggest("melee", 5)[0]] == [2]
+    assert [t["id"] for t in index.suggest("cafe m", 5)[0]] == [2]
+    assert len(index.suggest("s", 1)[0]) == 1
+    assert index.suggest("  ", 5) == ([], [])
+
+
+@pytest.fixture
+def fresh_suggester(app):
+    previous = app.extensions["suggest"]
+    app.extensions["suggest"] = Suggester(check_interval=60, max_stale=30)
+    yield app.extensions["suggest"]
+    app.extensions["suggest"] = previous
+
+
+def test_suggest_endpoint_follows_writes(client, db_session, fresh_suggester, monkeypatch):
+    from models import User, Space
+    from extensions import db
+
+    owner = User(name="Suggest Owner", email="suggest-owner@example.com", role="owner", password_hash="x")
+    db.session.add(owner)
+    db.session.commit()
+    for _, title, location in SPACES:
+        db.session.add(Space(owner_id=owner.id, title=title, description="d", location=location,
+                             capacity=10, price_per_hour=10, price_per_day=80))
+    db.session.commit()
+
+    # The database answers whole-title prefixes while the index builds in the background
+    release = threading.Event()
+
+    def held_build(session=None):
+        release.wait(5)
+        return build(session)
+
+    monkeypatch.setattr(suggest, "build", held_build)
+    body = client.get("/api/spaces/suggest?prefix=stu").get_json()
+    assert [t["title"] for t in body["titles"]] == ["Studio 54"]
+    release.set()
+    fresh_suggester.join()
+    body = client.get("/api/spaces/suggest?prefix=stu").get_json()
+    assert [t["title"] for t in body["titles"]] == ["Studio 54", "Downtown Photo Studio"]
+    index = fresh_suggester.index()
+    assert index is not None
+
+    # Changes that don't touch titles, locations or availability leave the index alone
+    space = Space.query.filter_by(title="Studio 54").one()
+    space.capacity = 12
+    db.session.commit()
+    assert fresh_suggester.index() is index
+
+    # Other changes make the next request start a rebuild despite the long check interval
+    space.is_available = False
+    db.session.commit()
+    client.get("/api/spaces/suggest?prefix=stu&limit=5")
+    fresh_suggester.join()
+    body = client.get("/api/spaces/suggest?prefix=stu&limit=5").get_json()
+    assert [t["title"] for t in body["titles"]] == ["Downtown Photo Studio"]
+    assert fresh_suggester.index() is not index
+
+    assert client.get("/api/spaces/suggest").status_code == 400
+    assert client.get("/api/spaces/suggest?prefix=a&limit=50").status_code == 400
+
+
+def test_database_fallback_matches_whole_prefixes(client, db_session):
+    from models import User, Space
+    from extensions import db
+
+    owner = User(name="Fallback Owner", email="fallback-owner@example.com", role="owner", password_hash="x")
+    db.session.add(owner)
+    db.session.commit()
+    for _, title, location in SPACES:
+        db.session.add(Space(owner_id=owner.id, title=title, description="d", location=location,
+                             capacity=10, price_per_hour=10, price_per_day=80))
+    db.session.commit()
+
+    titles, locations = from_database("STUDIO", 5)
+    assert [t["title"] for t in titles] == ["Studio 54"]
+    assert len(locations) == 0
+    titles, locations = from_database("nairobi", 5)
+    assert titles == [] and "Nairobi CBD" in locations
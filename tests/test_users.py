@@ -85,4 +85,39 @@ def test_logout(client):
     assert "message" in logout_res.get_json()
     assert logout_res.get_json()["message"] == "Logged out successfully"
 
-    
+
+def test_logout_revokes_tokens(client):
+    """After logout neither the access token nor the refresh token works."""
+    client.post("/api/register", json={"name": "Rev", "email": "rev@example.com", "password": "revpass123"})
+    body = client.post("/api/login", json={"email": "rev@example.com", "password": "revpass123"}).get_json()
+    access = {"Authorization": f"Bearer {body['token']}"}
+    refresh = {"Authorization": f"Bearer {body['refresh_token']}"}
+
+    new_token = client.post("/api/refresh", headers=refresh).get_json()["token"]
+    assert client.get("/api/profile", headers={"Authorization": f"Bearer {new_token}"}).status_code == 200
+
+    res = client.post("/api/logout", json={"refresh_token": body["refresh_token"]}, headers=access)
+    assert res.status_code == 200
+    assert client.get("/api/profile", headers=access).status_code == 401
+    assert client.post("/api/refresh", headers=refresh).status_code == 401
+    # Tokens that weren't revoked keep working
+    assert client.get("/api/profile", headers={"Authorization": f"Bearer {new_token}"}).status_code == 200
+
+
+def test_revocations_reach_other_workers():
+    """A token revoked in one worker is rejected by another after a sync."""
+    from datetime import datetime, timedelta
+    import pytest
+    from revocation import RedisStore, RevocationList
+
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    lifetime = timedelta(days=30)
+    worker_a = RevocationList(RedisStore(fakeredis.FakeRedis(server=server), lifetime), sync_interval=0)
+    worker_b = RevocationList(RedisStore(fakeredis.FakeRedis(server=server), lifetime), sync_interval=0)
+
+    assert not worker_b.is_revoked("jti-1")
+    worker_a.revoke("jti-1", "access", 1, datetime.utcnow() + timedelta(minutes=15))
+    worker_a.revoke("jti-old", "access", 1, datetime.utcnow() - timedelta(minutes=1))
+    assert worker_b.is_revoked("jti-1")
+    assert not worker_b.is_revoked("jti-old")  # already expired, nothing to remember
@@ -0,0 +1,35 @@
+from validation import compile_schema, schema_errors
+import schemas
+
+
+def _client_token(client):
+    client.post("/api/register", json={"name": "Val", "email": "val@example.com", "password": "pw"})
+    token = client.post("/api/login", json={"email": "val@example.com", "password": "pw"}).get_json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_schema_errors_name_each_field():
+    errors = schema_errors(compile_schema(schemas.BOOKING_CREATE), {
+        "space_id": "1", "start_datetime": "tomorrow", "end_datetime": "2030-01-01T10:00:00"})
+    assert [e["field"] for e in errors] == ["space_id", "start_datetime"]
+
+
+def test_invalid_bodies_get_structured_400s(client):
+    headers = _client_token(client)
+
+    # Used to be a KeyError and a 500
+    res = client.post("/api/payments", headers=headers, json={"amount": 10})
+    assert res.status_code == 400
+    body = res.get_json()
+    assert body["error"] == "Invalid request body"
+    assert {d["message"] for d in body["details"]} == {
+        "'booking_id' is a required property", "'payment_method' is a required property"}
+
+    res = client.post("/api/bookings", headers=headers, json={
+        "space_id": 1, "start_datetime": "soon", "end_datetime": "2030-01-01T10:00:00"})
+    assert res.status_code == 400
+    assert res.get_json()["details"][0]["field"] == "start_datetime"
+
+    res = client.post("/api/bookings", headers=headers, data="not json", content_type="application/json")
+    assert res.status_code == 400
+    assert res.get_json() == {"error": "Request body must be JSON"}
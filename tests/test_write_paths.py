@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+
+@contextmanager
+def statements():
+    from extensions import db
+
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append(" ".join(statement.split()[:3]).upper())
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        yield seen
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+
+def _after(write, seen):
+    """Statements issued after ``write`` (e.g. "INSERT INTO BOOKINGS")."""
+    return seen[seen.index(write) + 1:]
+
+
+@pytest.fixture
+def owner_and_client(client, db_session):
+    from models import User, Space
+    from extensions import db, bcrypt
+
+    pw = bcrypt.generate_password_hash("pw").decode()
+    owner = User(name="Write Owner", email="write-owner@example.com", password_hash=pw, role="owner")
+    guest = User(name="Write Client", email="write-client@example.com", password_hash=pw, role="client")
+    db.session.add_all([owner, guest])
+    db.session.commit()
+    space = Space(owner_id=owner.id, title="Write Hall", description="d", location="CBD",
+                  capacity=10, price_per_hour=10, price_per_day=80)
+    db.session.add(space)
+    db.session.commit()
+
+    def login(email):
+        token = client.post("/api/login", json={"email": email, "password": "pw"}).get_json()["token"]
+        return {"Authorization": f"Bearer {token}"}
+    return login("write-owner@example.com"), login("write-client@example.com"), space.id
+
+
+def test_create_and_approve_booking_do_not_reload_after_commit(client, owner_and_client):
+    owner, guest, space_id = owner_and_client
+
+    with statements() as seen:
+        res = client.post("/api/bookings", headers=guest, json={
+            "space_id": space_id, "start_datetime": "2030-03-01T09:00", "end_datetime": "2030-03-01T12:00"})
+    booking = res.get_json()["booking"]
+    assert (booking["total_price"], booking["space"]["title"], booking["client"]["name"]) == (30, "Write Hall", "Write Client")
+    assert _after("INSERT INTO BOOKINGS", seen) == []
+
+    with statements() as seen:
+        res = client.patch(f"/api/owner/bookings/{booking['id']}/approve", headers=owner)
+    assert res.get_json()["booking"]["status"] == "confirmed"
+    assert _after("UPDATE BOOKINGS SET", seen) == []
+
+
+def test_update_space_and_create_payment_do_not_reload_after_commit(client, owner_and_client):
+    owner, guest, space_id = owner_and_client
+
+    with statements() as seen:
+        res = client.patch(f"/api/spaces/{space_id}", headers=owner, json={"title": "Renamed"})
+    assert res.get_json()["title"] == "Renamed"
+    assert _after("UPDATE SPACES SET", seen) == []
+
+    booking_id = client.post("/api/bookings", headers=guest, json={
+        "space_id": space_id, "start_datetime": "2030-03-02T09:00",
+        "end_datetime": "2030-03-02T10:00"}).get_json()["booking"]["id"]
+    with statements() as seen:
+        res = client.post("/api/payments", headers=guest,
+                          json={"booking_id": booking_id, "amount": 10, "payment_method": "card"})
+    assert res.get_json()["payment"]["payment_status"] == "pending"
+    assert _after("INSERT INTO PAYMENTS", seen) == []
@@ -0,0 +1,115 @@
+from bisect import bisect_right
+from datetime import datetime
+from sqlalchemy import select
+from extensions import db
+from integrations import mailjet_sender
+from jobs import enqueue
+from models import Booking, User, WaitlistEntry
+
+
+# Waitlist matching.
+#
+# When a booking is declined or cancelled, the waiting entries that fit inside
+# the freed slot come from one range scan on (space_id, status, start_datetime).
+# They are offered the slot oldest first. Each offer becomes a pending booking,
+# and an IntervalSet of everything already taken stops offers from
+# overlapping active bookings or each other, so one freed day can serve
+# several shorter requests.
+
+ACTIVE_STATUSES = ('pending', 'confirmed')
+
+
+class IntervalSet:
+    """Disjoint, sorted ``[start, end)`` intervals with O(log n) overlap checks."""
+
+    def __init__(self, intervals=()):
+        self._starts, self._ends = [], []
+        for start, end in sorted(intervals):
+            if self._ends and start < self._ends[-1]:
+                self._ends[-1] = max(self._ends[-1], end)  # merge overlapping bookings
+            else:
+                self._starts.append(start)
+                self._ends.append(end)
+
+    def overlaps(self, start, end):
+        i = bisect_right(self._starts, start) - 1
+        if i >= 0 and self._ends[i] > start:
+            return True
+        return i + 1 < len(self._starts) and self._starts[i + 1] < end
+
+    def add(self, start, end):
+        """Add an interval known not to overlap any existing one."""
+        i = bisect_right(self._starts, start)
+        self._starts.insert(i, start)
+        self._ends.insert(i, end)
+
+
+def active_overlap(space_id, start, end):
+    """Whether any pending/confirmed booking on the space overlaps ``[start, end)``."""
+    return db.session.query(
+        select(Booking.id).where(
+            Booking.space_id == space_id, Booking.status.in_(ACTIVE_STATUSES),
+            Booking.start_datetime < end, Booking.end_datetime > start,
+        ).exists()
+    ).scalar()
+
+
+def offer_freed_slot(space, start, end):
+    """
+    Offer ``[start, end)`` on ``space`` to waiting clients, oldest entry first.
+    Creates a pending booking per offer and queues the notifications; the
+    caller commits. Returns the entries that got an offer.
+    """
+    entries = WaitlistEntry.query.filter(
+        WaitlistEntry.space_id == space.id,
+        WaitlistEntry.status == 'waiting',
+        WaitlistEntry.start_datetime >= max(start, datetime.utcnow()),
+        WaitlistEntry.start_datetime < end,
+        WaitlistEntry.end_datetime <= end,
+    ).order_by(WaitlistEntry.created_at, WaitlistEntry.id).all()
+    if not entries:
+        return []
+
+    taken = IntervalSet(db.session.execute(
+        select(Booking.start_datetime, Booking.end_datetime).where(
+            Booking.space_id == space.id, Booking.status.in_(ACTIVE_STATUSES),
+            Booking.start_datetime < end, Booking.end_datetime > start,
+        )
+    ).all())
+
+    offered = []
+    now = datetime.utcnow()
+    for entry in entries:
+        if taken.overlaps(entry.start_datetime, entry.end_datetime):
+            continue
+        booking = Booking(client_id=entry.client_id, space_id=space.id,
+                          start_datetime=entry.start_datetime, end_datetime=entry.end_datetime)
+        booking.space = space
+        booking.calculate_duration()
+        booking.calculate_total_price()
+        db.session.add(booking)
+        entry.booking = booking
+        entry.status = 'offered'
+        entry.offered_at = now
+        taken.add(entry.start_datetime, entry.end_datetime)
+        offered.append(entry)
+
+    _notify(space, offered)
+    return offered
+
+
+def _notify(space, entries):
+    if not entries:
+        return
+    clients = {u.id: u for u in User.query.filter(User.id.in_({e.client_id for e in entries}))}
+    sender = mailjet_sender()
+    for entry in entries:
+        client = clients[entry.client_id]
+        when = f"{entry.start_datetime:%Y-%m-%d %H:%M} to {entry.end_datetime:%Y-%m-%d %H:%M}"
+        enqueue('send_mail', {'data': {'Messages': [{
+            "From": sender,
+            "To": [{"Email": client.email, "Name": client.name}],
+            "Subject": f"A slot opened up at {space.title}",
+            "TextPart": f"Hi {client.name}, {space.title} is now free from {when}. "
+                        f"We've reserved it for you as a pending booking.",
+        }]}})